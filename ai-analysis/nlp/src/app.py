@@ -1,12 +1,84 @@
-from fastapi import FastAPI
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import List
+import torch
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 from pydantic import BaseModel
-from src.hybrid_infer import hybrid_predict  # adjust import if necessary
+from starlette.concurrency import run_in_threadpool
+from src.batching import MicroBatcher
+from src.hybrid_infer import cache, detect_language, detect_languages, make_result, models, route_chunks, route_model, run_model  # adjust import if necessary
+from src.utils import load_config
 
-app = FastAPI()
+logger = logging.getLogger(__name__)
+
+_config = load_config()
+_batch_config = _config.get("batch_predict", {})
+TORCH_THREADS = int(_config.get("models", {}).get("torch_threads", 0))
+RELOAD_CHECK_S = float(_config.get("models", {}).get("reload_check_s", 30))
+BATCH_MAX_TEXTS = int(_batch_config.get("max_texts", 1000))
+BATCH_SIZE = int(_batch_config.get("batch_size", 32))
+
+# Concurrent /predict calls share forward passes; see src/batching.py
+batcher = MicroBatcher(run_model)
+
+# Eager loading happens at import: under `gunicorn --preload` that is once,
+# in the master, and the forked workers share the weights copy-on-write.
+if not models.lazy:
+    models.load_all()
+
+def model_specs(config):
+    return {name: spec for name, spec in config.get("models", {}).items() if isinstance(spec, dict)}
+
+async def watch_models():
+    """
+    Hot-swap models whose config or files changed. Every worker runs this,
+    so a change made for one worker (or new weights on disk) reaches all.
+    """
+    while True:
+        await asyncio.sleep(RELOAD_CHECK_S)
+        try:
+            specs = model_specs(await run_in_threadpool(load_config))
+            if await run_in_threadpool(models.changed, specs):
+                await batcher.run(models.reload, specs)
+        except Exception:
+            logger.exception("Model reload check failed")
+
+def warmup_done(app, task):
+    """Log a failed warm-up and keep the error for /ready, which otherwise only shows 503."""
+    if task.cancelled() or task.exception() is None:
+        return
+    error = task.exception()
+    app.state.warmup_error = f"{type(error).__name__}: {error}"
+    logger.error("Model warm-up failed", exc_info=error)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if TORCH_THREADS:
+        torch.set_num_threads(TORCH_THREADS)
+    # Warm up in each worker (after the fork) without blocking startup;
+    # /ready answers 503 until it is done. Lazy models warm up as they load.
+    app.state.warmup_error = None
+    warmup = None if models.lazy else asyncio.create_task(batcher.run(models.warm_up_all))
+    if warmup is not None:
+        warmup.add_done_callback(lambda task: warmup_done(app, task))
+    watcher = asyncio.create_task(watch_models()) if RELOAD_CHECK_S > 0 else None
+    yield
+    for task in (warmup, watcher):
+        if task is not None:
+            task.cancel()
+    await batcher.stop()
+
+app = FastAPI(lifespan=lifespan)
 
 class PostIn(BaseModel):
     content_text: str
 
+class BatchIn(BaseModel):
+    texts: List[str]
+
 class PredictionOut(BaseModel):
     predicted_label: int
     confidence: float
@@ -15,6 +87,58 @@ class PredictionOut(BaseModel):
     model_used: str
 
 @app.post("/predict", response_model=PredictionOut)
-def predict_post(post: PostIn):
-    result = hybrid_predict(post.content_text)  # returns dict
+async def predict_post(post: PostIn):
+    result = await run_in_threadpool(cache.get, post.content_text)
+    if result is None:
+        version = models.version
+        lang = await run_in_threadpool(detect_language, post.content_text)
+        model_used = route_model(lang)
+        pred, confidence = await batcher.submit(model_used, post.content_text)
+        result = make_result(pred, confidence, lang, model_used)
+        await run_in_threadpool(cache.put, post.content_text, result, version)
     return PredictionOut(**result)
+
+@app.post("/predict/batch", response_model=List[PredictionOut])
+async def predict_batch(batch: BatchIn):
+    """Predictions for many texts, in input order, each as /predict would return it."""
+    if len(batch.texts) > BATCH_MAX_TEXTS:
+        raise HTTPException(status_code=413, detail=f"At most {BATCH_MAX_TEXTS} texts per call")
+    results = await run_in_threadpool(cache.get_many, batch.texts)
+    # Predict each distinct uncached text once
+    misses = list(dict.fromkeys(text for text, result in zip(batch.texts, results) if result is None))
+    if misses:
+        version = models.version
+        langs = await run_in_threadpool(detect_languages, misses)
+        predicted = [None] * len(misses)
+        for model_used, chunk in route_chunks(misses, langs, BATCH_SIZE):
+            # One forward-thread job per chunk: /predict batches queued meanwhile run in between
+            outputs = await batcher.run(run_model, model_used, [misses[i] for i in chunk])
+            for i, (pred, confidence) in zip(chunk, outputs):
+                predicted[i] = make_result(pred, confidence, langs[i], model_used)
+        await run_in_threadpool(cache.put_many, misses, predicted, version)
+        by_text = dict(zip(misses, predicted))
+        results = [by_text[text] if result is None else result for text, result in zip(batch.texts, results)]
+    return results
+
+@app.get("/ready")
+def get_ready():
+    """200 once every model is loaded and warmed up in this worker, else 503 (with warmup_error if it failed)."""
+    stats = models.stats()
+    stats["warmup_error"] = getattr(app.state, "warmup_error", None)
+    return JSONResponse(stats, status_code=200 if stats["ready"] else 503, headers={"X-Worker-Pid": str(os.getpid())})
+
+@app.post("/models/reload")
+async def reload_models():
+    """
+    Re-read the models section of config.yaml and hot-swap any model whose
+    settings or files changed, in this worker now. The other workers find
+    the same change within models.reload_check_s. Cached predictions of the
+    old version stop being served.
+    """
+    specs = model_specs(load_config())
+    swapped = await batcher.run(models.reload, specs)
+    return {"swapped": swapped, "version": models.version}
+
+@app.get("/stats")
+def get_stats():
+    return {"batching": batcher.stats(), "models": models.stats(), "cache": cache.stats()}
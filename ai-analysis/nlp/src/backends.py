@@ -0,0 +1,75 @@
+import os
+
+import torch
+from transformers import AutoModelForSequenceClassification
+from transformers.modeling_outputs import SequenceClassifierOutput
+
+BACKENDS = ("fp32", "int8", "onnx")
+
+
+class OnnxSequenceClassifier:
+    """
+    ONNX Runtime session behind the same call signature as a Hugging Face
+    classifier: model(**tokenizer_output).logits.
+
+    The session (and its thread pool) is created on first use in each
+    process: threads don't survive a fork, so a session built in the
+    gunicorn master would be unusable in the workers.
+    """
+
+    def __init__(self, path, threads=0):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"No ONNX model at {path}; run src/export_onnx.py first")
+        self.path = path
+        self.threads = threads
+        self._session = None
+        self._pid = None
+
+    def session(self):
+        if self._pid != os.getpid():
+            import onnxruntime  # optional: only needed for the onnx backend
+
+            options = onnxruntime.SessionOptions()
+            if self.threads:
+                options.intra_op_num_threads = self.threads
+            self._session = onnxruntime.InferenceSession(self.path, options, providers=["CPUExecutionProvider"])
+            self._pid = os.getpid()
+        return self._session
+
+    def __call__(self, **inputs):
+        session = self.session()
+        feed = {i.name: inputs[i.name].numpy() for i in session.get_inputs()}
+        logits = session.run(["logits"], feed)[0]
+        return SequenceClassifierOutput(logits=torch.from_numpy(logits))
+
+    def eval(self):
+        return self
+
+
+def default_onnx_path(model_path):
+    """Where src/export_onnx.py writes a checkpoint's ONNX model by default."""
+    return os.path.join(model_path, "onnx", "model.onnx")
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of `model`'s Linear layers (in place; returns the quantized model)."""
+    return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def load_model(path, backend="fp32", onnx_path=None, threads=0, **kwargs):
+    """
+    A classifier for the checkpoint at `path` on the given backend:
+      * fp32 - the PyTorch model as trained
+      * int8 - dynamic int8 quantization of its Linear layers (weights
+        quantized once at load, activations per batch)
+      * onnx - an ONNX Runtime session over `onnx_path` (see export_onnx.py)
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "onnx":
+        return OnnxSequenceClassifier(onnx_path or default_onnx_path(path), threads)
+    model = AutoModelForSequenceClassification.from_pretrained(path, **kwargs)
+    model.eval()
+    if backend == "int8":
+        model = quantize_int8(model)
+    return model
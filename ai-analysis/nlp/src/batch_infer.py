@@ -1,14 +1,16 @@
 import pandas as pd
 import torch
-from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+from transformers import DistilBertTokenizerFast
+
+from backends import load_model
 
 MODEL_PATH = "../models/model_checkpoint"
 INPUT_CSV = "../raw_data/large_social_posts.csv"
 OUTPUT_CSV = "../output/predictions.csv"
 BATCH_SIZE = 32
+BACKEND = "fp32"  # or int8 / onnx, see backends.py
 
 def predict_batch(texts, model, tokenizer):
-    model.eval()
     preds = []
     probs_list = []
     
@@ -30,7 +32,7 @@ def main():
     texts = df["content_text"].tolist()
     
     tokenizer = DistilBertTokenizerFast.from_pretrained(MODEL_PATH)
-    model = DistilBertForSequenceClassification.from_pretrained(MODEL_PATH)
+    model = load_model(MODEL_PATH, backend=BACKEND)
     
     preds, probs = predict_batch(texts, model, tokenizer)
     
@@ -0,0 +1,104 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.utils import load_config
+
+_config = load_config().get("batching", {})
+MAX_WAIT_MS = float(_config.get("max_wait_ms", 5))
+MAX_BATCH_SIZE = int(_config.get("max_batch_size", 32))
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests per model and runs them as one padded
+    forward pass.
+
+    A batch closes when it holds `max_batch_size` texts or `max_wait_ms`
+    after its first text arrived, whichever comes first. Forward passes run
+    one at a time on a worker thread (torch already uses every core within a
+    pass), so the event loop stays free to accept requests meanwhile.
+    `run_batch(model_name, texts)` must return one result per text.
+    """
+
+    def __init__(self, run_batch, max_wait_ms=MAX_WAIT_MS, max_batch_size=MAX_BATCH_SIZE):
+        self.run_batch = run_batch
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_size = max_batch_size
+        self._queues = {}
+        self._workers = {}
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="forward")
+        self.batches = 0
+        self.items = 0
+        self.forward_seconds = 0.0
+
+    async def submit(self, model_name, text):
+        """Queue one text for `model_name` and wait for its result."""
+        if model_name not in self._queues:
+            self._queues[model_name] = asyncio.Queue()
+            self._workers[model_name] = asyncio.create_task(self._worker(model_name, self._queues[model_name]))
+        future = asyncio.get_running_loop().create_future()
+        await self._queues[model_name].put((text, future))
+        return await future
+
+    async def _collect(self, queue):
+        batch = [await queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not queue.empty():
+                batch.append(queue.get_nowait())
+                continue
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        # Callers that gave up (client disconnected) don't need a slot
+        return [(text, future) for text, future in batch if not future.done()]
+
+    async def _worker(self, model_name, queue):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect(queue)
+            if not batch:
+                continue
+            texts = [text for text, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self._executor, self.run_batch, model_name, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.forward_seconds += time.perf_counter() - start
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+    async def run(self, fn, *args):
+        """Run `fn` on the forward-pass thread, in turn with the batches."""
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    async def stop(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        self._queues.clear()
+        self._workers.clear()
+        self._executor.shutdown(wait=False)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "mean_batch_size": self.items / self.batches if self.batches else 0.0,
+            "forward_seconds": self.forward_seconds,
+            "queued": {name: queue.qsize() for name, queue in self._queues.items()},
+            "max_wait_ms": self.max_wait * 1000,
+            "max_batch_size": self.max_batch_size,
+        }
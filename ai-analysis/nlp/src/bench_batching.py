@@ -0,0 +1,117 @@
+"""
+Throughput and latency of /predict inference with and without micro-batching.
+
+Runs in-process against the real models. --concurrency clients each send
+one text at a time for --duration seconds:
+  * unbatched - one forward pass per text, as predict_post did before
+  * wait=N    - MicroBatcher with an N ms wait window
+
+Language detection is done once up front so only model time is compared.
+
+Usage (from ai-analysis/nlp):
+    python -m src.bench_batching --concurrency 32 --windows 0,2,5,10,20
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from src.batching import MAX_BATCH_SIZE, MicroBatcher
+from src.hybrid_infer import detect_language, route_model, run_model
+
+SAMPLE_TEXTS = [
+    "High waves warning in area",
+    "The high waves are perfect for surfing",
+    "Water entering houses near the harbour, please send help",
+    "Fishermen told not to go to sea for the next two days due to swell surge",
+    "जल स्तर तेजी से बढ़ रहा है",
+    "समुद्र में ऊंची लहरें उठ रही हैं, तट से दूर रहें",
+]
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+
+async def closed_loop(submit, items, concurrency, duration):
+    latencies = []
+    stop_at = time.perf_counter() + duration
+
+    async def client(offset):
+        i = offset
+        while time.perf_counter() < stop_at:
+            model_used, text = items[i % len(items)]
+            start = time.perf_counter()
+            await submit(model_used, text)
+            latencies.append((time.perf_counter() - start) * 1000)
+            i += concurrency
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": len(latencies),
+        "throughput_rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50),
+        "p99_ms": percentile(latencies, 0.99),
+    }
+
+
+async def unbatched(items, concurrency, duration):
+    executor = ThreadPoolExecutor(max_workers=1)
+    loop = asyncio.get_running_loop()
+
+    async def submit(model_used, text):
+        return await loop.run_in_executor(executor, run_model, model_used, [text])
+
+    try:
+        return await closed_loop(submit, items, concurrency, duration)
+    finally:
+        executor.shutdown()
+
+
+async def batched(items, concurrency, duration, wait_ms, max_batch_size):
+    batcher = MicroBatcher(run_model, max_wait_ms=wait_ms, max_batch_size=max_batch_size)
+    try:
+        result = await closed_loop(batcher.submit, items, concurrency, duration)
+    finally:
+        await batcher.stop()
+    result["mean_batch_size"] = batcher.stats()["mean_batch_size"]
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--windows", default="0,2,5,10,20", help="comma-separated wait windows in ms")
+    parser.add_argument("--max-batch-size", type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument("--csv", help="take texts from the content_text column of this CSV instead of the samples")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv)["content_text"].dropna().tolist() if args.csv else SAMPLE_TEXTS
+    items = [(route_model(detect_language(text)), text) for text in texts]
+
+    results = {"unbatched": asyncio.run(unbatched(items, args.concurrency, args.duration))}
+    for window in args.windows.split(","):
+        wait_ms = float(window)
+        results[f"wait={window}ms"] = asyncio.run(batched(items, args.concurrency, args.duration, wait_ms, args.max_batch_size))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'mode':<14}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'batch':>8}")
+    print("-" * 52)
+    for name, r in results.items():
+        print(f"{name:<14}{r['throughput_rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p99_ms']:>10.1f}{r.get('mean_batch_size', 1):>8.1f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
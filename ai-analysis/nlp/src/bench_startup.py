@@ -0,0 +1,129 @@
+"""
+Startup time and per-worker memory of the inference service.
+
+  * import - seconds to `import src.app` in a fresh interpreter, with lazy
+    and with eager model loading
+  * serve  - gunicorn with --workers workers, eager loading, with and
+    without preload_app: seconds until /ready answered 200 for every
+    worker, then RSS and PSS per worker from /proc/<pid>/smaps_rollup.
+    PSS splits shared pages between the processes that map them, so it
+    drops when the weights are shared copy-on-write.
+
+Linux only (reads /proc). Needs gunicorn and uvicorn installed.
+
+Usage (from ai-analysis/nlp):
+    python -m src.bench_startup --workers 4
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import yaml
+
+from src.utils import load_config
+
+
+def write_config(loading):
+    config = load_config()
+    config.setdefault("models", {})["loading"] = loading
+    f = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)
+    yaml.safe_dump(config, f)
+    f.close()
+    return f.name
+
+
+def import_seconds(loading):
+    env = dict(os.environ, NLP_CONFIG=write_config(loading))
+    code = "import time; t = time.perf_counter(); import src.app; print(time.perf_counter() - t)"
+    out = subprocess.run([sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def memory_kb(pid):
+    """(rss, pss) in kB."""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, rest = line.partition(":")
+            if key in ("Rss", "Pss"):
+                values[key] = int(rest.split()[0])
+    return values["Rss"], values["Pss"]
+
+
+def children(pid):
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(p) for p in f.read().split()]
+
+
+def serve(workers, preload, port, timeout):
+    env = dict(
+        os.environ,
+        NLP_CONFIG=write_config("eager"),
+        NLP_WORKERS=str(workers),
+        NLP_PRELOAD="true" if preload else "false",
+        NLP_BIND=f"127.0.0.1:{port}",
+    )
+    start = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "src/gunicorn_conf.py", "src.app:app"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        # Connections are spread across workers, so keep polling until
+        # every worker has answered ready at least once
+        ready_pids = set()
+        while len(ready_pids) < workers:
+            if time.perf_counter() - start > timeout:
+                raise TimeoutError(f"not ready after {timeout}s")
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready", timeout=5) as response:
+                    ready_pids.add(response.headers["x-worker-pid"])
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.2)
+        ready_seconds = time.perf_counter() - start
+        worker_memory = [memory_kb(pid) for pid in children(master.pid)]
+        return {
+            "preload": preload,
+            "ready_seconds": ready_seconds,
+            "worker_rss_mb": sum(rss for rss, _ in worker_memory) / len(worker_memory) / 1024,
+            "worker_pss_mb": sum(pss for _, pss in worker_memory) / len(worker_memory) / 1024,
+            "total_pss_mb": (sum(pss for _, pss in worker_memory) + memory_kb(master.pid)[1]) / 1024,
+        }
+    finally:
+        master.send_signal(signal.SIGTERM)
+        master.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=600)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = {
+        "import_seconds": {loading: import_seconds(loading) for loading in ("lazy", "eager")},
+        "serve": [serve(args.workers, preload, args.port, args.timeout) for preload in (False, True)],
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\nimport src.app: lazy {results['import_seconds']['lazy']:.2f}s, eager {results['import_seconds']['eager']:.2f}s")
+    print(f"\n{'preload':<9}{'ready s':>9}{'worker RSS MB':>15}{'worker PSS MB':>15}{'total PSS MB':>14}")
+    print("-" * 62)
+    for r in results["serve"]:
+        print(f"{str(r['preload']):<9}{r['ready_seconds']:>9.1f}{r['worker_rss_mb']:>15.0f}{r['worker_pss_mb']:>15.0f}{r['total_pss_mb']:>14.0f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,111 @@
+import argparse
+import copy
+import sys
+import time
+
 import torch
-from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+from transformers import AutoModelForSequenceClassification, AutoTokenizer, DistilBertTokenizerFast, DistilBertForSequenceClassification
 import pandas as pd
-from sklearn.metrics import classification_report
+from sklearn.metrics import accuracy_score, classification_report, f1_score
 from torch.utils.data import DataLoader
 
-from train import HazardDataset
+from backends import BACKENDS, load_model, quantize_int8
+from train import HazardDataset, MAX_LEN
+
+MODEL_PATH = "../models/model_checkpoint"
+DATA_CSV = "../processed_data/labeled_data.csv"
+
+def load_data(path, limit=None):
+    df = pd.read_csv(path)
+    if limit:
+        df = df.head(limit)
+    return df['clean_text'].tolist(), df['relevance'].astype(int).tolist()
+
+def predict_labels(texts, tokenizer, model, batch_size=32):
+    """Predicted labels for `texts` on any backend from backends.load_model."""
+    preds = []
+    with torch.no_grad():
+        for i in range(0, len(texts), batch_size):
+            inputs = tokenizer(texts[i:i + batch_size], return_tensors="pt", truncation=True, padding=True, max_length=MAX_LEN)
+            preds.extend(model(**inputs).logits.argmax(dim=1).tolist())
+    return preds
+
+def load_trained(path, num_labels=None):
+    """
+    The fp32 classifier at `path`. Exits if its classification head is not
+    in the checkpoint: a freshly initialised head differs on every load, so
+    scores against it compare random weights, not backends.
+    """
+    kwargs = {"num_labels": num_labels} if num_labels else {}
+    model, info = AutoModelForSequenceClassification.from_pretrained(path, output_loading_info=True, **kwargs)
+    if info["missing_keys"]:
+        sys.exit(f"{path} has no trained classification head (missing {', '.join(info['missing_keys'])}); "
+                 "fine-tune it first and gate the saved checkpoint")
+    return model.eval()
+
+def gate_models(args):
+    """fp32 and `args.backend` models over the same trained weights."""
+    fp32 = load_trained(args.model, args.num_labels)
+    if args.backend == "int8":
+        # Quantize a copy of the weights fp32 is scored with, not a second load
+        other = quantize_int8(copy.deepcopy(fp32))
+    elif args.backend == "onnx":
+        other = load_model(args.model, backend="onnx", onnx_path=args.onnx_path)
+    else:
+        other = fp32
+    return {"fp32": fp32, args.backend: other}
+
+def parity_gate(args):
+    """
+    Evaluate `args.backend` against fp32 on the same data; exit 1 if its
+    accuracy or F1 is more than `args.tolerance` below fp32's.
+    """
+    texts, labels = load_data(args.data, args.limit)
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+
+    scores = {}
+    for backend, model in gate_models(args).items():
+        start = time.perf_counter()
+        preds = predict_labels(texts, tokenizer, model)
+        seconds = time.perf_counter() - start
+        scores[backend] = {
+            "accuracy": accuracy_score(labels, preds),
+            "f1": f1_score(labels, preds, average="binary"),
+            "texts_per_s": len(texts) / seconds,
+        }
+
+    print(f"{'backend':<8}{'accuracy':>10}{'f1':>10}{'texts/s':>10}")
+    for backend, s in scores.items():
+        print(f"{backend:<8}{s['accuracy']:>10.4f}{s['f1']:>10.4f}{s['texts_per_s']:>10.1f}")
+
+    drops = {metric: scores["fp32"][metric] - scores[args.backend][metric] for metric in ("accuracy", "f1")}
+    failed = [metric for metric, drop in drops.items() if drop > args.tolerance]
+    if failed:
+        print(f"FAIL: {args.backend} drops " + ", ".join(f"{m} by {drops[m]:.4f}" for m in failed)
+              + f" (tolerance {args.tolerance})")
+        sys.exit(1)
+    print(f"PASS: {args.backend} is within {args.tolerance} of fp32 on accuracy and F1")
 
 def main():
-    df = pd.read_csv("../processed_data/labeled_data.csv")
-    texts = df['clean_text'].tolist()
-    labels = df['relevance'].astype(int).tolist()
+    parser = argparse.ArgumentParser(description="Evaluate the classifier, or gate a quantized/ONNX backend against fp32.")
+    parser.add_argument("--model", default=MODEL_PATH, help="checkpoint directory or hub name")
+    parser.add_argument("--data", default=DATA_CSV)
+    parser.add_argument("--limit", type=int, help="evaluate on the first N rows only")
+    parser.add_argument("--gate", action="store_true", help="compare --backend against fp32 and fail past --tolerance")
+    parser.add_argument("--backend", choices=BACKENDS, default="int8")
+    parser.add_argument("--num-labels", type=int, help="label count, for checkpoints saved without it in their config")
+    parser.add_argument("--onnx-path", help="ONNX file for --backend onnx (default: <model>/onnx/model.onnx)")
+    parser.add_argument("--tolerance", type=float, default=0.01, help="largest allowed drop in accuracy or F1")
+    args = parser.parse_args()
 
-    tokenizer = DistilBertTokenizerFast.from_pretrained("../models/model_checkpoint")
-    model = DistilBertForSequenceClassification.from_pretrained("../models/model_checkpoint")
+    if args.gate:
+        parity_gate(args)
+        return
+
+    texts, labels = load_data(args.data, args.limit)
+
+    tokenizer = DistilBertTokenizerFast.from_pretrained(args.model)
+    model = DistilBertForSequenceClassification.from_pretrained(args.model)
 
     dataset = HazardDataset(texts, labels, tokenizer)
     loader = DataLoader(dataset, batch_size=16)
@@ -30,7 +123,7 @@ def main():
 
             all_preds.extend(preds.cpu().numpy())
             all_labels.extend(labels_batch.cpu().numpy())
-    
+
     print(classification_report(all_labels, all_preds))
 
 if __name__ == "__main__":
@@ -0,0 +1,104 @@
+"""
+Export a trained classifier (train.py output, or any Hugging Face sequence
+classification checkpoint) to ONNX for the `onnx` backend.
+
+Writes <out>/model.onnx, with batch and sequence length as dynamic axes,
+and with --quantize also <out>/model.int8.onnx (dynamic int8 quantization
+by ONNX Runtime; point the model's onnx_path in config.yaml at it). The
+tokenizer is saved next to them. Afterwards the logits are compared with
+PyTorch on a few sample texts.
+
+Usage (from src/, like train.py):
+    python export_onnx.py --model ../models/model_checkpoint --quantize
+    python export_onnx.py --model ai4bharat/indic-bert --num-labels 2 --out ../models/indicbert_onnx
+"""
+
+import argparse
+import os
+
+import numpy as np
+import torch
+from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+from backends import OnnxSequenceClassifier
+
+MAX_LEN = 128
+SAMPLE_TEXTS = [
+    "High waves warning in area",
+    "The high waves are perfect for surfing",
+    "जल स्तर तेजी से बढ़ रहा है",
+]
+
+
+class LogitsOnly(torch.nn.Module):
+    """Positional inputs in, logits out: the shape torch.onnx.export wants."""
+
+    def __init__(self, model, input_names):
+        super().__init__()
+        self.model = model
+        self.input_names = input_names
+
+    def forward(self, *inputs):
+        return self.model(**dict(zip(self.input_names, inputs))).logits
+
+
+def export(model_path, out_dir, num_labels=None, opset=14):
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    kwargs = {"num_labels": num_labels} if num_labels else {}
+    model = AutoModelForSequenceClassification.from_pretrained(model_path, **kwargs)
+    model.eval()
+
+    sample = tokenizer(SAMPLE_TEXTS, return_tensors="pt", truncation=True, padding=True, max_length=MAX_LEN)
+    input_names = list(sample.keys())  # DistilBERT has no token_type_ids, IndicBERT (ALBERT) does
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "model.onnx")
+    with torch.no_grad():
+        torch.onnx.export(
+            LogitsOnly(model, input_names),
+            tuple(sample[name] for name in input_names),
+            path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes={**{name: {0: "batch", 1: "sequence"} for name in input_names}, "logits": {0: "batch"}},
+            opset_version=opset,
+        )
+    tokenizer.save_pretrained(out_dir)
+    return tokenizer, model, path
+
+
+def quantize(path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    int8_path = path.replace(".onnx", ".int8.onnx")
+    quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def max_logit_diff(tokenizer, model, onnx_path):
+    inputs = tokenizer(SAMPLE_TEXTS, return_tensors="pt", truncation=True, padding=True, max_length=MAX_LEN)
+    with torch.no_grad():
+        expected = model(**inputs).logits.numpy()
+    actual = OnnxSequenceClassifier(onnx_path)(**inputs).logits.numpy()
+    return float(np.abs(expected - actual).max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="../models/model_checkpoint", help="checkpoint directory or hub name")
+    parser.add_argument("--out", help="output directory (default: <model>/onnx)")
+    parser.add_argument("--num-labels", type=int, help="only for checkpoints without a trained head")
+    parser.add_argument("--quantize", action="store_true", help="also write a dynamic int8 model.int8.onnx")
+    parser.add_argument("--opset", type=int, default=14)
+    args = parser.parse_args()
+
+    out_dir = args.out or os.path.join(args.model, "onnx")
+    tokenizer, model, path = export(args.model, out_dir, args.num_labels, args.opset)
+    print(f"Exported {path} (max |logit diff| vs PyTorch: {max_logit_diff(tokenizer, model, path):.2e})")
+    if args.quantize:
+        int8_path = quantize(path)
+        print(f"Quantized {int8_path} (max |logit diff| vs PyTorch: {max_logit_diff(tokenizer, model, int8_path):.2e})")
+    print("Check accuracy with: python evaluate.py --gate --backend onnx --onnx-path", path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+# gunicorn -c src/gunicorn_conf.py src.app:app   (from ai-analysis/nlp)
+#
+# With preload_app the master imports src.app, and so loads the models,
+# once; workers are forked from it and share the weight pages copy-on-write.
+import gc
+import os
+
+bind = os.getenv("NLP_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("NLP_WORKERS", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = os.getenv("NLP_PRELOAD", "true").lower() in ("1", "true", "yes")
+timeout = int(os.getenv("NLP_TIMEOUT", "120"))
+
+def when_ready(server):
+    # Runs in the master before the first fork. Freezing moves everything
+    # loaded so far out of the cyclic GC, so collections in the workers
+    # don't write to those objects and un-share their pages.
+    gc.freeze()
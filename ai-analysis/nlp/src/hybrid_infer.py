@@ -1,21 +1,25 @@
 from langdetect import detect
 import torch
-from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
-from transformers import AutoTokenizer, AutoModelForSequenceClassification
+from src.model_manager import ModelManager
+from src.prediction_cache import PredictionCache
+from src.utils import load_config
 
-# Load English model (DistilBERT)
-DISTILBERT_MODEL_PATH = "../models/distilbert_model"
-distilbert_tokenizer = DistilBertTokenizerFast.from_pretrained(DISTILBERT_MODEL_PATH)
-distilbert_model = DistilBertForSequenceClassification.from_pretrained(DISTILBERT_MODEL_PATH)
-distilbert_model.eval()
+# DistilBERT for English, IndicBERT for Indian languages; paths, and
+# whether they load at startup or on first use, come from config.yaml
+INDIAN_LANG_CODES = ['hi', 'bn', 'ta', 'te', 'ml', 'gu', 'kn', 'mr', 'or', 'pa', 'as']
+MAX_LEN = 128
+BATCH_SIZE = 32
 
-# Load IndicBERT model
-INDICBERT_MODEL_NAME = "ai4bharat/indic-bert"
-indicbert_tokenizer = AutoTokenizer.from_pretrained(INDICBERT_MODEL_NAME)
-indicbert_model = AutoModelForSequenceClassification.from_pretrained(INDICBERT_MODEL_NAME, num_labels=2)  # adjust labels
-indicbert_model.eval()
+models = ModelManager.from_config(load_config().get("models", {}), max_len=MAX_LEN)
 
-INDIAN_LANG_CODES = ['hi', 'bn', 'ta', 'te', 'ml', 'gu', 'kn', 'mr', 'or', 'pa', 'as']
+# Reposts and cross-posts repeat the same text; results are cached per model version
+_cache_config = load_config().get("cache", {})
+cache = PredictionCache(
+    lambda: models.version,
+    max_entries=int(_cache_config.get("max_entries", 100000)) if _cache_config.get("enabled", True) else 0,
+    disk_path=(_cache_config.get("disk_path") or None) if _cache_config.get("enabled", True) else None,
+    disk_max_entries=int(_cache_config.get("disk_max_entries", 1000000)),
+)
 
 def detect_language(text):
     try:
@@ -23,30 +27,73 @@ def detect_language(text):
     except:
         return "unknown"
 
-def predict_with_model(text, tokenizer, model):
-    inputs = tokenizer(text, return_tensors="pt", truncation=True, padding=True, max_length=128)
+def detect_languages(texts):
+    return [detect_language(text) for text in texts]
+
+def route_model(lang):
+    """Name of the model that handles `lang`; anything not Indic falls back to DistilBERT."""
+    if lang in INDIAN_LANG_CODES:
+        return "indicbert"
+    return "distilbert"
+
+def predict_batch_with_model(texts, tokenizer, model):
+    """One padded forward pass over `texts`; returns a (pred, confidence) pair per text."""
+    inputs = tokenizer(texts, return_tensors="pt", truncation=True, padding=True, max_length=MAX_LEN)
     with torch.no_grad():
         outputs = model(**inputs)
         probs = torch.softmax(outputs.logits, dim=1)
-        pred = torch.argmax(probs, dim=1).item()
-        confidence = probs[0][pred].item()
-    return pred, confidence
+        confidence, preds = probs.max(dim=1)
+    return list(zip(preds.tolist(), confidence.tolist()))
 
-def hybrid_predict(text):
-    lang = detect_language(text)
-    if lang == 'en':
-        pred, confidence = predict_with_model(text, distilbert_tokenizer, distilbert_model)
-        model_used = "distilbert"
-    elif lang in INDIAN_LANG_CODES:
-        pred, confidence = predict_with_model(text, indicbert_tokenizer, indicbert_model)
-        model_used = "indicbert"
-    else:
-        # fallback: treat as English or flag unknown
-        pred, confidence = predict_with_model(text, distilbert_tokenizer, distilbert_model)
-        model_used = "distilbert"
+def predict_with_model(text, tokenizer, model):
+    return predict_batch_with_model([text], tokenizer, model)[0]
+
+def run_model(model_used, texts):
+    tokenizer, model = models.get(model_used)
+    return predict_batch_with_model(texts, tokenizer, model)
+
+def make_result(pred, confidence, lang, model_used):
     return {
         "predicted_label": pred,
         "confidence": confidence,
+        "flagged": pred == 1,
         "language": lang,
         "model_used": model_used
     }
+
+def hybrid_predict(text):
+    cached = cache.get(text)
+    if cached is not None:
+        return dict(cached)
+    version = models.version
+    lang = detect_language(text)
+    model_used = route_model(lang)
+    pred, confidence = run_model(model_used, [text])[0]
+    result = make_result(pred, confidence, lang, model_used)
+    cache.put(text, result, version)
+    return dict(result)
+
+def route_chunks(texts, langs, batch_size=BATCH_SIZE):
+    """
+    Yield (model_used, indices) per padded batch. Texts are grouped by model
+    and sorted by length, so each batch holds texts of similar size.
+    """
+    groups = {}
+    for i, lang in enumerate(langs):
+        groups.setdefault(route_model(lang), []).append(i)
+    for model_used, indices in groups.items():
+        indices.sort(key=lambda i: len(texts[i]))
+        for start in range(0, len(indices), batch_size):
+            yield model_used, indices[start:start + batch_size]
+
+def predict_routed(texts, langs, batch_size=BATCH_SIZE):
+    """Predict texts whose languages are already known; results come back in input order."""
+    results = [None] * len(texts)
+    for model_used, chunk in route_chunks(texts, langs, batch_size):
+        outputs = run_model(model_used, [texts[i] for i in chunk])
+        for i, (pred, confidence) in zip(chunk, outputs):
+            results[i] = make_result(pred, confidence, langs[i], model_used)
+    return results
+
+def hybrid_predict_batch(texts, batch_size=BATCH_SIZE):
+    return predict_routed(texts, detect_languages(texts), batch_size)
@@ -1,10 +1,11 @@
 import torch
-from transformers import DistilBertTokenizerFast, DistilBertForSequenceClassification
+from transformers import DistilBertTokenizerFast
 
-def predict(texts):
+from backends import load_model
+
+def predict(texts, backend="fp32"):
     tokenizer = DistilBertTokenizerFast.from_pretrained("../models/model_checkpoint")
-    model = DistilBertForSequenceClassification.from_pretrained("../models/model_checkpoint")
-    model.eval()
+    model = load_model("../models/model_checkpoint", backend=backend)
 
     encodings = tokenizer(texts, truncation=True, padding=True, max_length=128, return_tensors="pt")
     with torch.no_grad():
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+
+import torch
+from transformers import AutoTokenizer
+
+from src.backends import default_onnx_path, load_model
+
+WARMUP_TEXTS = [
+    "High waves warning in area",
+    "Water entering houses near the harbour, please send help",
+    "जल स्तर तेजी से बढ़ रहा है",
+]
+
+
+def fingerprint(spec):
+    """
+    Version of a model: its config spec plus the size and mtime of the
+    files it loads from, so new weights at the same path are a new version.
+    The onnx backend loads its own file (by default under the checkpoint's
+    onnx/ directory, which the directory scan doesn't descend into).
+    """
+    digest = hashlib.sha256(json.dumps(spec, sort_keys=True).encode())
+    onnx_path = None
+    if spec.get("backend") == "onnx":
+        onnx_path = spec.get("onnx_path") or (spec.get("path") and default_onnx_path(spec["path"]))
+    for path in (spec.get("path"), onnx_path):
+        if path and os.path.isdir(path):
+            entries = sorted((e.name, e.stat()) for e in os.scandir(path) if e.is_file())
+        elif path and os.path.isfile(path):
+            entries = [(path, os.stat(path))]
+        else:
+            entries = []
+        for name, st in entries:
+            digest.update(f"{name}:{st.st_size}:{st.st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+
+def reproducible(spec):
+    """
+    Whether loading `spec` twice gives the same weights. Only local
+    checkpoints are covered by fingerprint(); a hub id may change upstream,
+    or (with num_labels) get a freshly initialised classifier head per load.
+    """
+    return bool(spec.get("path")) and os.path.exists(spec["path"])
+
+
+class ModelManager:
+    """
+    Owns the tokenizer/model pairs the service predicts with.
+
+    With `lazy` each model loads on first use (and is warmed up right
+    away); otherwise call load_all() at startup, ideally in a preloading
+    master so forked workers share the weights copy-on-write, then
+    warm_up_all() in each worker. `ready` turns true once every model is
+    loaded and warm in this process. reload() hot-swaps changed models and
+    moves `version` on; changed() tells whether it has anything to do.
+
+    A model's version is its fingerprint, plus a per-load nonce when it is
+    not reproducible, so results cached for one load are never served for
+    another.
+    """
+
+    def __init__(self, specs, lazy=False, warmup=True, max_len=128, threads=0):
+        self.specs = specs
+        self.lazy = lazy
+        self.threads = threads
+        self.warmup_enabled = warmup
+        self.max_len = max_len
+        self._models = {}
+        self._warm = set()
+        self._lock = threading.Lock()
+        self.load_seconds = {}
+        self.warmup_seconds = {}
+        self.fingerprints = {name: fingerprint(spec) for name, spec in specs.items()}
+        self.versions = dict(self.fingerprints)
+
+    @classmethod
+    def from_config(cls, config, max_len=128):
+        specs = {name: spec for name, spec in config.items() if isinstance(spec, dict)}
+        return cls(
+            specs,
+            lazy=config.get("loading", "eager") == "lazy",
+            warmup=config.get("warmup", True),
+            max_len=max_len,
+            threads=int(config.get("torch_threads", 0)),
+        )
+
+    def get(self, name):
+        """(tokenizer, model) for `name`, loading it if needed."""
+        entry = self._models.get(name)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._models.get(name)
+            if entry is None:
+                entry = self._load(name)
+        if self.lazy:
+            self.warm_up(name)
+        return entry
+
+    def _load(self, name):
+        self._models[name] = self._build(name, self.specs[name])
+        self.versions[name] = self._version(self.specs[name], self.fingerprints[name])
+        return self._models[name]
+
+    @staticmethod
+    def _version(spec, fp):
+        return fp if reproducible(spec) else f"{fp}-{uuid.uuid4().hex[:8]}"
+
+    def _build(self, name, spec):
+        start = time.perf_counter()
+        tokenizer = AutoTokenizer.from_pretrained(spec["path"])
+        kwargs = {"num_labels": spec["num_labels"]} if "num_labels" in spec else {}
+        model = load_model(
+            spec["path"],
+            backend=spec.get("backend", "fp32"),
+            onnx_path=spec.get("onnx_path"),
+            threads=self.threads,
+            **kwargs,
+        )
+        self.load_seconds[name] = time.perf_counter() - start
+        return tokenizer, model
+
+    def load_all(self):
+        for name in self.specs:
+            self.get(name)
+
+    def warm_up(self, name):
+        """One forward pass so the first real request doesn't pay for allocator and kernel setup."""
+        if not self.warmup_enabled or name in self._warm:
+            return
+        self._forward(name, *self.get(name))
+        self._warm.add(name)
+
+    def _forward(self, name, tokenizer, model):
+        start = time.perf_counter()
+        inputs = tokenizer(WARMUP_TEXTS, return_tensors="pt", truncation=True, padding=True, max_length=self.max_len)
+        with torch.no_grad():
+            model(**inputs)
+        self.warmup_seconds[name] = time.perf_counter() - start
+
+    def warm_up_all(self):
+        for name in self.specs:
+            self.warm_up(name)
+
+    def changed(self, specs):
+        """Names in `specs` whose spec or files differ from what is loaded."""
+        return [name for name, spec in specs.items() if fingerprint(spec) != self.fingerprints.get(name)]
+
+    def reload(self, specs):
+        """
+        Hot-swap every model whose spec or files changed. The new model is
+        loaded and warmed up beside the old one, then replaces it; callers
+        holding the old pair finish with it. Returns the swapped names.
+        """
+        swapped = []
+        for name in self.changed(specs):
+            spec = specs[name]
+            fp = fingerprint(spec)
+            entry = self._build(name, spec) if name in self._models else None
+            if entry is not None and self.warmup_enabled:
+                self._forward(name, *entry)
+            with self._lock:
+                self.specs[name] = spec
+                self.fingerprints[name] = fp
+                # Not loaded yet: _load stamps the version when it is
+                self.versions[name] = self._version(spec, fp) if entry is not None else fp
+                if entry is not None:
+                    self._models[name] = entry
+            swapped.append(name)
+        return swapped
+
+    @property
+    def version(self):
+        """One version for the whole set of models, e.g. to key caches on."""
+        return hashlib.sha256(json.dumps(self.versions, sort_keys=True).encode()).hexdigest()[:16]
+
+    @property
+    def ready(self):
+        if self.lazy:
+            return True
+        if len(self._models) < len(self.specs):
+            return False
+        return not self.warmup_enabled or len(self._warm) == len(self.specs)
+
+    def stats(self):
+        return {
+            "loading": "lazy" if self.lazy else "eager",
+            "ready": self.ready,
+            "version": self.version,
+            "versions": self.versions,
+            "loaded": sorted(self._models),
+            "backends": {name: spec.get("backend", "fp32") for name, spec in self.specs.items()},
+            "warm": sorted(self._warm),
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+        }
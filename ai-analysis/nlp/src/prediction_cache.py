@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+_WHITESPACE = re.compile(r"\s+")
+# Trim the disk tier back to disk_max_entries every this many writes
+DISK_PRUNE_EVERY = 1000
+
+
+def normalize(text):
+    """
+    The form of `text` the cache keys on. Only differences the tokenizers
+    ignore anyway are folded (Unicode composition, runs of whitespace), so
+    every text sharing a key gets the same prediction.
+    """
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFC", text)).strip()
+
+
+class PredictionCache:
+    """
+    Prediction results keyed by SHA-256 of the normalized text and the
+    model version, in an in-memory LRU with an optional SQLite tier that
+    survives restarts and is shared by the workers on a host.
+
+    `version` is a callable returning the current model version. When it
+    changes (a hot-swap, or a restart on new weights) the memory tier is
+    dropped. Keys include the version, so a stale entry can never be served
+    from either tier. Disk rows of other versions are left alone, since
+    another worker may still be on that version; they age out with the
+    disk_max_entries trim.
+
+    The SQLite connection is opened on first use in each process: a
+    connection must not be used across fork(), so one opened in the gunicorn
+    master would break locking in the workers.
+    """
+
+    def __init__(self, version, max_entries=100000, disk_path=None, disk_max_entries=1000000):
+        self.version = version
+        self.max_entries = max_entries
+        self.disk_max_entries = disk_max_entries
+        self._current = None
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.disk_path = disk_path
+        self._conn = None
+        self._pid = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._writes = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 or self.disk_path is not None
+
+    def _db(self):
+        """This process's connection to the disk tier, or None without one. Call with the lock held."""
+        if not self.disk_path:
+            return None
+        if self._pid != os.getpid():
+            # The parent's handle (if any) is deliberately not closed here:
+            # closing it from the child could release the parent's locks
+            conn = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS predictions ("
+                "key TEXT PRIMARY KEY, version TEXT NOT NULL, result TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_predictions_created ON predictions (created)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    @staticmethod
+    def key(text, version):
+        return hashlib.sha256(f"{version}\0{normalize(text)}".encode()).hexdigest()
+
+    def _check_version(self):
+        version = self.version()
+        if version != self._current:
+            if self._current is not None:
+                self.invalidations += 1
+            self._memory.clear()
+            self._current = version
+        return version
+
+    def _remember(self, key, result):
+        if self.max_entries <= 0:
+            return
+        self._memory[key] = result
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, text):
+        """Cached result for `text` under the current model version, or None. Don't mutate it."""
+        if not self.enabled:
+            return None
+        with self._lock:
+            key = self.key(text, self._check_version())
+            result = self._memory.get(key)
+            if result is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return result
+            db = self._db()
+            if db is not None:
+                row = db.execute("SELECT result FROM predictions WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+            self.misses += 1
+            return None
+
+    def get_many(self, texts):
+        return [self.get(text) for text in texts]
+
+    def put(self, text, result, version=None):
+        """
+        Cache `result` for `text`. Pass the `version` read before predicting:
+        if the models were swapped since, the result is dropped.
+        """
+        self.put_many([text], [result], version)
+
+    def put_many(self, texts, results, version=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            current = self._check_version()
+            if version is not None and version != current:
+                return
+            rows = []
+            for text, result in zip(texts, results):
+                key = self.key(text, current)
+                self._remember(key, result)
+                rows.append((key, current, json.dumps(result), time.time()))
+            db = self._db()
+            if db is None:
+                return
+            db.executemany("INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)", rows)
+            self._writes += len(rows)
+            if self._writes >= DISK_PRUNE_EVERY:
+                self._writes = 0
+                db.execute(
+                    "DELETE FROM predictions WHERE key IN "
+                    "(SELECT key FROM predictions ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                    (self.disk_max_entries,),
+                )
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "version": self._current,
+            "memory_entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
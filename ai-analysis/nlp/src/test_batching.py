@@ -0,0 +1,134 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.batching import MicroBatcher
+
+
+class FakeModel:
+    """run_batch stand-in that records every batch it is given."""
+
+    def __init__(self, fail=False):
+        self.batches = []
+        self.threads = set()
+        self.fail = fail
+
+    def __call__(self, model_name, texts):
+        self.batches.append((model_name, list(texts)))
+        self.threads.add(threading.current_thread().name)
+        if self.fail:
+            raise RuntimeError("forward failed")
+        return [f"{model_name}:{text}" for text in texts]
+
+
+def test_concurrent_submits_share_a_batch():
+    model = FakeModel()
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=50, max_batch_size=8)
+        results = await asyncio.gather(*(batcher.submit("distilbert", f"t{i}") for i in range(5)))
+        await batcher.stop()
+        return results, batcher.stats()
+
+    results, stats = asyncio.run(main())
+    assert results == [f"distilbert:t{i}" for i in range(5)]
+    assert model.batches == [("distilbert", [f"t{i}" for i in range(5)])]
+    assert stats["batches"] == 1 and stats["items"] == 5 and stats["mean_batch_size"] == 5
+
+
+def test_batch_closes_at_max_batch_size():
+    model = FakeModel()
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=50, max_batch_size=3)
+        results = await asyncio.gather(*(batcher.submit("distilbert", f"t{i}") for i in range(7)))
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(main()) == [f"distilbert:t{i}" for i in range(7)]
+    assert [len(texts) for _, texts in model.batches] == [3, 3, 1]
+
+
+def test_batch_closes_after_max_wait():
+    model = FakeModel()
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=10, max_batch_size=8)
+        first = asyncio.create_task(batcher.submit("distilbert", "early"))
+        await asyncio.sleep(0.1)
+        late = await batcher.submit("distilbert", "late")
+        await batcher.stop()
+        return await first, late
+
+    assert asyncio.run(main()) == ("distilbert:early", "distilbert:late")
+    assert model.batches == [("distilbert", ["early"]), ("distilbert", ["late"])]
+
+
+def test_models_are_batched_separately():
+    model = FakeModel()
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=20, max_batch_size=8)
+        results = await asyncio.gather(
+            batcher.submit("distilbert", "a"),
+            batcher.submit("indicbert", "b"),
+            batcher.submit("distilbert", "c"),
+        )
+        await batcher.stop()
+        return results
+
+    assert asyncio.run(main()) == ["distilbert:a", "indicbert:b", "distilbert:c"]
+    assert sorted(model.batches) == [("distilbert", ["a", "c"]), ("indicbert", ["b"])]
+
+
+def test_failed_forward_reaches_every_waiter_and_worker_survives():
+    model = FakeModel(fail=True)
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=20, max_batch_size=8)
+        failures = await asyncio.gather(*(batcher.submit("distilbert", f"t{i}") for i in range(3)),
+                                        return_exceptions=True)
+        model.fail = False
+        after = await batcher.submit("distilbert", "again")
+        await batcher.stop()
+        return failures, after, batcher.stats()
+
+    failures, after, stats = asyncio.run(main())
+    assert all(isinstance(f, RuntimeError) for f in failures)
+    assert after == "distilbert:again"
+    assert stats["batches"] == 1
+
+
+def test_cancelled_caller_gives_up_its_slot():
+    model = FakeModel()
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=50, max_batch_size=8)
+        gone = asyncio.create_task(batcher.submit("distilbert", "gone"))
+        kept = asyncio.create_task(batcher.submit("distilbert", "kept"))
+        await asyncio.sleep(0)
+        gone.cancel()
+        result = await kept
+        await batcher.stop()
+        return result
+
+    assert asyncio.run(main()) == "distilbert:kept"
+    assert model.batches == [("distilbert", ["kept"])]
+
+
+def test_run_shares_the_forward_thread():
+    model = FakeModel()
+
+    async def main():
+        batcher = MicroBatcher(model, max_wait_ms=1, max_batch_size=8)
+        await batcher.submit("distilbert", "a")
+        name = await batcher.run(lambda: threading.current_thread().name)
+        with pytest.raises(ValueError):
+            await batcher.run(int, "not a number")
+        await batcher.stop()
+        return name
+
+    name = asyncio.run(main())
+    assert model.threads == {name}
+    assert name.startswith("forward")
@@ -0,0 +1,79 @@
+from src.prediction_cache import DISK_PRUNE_EVERY, PredictionCache, normalize
+
+RESULT = {"predicted_label": 1, "confidence": 0.9, "flagged": True, "language": "en", "model_used": "distilbert"}
+
+
+class Version:
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+def test_normalize_folds_only_composition_and_whitespace():
+    assert normalize("  High\twaves \n warning ") == "High waves warning"
+    assert normalize("é") == "é"
+    assert normalize("High") != normalize("high")
+
+
+def test_hit_after_put_and_miss_after_swap():
+    version = Version("v1")
+    cache = PredictionCache(version)
+    cache.put("High waves", RESULT, "v1")
+    assert cache.get("High  waves") == RESULT
+    version.value = "v2"
+    assert cache.get("High waves") is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_put_from_before_a_swap_is_dropped():
+    version = Version("v1")
+    cache = PredictionCache(version)
+    cache.get("High waves")
+    version.value = "v2"
+    cache.put("High waves", RESULT, "v1")
+    assert cache.get("High waves") is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    PredictionCache(Version("v1"), disk_path=path).put("High waves", RESULT, "v1")
+    restarted = PredictionCache(Version("v1"), disk_path=path)
+    assert restarted.get("High waves") == RESULT
+    assert restarted.stats()["disk_hits"] == 1
+
+
+def test_workers_on_different_versions_keep_each_others_rows(tmp_path):
+    path = str(tmp_path / "predictions.db")
+    old = PredictionCache(Version("v1"), max_entries=0, disk_path=path)
+    old.put("High waves", RESULT, "v1")
+    new = PredictionCache(Version("v2"), max_entries=0, disk_path=path)
+    new.put("High waves", dict(RESULT, predicted_label=0), "v2")
+    assert old.get("High waves") == RESULT
+    assert new.get("High waves")["predicted_label"] == 0
+
+
+def test_each_process_opens_its_own_connection(tmp_path, monkeypatch):
+    path = str(tmp_path / "predictions.db")
+    cache = PredictionCache(Version("v1"), max_entries=0, disk_path=path)
+    assert cache._conn is None
+    cache.put("High waves", RESULT, "v1")
+    parent = cache._db()
+    monkeypatch.setattr("src.prediction_cache.os.getpid", lambda: -1)
+    assert cache.get("High waves") == RESULT
+    assert cache._db() is not parent
+
+
+def test_disk_tier_is_trimmed(tmp_path):
+    cache = PredictionCache(Version("v1"), max_entries=0, disk_path=str(tmp_path / "p.db"), disk_max_entries=10)
+    texts = [f"report {i}" for i in range(DISK_PRUNE_EVERY)]
+    cache.put_many(texts, [RESULT] * len(texts), "v1")
+    assert cache._db().execute("SELECT count(*) FROM predictions").fetchone()[0] == 10
+
+
+def test_memory_tier_is_bounded():
+    cache = PredictionCache(Version("v1"), max_entries=2)
+    cache.put_many(["a", "b", "c"], [RESULT] * 3, "v1")
+    assert cache.get("a") is None
+    assert cache.get("c") == RESULT
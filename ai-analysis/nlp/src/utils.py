@@ -0,0 +1,10 @@
+import os
+
+import yaml
+
+CONFIG_PATH = os.getenv("NLP_CONFIG", os.path.join(os.path.dirname(__file__), "config.yaml"))
+
+def load_config(path=CONFIG_PATH):
+    """Settings from config.yaml as a dict (empty if the file is empty)."""
+    with open(path) as f:
+        return yaml.safe_load(f) or {}
@@ -0,0 +1,272 @@
+# app/admission.py
+
+import asyncio
+import heapq
+import itertools
+import json
+import math
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from app.dependencies.auth import verify_token
+
+
+def _parse_roles(spec: str, cast=float) -> Dict[str, float]:
+    values = {}
+    for part in spec.split(","):
+        role, _, value = part.partition("=")
+        if role.strip() and value.strip():
+            values[role.strip()] = cast(value)
+    return values
+
+
+ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() not in ("0", "false", "no")
+# Requests in flight across the whole worker
+ADMISSION_MAX_CONCURRENCY = int(os.getenv("ADMISSION_MAX_CONCURRENCY", "128"))
+# Share of those slots each role may fill; OFFICIAL always gets the whole pool
+ADMISSION_ROLE_SHARE = _parse_roles(os.getenv("ADMISSION_ROLE_SHARE", "PUBLIC=0.6,VERIFIED_VOLUNTEER=0.85,OFFICIAL=1.0"))
+# Per-user token buckets: refill rate (requests/s) and burst, per role.
+# They only apply to ADMISSION_RATE_LIMITED_ROUTES ("METHOD /path-prefix"):
+# the report submission surge, not map tiles or background profile updates
+ADMISSION_USER_RATE = _parse_roles(os.getenv("ADMISSION_USER_RATE", "PUBLIC=1,VERIFIED_VOLUNTEER=3,OFFICIAL=20"))
+ADMISSION_USER_BURST = _parse_roles(os.getenv("ADMISSION_USER_BURST", "PUBLIC=10,VERIFIED_VOLUNTEER=30,OFFICIAL=100"))
+ADMISSION_RATE_LIMITED_ROUTES = tuple(
+    (method.upper(), path)
+    for method, _, path in (
+        r.strip().partition(" ") for r in os.getenv("ADMISSION_RATE_LIMITED_ROUTES", "POST /api/reports/citizen").split(",")
+    )
+    if path.strip()
+)
+ADMISSION_TRACKED_USERS = int(os.getenv("ADMISSION_TRACKED_USERS", "200000"))
+# How long a request may wait for a slot before it is shed
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "0.5"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "256"))
+# Long-lived or I/O-bound streams that must not hold a slot
+ADMISSION_EXEMPT_PATHS = tuple(
+    p.strip() for p in os.getenv("ADMISSION_EXEMPT_PATHS", "/api/live,/api/media/uploads,/metrics,/docs,/openapi.json").split(",")
+    if p.strip()
+)
+
+# Lower number = served first, shed last
+PRIORITY = {"OFFICIAL": 0, "VERIFIED_VOLUNTEER": 1, "PUBLIC": 2}
+ANONYMOUS = "PUBLIC"
+
+
+class Rejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class TokenBuckets:
+    """Per-user token buckets in a bounded LRU; forgotten users start full."""
+
+    def __init__(self, rates: Dict[str, float], bursts: Dict[str, float], tracked: int = ADMISSION_TRACKED_USERS):
+        self.rates = rates
+        self.bursts = bursts
+        self.tracked = tracked
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, user_id: str, role: str, now: Optional[float] = None) -> float:
+        """Spend one token; returns 0 if allowed, else seconds until one is available."""
+        rate = self.rates.get(role)
+        if not rate:
+            return 0.0
+        burst = self.bursts.get(role, rate)
+        now = time.monotonic() if now is None else now
+        tokens, last = self._buckets.get(user_id, (burst, now))
+        tokens = min(burst, tokens + (now - last) * rate)
+        if tokens < 1:
+            self._buckets[user_id] = (tokens, now)
+            return (1 - tokens) / rate
+        self._buckets[user_id] = (tokens - 1, now)
+        self._buckets.move_to_end(user_id)
+        if len(self._buckets) > self.tracked:
+            self._buckets.popitem(last=False)
+        return 0.0
+
+
+class PriorityLimiter:
+    """
+    Global in-flight limit with per-role ceilings and a priority wait queue.
+
+    A role may only take a slot while fewer than share * limit requests are
+    in flight, so under overload PUBLIC is turned away first, then
+    VERIFIED_VOLUNTEER, and OFFICIAL keeps the remaining headroom. Requests
+    that find no slot wait briefly; freed slots go to the highest-priority
+    waiter.
+    """
+
+    def __init__(self, limit: int, shares: Dict[str, float], queue_timeout: float, max_queue: int):
+        self.limit = limit
+        self.ceilings = {role: max(1, int(limit * shares.get(role, 1.0))) for role in PRIORITY}
+        self.queue_timeout = queue_timeout
+        self.max_queue = max_queue
+        self.in_flight = 0
+        self._waiters: List[Tuple[int, int, str, asyncio.Future]] = []
+        self._seq = itertools.count()
+
+    def _fits(self, role: str) -> bool:
+        return self.in_flight < self.ceilings[role]
+
+    async def acquire(self, role: str):
+        priority = PRIORITY[role]
+        # Don't overtake waiters of equal or higher priority
+        if self._fits(role) and not any(w[0] <= priority for w in self._waiters if not w[3].done()):
+            self.in_flight += 1
+            return
+        if self.queued >= self.max_queue or self.queue_timeout <= 0:
+            raise Rejected("overloaded", 1.0)
+        future = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._seq), role, future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            if future.done() and not future.cancelled():
+                return  # granted just as we timed out: keep the slot
+            future.cancel()
+            raise Rejected("overloaded", 1.0)
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                future.cancel()
+            raise
+
+    def release(self):
+        self.in_flight -= 1
+        self._grant()
+
+    def _grant(self):
+        while self._waiters:
+            priority, _, role, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            if not self._fits(role):
+                return
+            heapq.heappop(self._waiters)
+            self.in_flight += 1
+            future.set_result(None)
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for w in self._waiters if not w[3].done())
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        limit: int = ADMISSION_MAX_CONCURRENCY,
+        shares: Dict[str, float] = ADMISSION_ROLE_SHARE,
+        rates: Dict[str, float] = ADMISSION_USER_RATE,
+        bursts: Dict[str, float] = ADMISSION_USER_BURST,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+        max_queue: int = ADMISSION_MAX_QUEUE,
+    ):
+        self.buckets = TokenBuckets(rates, bursts)
+        self.limiter = PriorityLimiter(limit, shares, queue_timeout, max_queue)
+        self.admitted: Counter = Counter()
+        self.rejected: Counter = Counter()  # (role, reason)
+
+    async def admit(self, user_id: Optional[str], role: str):
+        """
+        Take a slot for the request or raise Rejected; pair with release().
+        The user's token bucket is charged unless `user_id` is None.
+        """
+        if user_id is not None:
+            wait = self.buckets.take(user_id, role)
+            if wait:
+                self.rejected[(role, "rate_limited")] += 1
+                raise Rejected("rate_limited", wait)
+        try:
+            await self.limiter.acquire(role)
+        except Rejected:
+            self.rejected[(role, "overloaded")] += 1
+            raise
+        self.admitted[role] += 1
+
+    def release(self):
+        self.limiter.release()
+
+    def stats(self) -> Dict:
+        stats = {"in_flight": self.limiter.in_flight, "queued": self.limiter.queued, "limit": self.limiter.limit}
+        for role in PRIORITY:
+            stats[f"admitted_{role.lower()}"] = self.admitted[role]
+            for reason in ("rate_limited", "overloaded"):
+                stats[f"{reason}_{role.lower()}"] = self.rejected[(role, reason)]
+        return stats
+
+
+def identify(headers: Dict[bytes, bytes]) -> Tuple[Optional[str], str]:
+    """(user_id, role) from the bearer token; anonymous or invalid tokens count as PUBLIC."""
+    auth = headers.get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None, ANONYMOUS
+    try:
+        user = verify_token(token.strip())
+    except HTTPException:
+        return None, ANONYMOUS
+    role = user["user_role"]
+    return user["user_id"], role if role in PRIORITY else ANONYMOUS
+
+
+def rate_limited(method: str, path: str) -> bool:
+    """Whether a request to `path` is charged to the caller's token bucket."""
+    return any(method == m and path.startswith(prefix) for m, prefix in ADMISSION_RATE_LIMITED_ROUTES)
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware applying AdmissionController to every HTTP request
+    outside ADMISSION_EXEMPT_PATHS. Per-user token buckets apply only to
+    ADMISSION_RATE_LIMITED_ROUTES. Rejections are 429 with Retry-After.
+    The slot is held until the response has been sent.
+    """
+
+    def __init__(self, app, controller: Optional["AdmissionController"] = None):
+        self.app = app
+        self.controller = controller or admission
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ADMISSION_ENABLED or scope["path"].startswith(ADMISSION_EXEMPT_PATHS):
+            await self.app(scope, receive, send)
+            return
+        user_id, role = identify(dict(scope["headers"]))
+        # Anonymous callers get no bucket: keyed per address, everyone behind
+        # one carrier NAT would share it, and submission needs a token anyway
+        bucket = user_id if rate_limited(scope["method"], scope["path"]) else None
+        try:
+            await self.controller.admit(bucket, role)
+        except Rejected as e:
+            await self._reject(send, e)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    @staticmethod
+    async def _reject(send, rejection: Rejected):
+        detail = "Too many requests, slow down" if rejection.reason == "rate_limited" else "Server is busy, please retry shortly"
+        body = json.dumps({"detail": detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(max(1, math.ceil(rejection.retry_after))).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+
+admission = AdmissionController()
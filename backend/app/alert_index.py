@@ -0,0 +1,179 @@
+# app/alert_index.py
+
+import asyncio
+import json
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+import shapely
+from shapely import STRtree
+from sqlalchemy import or_, select
+
+from app.database import AsyncSessionLocal
+from app.geometry import to_geojson, to_shapely
+from app.models import Alert
+
+logger = logging.getLogger(__name__)
+
+ALERT_CHANNEL = "alert_changes"  # see migrations/0007_alerts_expiry.sql
+# Used when create_alert is not given an expiry
+ALERT_DEFAULT_TTL_HOURS = float(os.getenv("ALERT_DEFAULT_TTL_HOURS", "24"))
+
+
+@dataclass
+class ActiveAlert:
+    id: uuid.UUID
+    severity: str
+    title: str
+    message: str
+    created_at: datetime
+    expires_at: Optional[datetime]
+    affected_area: Dict[str, Any]  # GeoJSON, ready to serialize
+
+    def active(self, now: datetime) -> bool:
+        return self.expires_at is None or self.expires_at > now
+
+
+class _Snapshot:
+    """Immutable tree + prepared geometries; replaced wholesale on change."""
+
+    def __init__(self, alerts: List[ActiveAlert], geoms: List[Any]):
+        self.alerts = alerts
+        self.geoms = np.array(geoms, dtype=object)
+        shapely.prepare(self.geoms)
+        self.tree = STRtree(self.geoms) if geoms else None
+        expiries = [a.expires_at for a in alerts if a.expires_at is not None]
+        self.next_expiry = min(expiries) if expiries else None
+
+
+class ActiveAlertIndex:
+    """
+    In-process STRtree of the non-expired alerts' polygons.
+
+    Lookups never touch the database: the tree narrows candidates by bounding
+    box and prepared geometries answer point-in-polygon. Changes arrive via
+    add() from create_alert in this worker and via NOTIFY on ALERT_CHANNEL
+    (fired by a trigger on alerts) from every other writer; a full reload runs
+    at startup and after the LISTEN connection reconnects. Expired alerts are
+    filtered on lookup and pruned lazily.
+    """
+
+    def __init__(self):
+        self._geoms: Dict[uuid.UUID, Any] = {}
+        self._alerts: Dict[uuid.UUID, ActiveAlert] = {}
+        self._snapshot = _Snapshot([], [])
+        self._refreshing = set()  # strong refs to in-flight refresh tasks
+        self.lookups = 0
+        self.reloads = 0
+
+    def __len__(self):
+        return len(self._alerts)
+
+    def lookup(self, lon: float, lat: float, now: Optional[datetime] = None) -> List[ActiveAlert]:
+        """Active alerts whose area contains (or touches) the point."""
+        self.lookups += 1
+        now = now or datetime.utcnow()
+        snap = self._snapshot
+        if snap.next_expiry is not None and snap.next_expiry <= now:
+            self._prune(now)
+            snap = self._snapshot
+        if snap.tree is None:
+            return []
+        candidates = snap.tree.query(shapely.Point(lon, lat))
+        if len(candidates) == 0:
+            return []
+        hits = candidates[shapely.intersects_xy(snap.geoms[candidates], lon, lat)]
+        return [snap.alerts[i] for i in sorted(hits) if snap.alerts[i].active(now)]
+
+    def add(self, alert: Alert):
+        """Insert or replace one alert from an ORM row (or drop it if expired)."""
+        self._store(alert)
+        self._rebuild()
+
+    def remove(self, alert_id: uuid.UUID):
+        if self._alerts.pop(alert_id, None) is not None:
+            self._geoms.pop(alert_id, None)
+            self._rebuild()
+
+    async def load(self):
+        """Replace the index with every non-expired alert in the database."""
+        async with AsyncSessionLocal() as db:
+            alerts = (await db.scalars(select(Alert).where(self._active_clause()))).all()
+        self.replace(alerts)
+        self.reloads += 1
+        logger.info("Active alert index loaded", extra={"alerts": len(self._alerts)})
+
+    def replace(self, alerts: Iterable[Alert]):
+        """Swap in a new set of alerts with a single tree build."""
+        self._alerts.clear()
+        self._geoms.clear()
+        for alert in alerts:
+            self._store(alert)
+        self._rebuild()
+
+    async def refresh(self, alert_id: uuid.UUID):
+        """Re-read one alert after a change notification."""
+        async with AsyncSessionLocal() as db:
+            alert = await db.get(Alert, alert_id)
+        if alert is None:
+            self.remove(alert_id)
+        else:
+            self.add(alert)
+
+    def on_notify(self, payload: str):
+        """PgListener callback for ALERT_CHANNEL: {"op": ..., "id": ...}."""
+        try:
+            data = json.loads(payload)
+            alert_id = uuid.UUID(data["id"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Bad alert notification", extra={"payload": payload})
+            return
+        if data.get("op") == "DELETE":
+            self.remove(alert_id)
+        else:
+            task = asyncio.get_running_loop().create_task(self.refresh(alert_id))
+            self._refreshing.add(task)
+            task.add_done_callback(self._refreshing.discard)
+
+    def stats(self) -> Dict:
+        return {"active_alerts": len(self._alerts), "lookups": self.lookups, "reloads": self.reloads}
+
+    def _store(self, alert: Alert):
+        entry = ActiveAlert(
+            id=alert.id,
+            severity=getattr(alert.severity, "value", alert.severity),
+            title=alert.title,
+            message=alert.message,
+            created_at=alert.created_at,
+            expires_at=alert.expires_at,
+            affected_area=to_geojson(alert.affected_area),
+        )
+        if entry.active(datetime.utcnow()):
+            self._alerts[entry.id] = entry
+            self._geoms[entry.id] = to_shapely(alert.affected_area)
+        else:
+            self._alerts.pop(entry.id, None)
+            self._geoms.pop(entry.id, None)
+
+    @staticmethod
+    def _active_clause():
+        return or_(Alert.expires_at.is_(None), Alert.expires_at > datetime.utcnow())
+
+    def _prune(self, now: datetime):
+        expired = [a.id for a in self._alerts.values() if not a.active(now)]
+        for alert_id in expired:
+            self._alerts.pop(alert_id, None)
+            self._geoms.pop(alert_id, None)
+        self._rebuild()
+
+    def _rebuild(self):
+        ids = list(self._alerts)
+        self._snapshot = _Snapshot([self._alerts[i] for i in ids], [self._geoms[i] for i in ids])
+
+
+alert_index = ActiveAlertIndex()
@@ -0,0 +1,62 @@
+# app/audience.py
+
+import os
+from typing import AsyncIterator, List
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+
+from app.database import async_engine
+
+AUDIENCE_BATCH_SIZE = int(os.getenv("AUDIENCE_BATCH_SIZE", "1000"))
+# Polygons with more vertices than this are cut into smaller pieces so each
+# index probe tests points against a small, tight geometry.
+AUDIENCE_MAX_VERTICES = int(os.getenv("AUDIENCE_MAX_VERTICES", "64"))
+
+# Each subdivided piece drives a GiST index scan on profiles.last_known_location
+# (migrations/0002_profiles_location_gist.sql). There is no ORDER BY/DISTINCT,
+# so rows reach the client as soon as they are found. A point lying exactly on
+# a cut line touches two pieces; it is kept only for the lowest-numbered one.
+AUDIENCE_SQL = text("""
+    WITH area AS (
+        SELECT ST_MakeValid(ST_SetSRID(ST_GeomFromGeoJSON(:affected_area), 4326)) AS geom
+    ),
+    pieces AS (
+        SELECT row_number() OVER () AS n, piece AS geom
+        FROM area, LATERAL ST_Subdivide(area.geom, :max_vertices) AS piece
+    )
+    SELECT p.push_token
+    FROM pieces s
+    JOIN profiles p ON ST_Intersects(s.geom, p.last_known_location)
+    WHERE p.push_token IS NOT NULL
+    AND (
+        ST_Within(p.last_known_location, s.geom)
+        OR NOT EXISTS (
+            SELECT 1 FROM pieces s2
+            WHERE s2.n < s.n AND ST_Intersects(s2.geom, p.last_known_location)
+        )
+    )
+""")
+
+
+async def stream_push_tokens(
+    affected_area: str,
+    batch_size: int = AUDIENCE_BATCH_SIZE,
+    max_vertices: int = AUDIENCE_MAX_VERTICES,
+    engine: AsyncEngine = async_engine,
+) -> AsyncIterator[List[str]]:
+    """Yield batches of push tokens inside `affected_area` (GeoJSON) from a server-side cursor."""
+    async with engine.connect() as conn:
+        result = await conn.stream(
+            AUDIENCE_SQL,
+            {"affected_area": affected_area, "max_vertices": max_vertices},
+        )
+        async for rows in result.partitions(batch_size):
+            yield [row[0] for row in rows]
+
+
+async def iter_push_tokens(affected_area: str, **kwargs) -> AsyncIterator[str]:
+    """Yield push tokens one by one; see stream_push_tokens."""
+    async for batch in stream_push_tokens(affected_area, **kwargs):
+        for token in batch:
+            yield token
@@ -0,0 +1,85 @@
+# app/audience_grid.py
+
+import math
+from dataclasses import dataclass
+from typing import Any, Dict
+
+import numpy as np
+import shapely
+from shapely.geometry import shape
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql import text
+
+from app.audience import AUDIENCE_SQL, AUDIENCE_MAX_VERTICES
+from app.database import async_engine
+from app.models import DeviceCell
+
+# Must match the cell size hard-coded in migrations/0009_device_cells.sql
+DEVICE_CELL_DEG = 0.01
+
+COUNT_SQL = text(f"SELECT count(*) FROM ({AUDIENCE_SQL.text}) AS audience")
+
+
+@dataclass
+class AudienceEstimate:
+    estimated_devices: int
+    lower_bound: int  # devices in cells entirely inside the area
+    upper_bound: int  # ... plus every device in cells crossing its edge
+    cells: int  # non-empty cells touched by the area
+
+
+def estimate_from_cells(area, xs: np.ndarray, ys: np.ndarray, devices: np.ndarray) -> AudienceEstimate:
+    """
+    Estimate the devices inside `area` (shapely polygon) from per-cell counts.
+
+    Cells wholly inside count fully; cells crossing the edge count in
+    proportion to the share of the cell the area covers, i.e. assuming the
+    devices are spread evenly within a cell.
+    """
+    if len(devices) == 0:
+        return AudienceEstimate(0, 0, 0, 0)
+    boxes = shapely.box(xs * DEVICE_CELL_DEG, ys * DEVICE_CELL_DEG, (xs + 1) * DEVICE_CELL_DEG, (ys + 1) * DEVICE_CELL_DEG)
+    shapely.prepare(area)
+    inside = shapely.contains(area, boxes)
+    edge = ~inside & shapely.intersects(area, boxes)
+    share = np.zeros(len(devices))
+    share[inside] = 1.0
+    if edge.any():
+        share[edge] = shapely.area(shapely.intersection(area, boxes[edge])) / DEVICE_CELL_DEG ** 2
+    lower = int(devices[inside].sum())
+    return AudienceEstimate(
+        estimated_devices=int(round(float((devices * share).sum()))),
+        lower_bound=lower,
+        upper_bound=lower + int(devices[edge].sum()),
+        cells=int((inside | edge).sum()),
+    )
+
+
+async def preview_audience(affected_area: Dict[str, Any], engine: AsyncEngine = async_engine) -> AudienceEstimate:
+    """Estimate an alert's audience from device_cells: one primary-key range scan."""
+    area = shapely.make_valid(shape(affected_area))
+    min_x, min_y, max_x, max_y = area.bounds
+    stmt = (
+        select(DeviceCell.cell_x, DeviceCell.cell_y, DeviceCell.devices)
+        .where(
+            DeviceCell.cell_x.between(math.floor(min_x / DEVICE_CELL_DEG), math.floor(max_x / DEVICE_CELL_DEG)),
+            DeviceCell.cell_y.between(math.floor(min_y / DEVICE_CELL_DEG), math.floor(max_y / DEVICE_CELL_DEG)),
+            DeviceCell.devices > 0,
+        )
+    )
+    async with engine.connect() as conn:
+        rows = (await conn.execute(stmt)).all()
+    cells = np.array(rows, dtype=np.int64).reshape(-1, 3)
+    return estimate_from_cells(area, cells[:, 0], cells[:, 1], cells[:, 2])
+
+
+async def count_audience(
+    affected_area: str,
+    max_vertices: int = AUDIENCE_MAX_VERTICES,
+    engine: AsyncEngine = async_engine,
+) -> int:
+    """Exact number of pushable devices in `affected_area` (GeoJSON), as create_alert would target."""
+    async with engine.connect() as conn:
+        result = await conn.execute(COUNT_SQL, {"affected_area": affected_area, "max_vertices": max_vertices})
+        return result.scalar_one()
@@ -0,0 +1,489 @@
+# app/correlation.py
+
+import logging
+import math
+import os
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import column, func, select, update, values
+from sqlalchemy.dialects.postgresql import UUID, insert as pg_insert
+
+from app.database import AsyncSessionLocal
+from app.models import CitizenReport, HazardEvent
+
+logger = logging.getLogger(__name__)
+
+CORRELATION_EPS_M = float(os.getenv("CORRELATION_EPS_M", "2000"))
+CORRELATION_WINDOW_HOURS = float(os.getenv("CORRELATION_WINDOW_HOURS", "6"))
+CORRELATION_MIN_WEIGHT = float(os.getenv("CORRELATION_MIN_WEIGHT", "3"))
+CORRELATION_CONFIDENCE_SCALE = float(os.getenv("CORRELATION_CONFIDENCE_SCALE", "6"))
+# How often the owning process expires events that stopped getting reports
+CORRELATION_SWEEP_SECONDS = float(os.getenv("CORRELATION_SWEEP_SECONDS", "60"))
+ROLE_WEIGHTS = {
+    "PUBLIC": float(os.getenv("CORRELATION_WEIGHT_PUBLIC", "1")),
+    "VERIFIED_VOLUNTEER": float(os.getenv("CORRELATION_WEIGHT_VERIFIED_VOLUNTEER", "2")),
+    "OFFICIAL": float(os.getenv("CORRELATION_WEIGHT_OFFICIAL", "3")),
+}
+
+M_PER_DEG = 111_320.0
+
+
+@dataclass(eq=False)
+class ReportPoint:
+    report_id: uuid.UUID
+    lon: float
+    lat: float
+    created_at: datetime
+    hazard_type: str
+    weight: float
+    density: float = 0.0  # own weight + weights of neighbours in eps/window
+    cluster: Optional["Cluster"] = None
+    cell: Tuple[str, int, int] = None
+
+
+@dataclass(eq=False)
+class Cluster:
+    """A hazard event: cumulative stats plus the points still in the window."""
+    id: uuid.UUID
+    hazard_type: str
+    members: Set[ReportPoint] = field(default_factory=set)
+    report_count: int = 0
+    total_weight: float = 0.0
+    sum_lon: float = 0.0  # weight-weighted sums for the centroid
+    sum_lat: float = 0.0
+    first_seen: Optional[datetime] = None
+    last_seen: Optional[datetime] = None
+    version: int = 0
+
+    def add(self, p: ReportPoint):
+        self.members.add(p)
+        self.report_count += 1
+        self.total_weight += p.weight
+        self.sum_lon += p.lon * p.weight
+        self.sum_lat += p.lat * p.weight
+        self.first_seen = min(self.first_seen or p.created_at, p.created_at)
+        self.last_seen = max(self.last_seen or p.created_at, p.created_at)
+
+    def absorb(self, other: "Cluster"):
+        self.members |= other.members
+        self.report_count += other.report_count
+        self.total_weight += other.total_weight
+        self.sum_lon += other.sum_lon
+        self.sum_lat += other.sum_lat
+        self.first_seen = min(filter(None, (self.first_seen, other.first_seen)))
+        self.last_seen = max(filter(None, (self.last_seen, other.last_seen)))
+
+    def centroid(self) -> Tuple[float, float]:
+        return self.sum_lon / self.total_weight, self.sum_lat / self.total_weight
+
+    def confidence(self, scale: float = CORRELATION_CONFIDENCE_SCALE) -> float:
+        return 1.0 - math.exp(-self.total_weight / scale)
+
+
+@dataclass
+class CorrelationResult:
+    """Changes produced by one or more assign() calls, ready to persist."""
+    inserted: List[ReportPoint] = field(default_factory=list)
+    joined: List[ReportPoint] = field(default_factory=list)
+    touched: Dict[uuid.UUID, Cluster] = field(default_factory=dict)
+    merged: Dict[uuid.UUID, uuid.UUID] = field(default_factory=dict)  # old event -> surviving event
+    expired: Set[uuid.UUID] = field(default_factory=set)
+
+    def assignments(self) -> Dict[uuid.UUID, Optional[uuid.UUID]]:
+        """Current event of every inserted or newly clustered report."""
+        return {p.report_id: p.cluster.id if p.cluster else None for p in (*self.inserted, *self.joined)}
+
+
+class CorrelationEngine:
+    """
+    Incremental, weighted DBSCAN over a sliding time window.
+
+    Points live in a grid of eps-sized cells keyed by hazard type, so each
+    insert costs one neighbourhood lookup (plus one per neighbour that just
+    became a core point) instead of a rescan. A point is core when its own
+    role weight plus its neighbours' weights reaches `min_weight`; clusters of
+    core points are merged as they connect. Points older than the window are
+    evicted; clusters keep their cumulative stats and are never split.
+    """
+
+    def __init__(
+        self,
+        eps_m: float = CORRELATION_EPS_M,
+        window: timedelta = timedelta(hours=CORRELATION_WINDOW_HOURS),
+        min_weight: float = CORRELATION_MIN_WEIGHT,
+        role_weights: Dict[str, float] = ROLE_WEIGHTS,
+    ):
+        self.eps_m = eps_m
+        self.window = window
+        self.min_weight = min_weight
+        self.role_weights = role_weights
+        self.cell_deg = eps_m / M_PER_DEG
+        self.grid: Dict[Tuple[str, int, int], List[ReportPoint]] = {}
+        self.timeline: deque = deque()
+        self.clusters: Dict[uuid.UUID, Cluster] = {}
+        # Every report in the window, so a replayed job can't count one twice
+        self.points: Dict[uuid.UUID, ReportPoint] = {}
+        self.now: Optional[datetime] = None
+
+    def reset(self):
+        self.grid.clear()
+        self.timeline.clear()
+        self.clusters.clear()
+        self.points.clear()
+        self.now = None
+
+    def __len__(self):
+        return len(self.timeline)
+
+    # -- public API -------------------------------------------------------
+
+    def assign(
+        self,
+        report_id: uuid.UUID,
+        lon: float,
+        lat: float,
+        created_at: datetime,
+        hazard_type: str,
+        user_role: str,
+        result: Optional[CorrelationResult] = None,
+    ) -> CorrelationResult:
+        """
+        Insert a report and update the clusters it touches. Idempotent: a
+        report already held (a retried or requeued job, or one warm_start
+        loaded while its job was still queued) is not counted again; its
+        current cluster is re-emitted so the caller persists it.
+        """
+        result = result or CorrelationResult()
+        existing = self.points.get(report_id)
+        if existing is not None:
+            self._reassign(existing, result)
+            return result
+        self._advance(created_at, result)
+
+        p = self._point(report_id, lon, lat, created_at, hazard_type, user_role)
+        neighbours = self._neighbours(p)
+        p.density = p.weight + sum(q.weight for q in neighbours)
+        self._insert(p)
+
+        newly_core = [p] if self._is_core(p) else []
+        for q in neighbours:
+            was_core = self._is_core(q)
+            q.density += p.weight
+            if not was_core and self._is_core(q):
+                newly_core.append(q)
+
+        for c in newly_core:
+            self._expand(c, neighbours if c is p else self._neighbours(c), result)
+
+        if p.cluster is None:
+            # Border point: attach to the cluster of any core neighbour
+            for q in neighbours:
+                if q.cluster is not None and self._is_core(q):
+                    self._join(q.cluster, p, result)
+                    break
+
+        result.inserted.append(p)
+        return result
+
+    def expire(self, now: datetime, result: Optional[CorrelationResult] = None) -> CorrelationResult:
+        """
+        Move the window to wall-clock `now`. Without this the window only
+        moves with incoming reports, so events outlive quiet periods.
+        """
+        result = result or CorrelationResult()
+        self._advance(now, result)
+        cutoff = self.now - self.window
+        # Restored events whose reports were all outside the window at warm start
+        for cluster in [k for k in self.clusters.values() if not k.members and k.last_seen < cutoff]:
+            del self.clusters[cluster.id]
+            result.expired.add(cluster.id)
+            result.touched.pop(cluster.id, None)
+        return result
+
+    def load_event(self, event_id: uuid.UUID, hazard_type: str, report_count: int, total_weight: float,
+                   lon: float, lat: float, first_seen: datetime, last_seen: datetime, version: int):
+        """Restore a persisted event (warm start)."""
+        self.clusters[event_id] = Cluster(
+            id=event_id, hazard_type=hazard_type, report_count=report_count,
+            total_weight=total_weight, sum_lon=lon * total_weight, sum_lat=lat * total_weight,
+            first_seen=first_seen, last_seen=last_seen, version=version,
+        )
+
+    def load_point(self, report_id: uuid.UUID, lon: float, lat: float, created_at: datetime,
+                   hazard_type: str, user_role: str, event_id: Optional[uuid.UUID]):
+        """Restore an already-correlated report (warm start); no clusters change."""
+        if report_id in self.points:
+            return
+        self.now = max(self.now or created_at, created_at)
+        p = self._point(report_id, lon, lat, created_at, hazard_type, user_role)
+        neighbours = self._neighbours(p)
+        p.density = p.weight + sum(q.weight for q in neighbours)
+        for q in neighbours:
+            q.density += p.weight
+        self._insert(p)
+        cluster = self.clusters.get(event_id) if event_id else None
+        if cluster is not None:
+            p.cluster = cluster
+            cluster.members.add(p)
+
+    # -- internals ----------------------------------------------------------
+
+    def _point(self, report_id, lon, lat, created_at, hazard_type, user_role) -> ReportPoint:
+        return ReportPoint(
+            report_id=report_id, lon=lon, lat=lat, created_at=created_at,
+            hazard_type=str(getattr(hazard_type, "value", hazard_type)),
+            weight=self.role_weights.get(str(getattr(user_role, "value", user_role)), 1.0),
+        )
+
+    def _reassign(self, p: ReportPoint, result: CorrelationResult):
+        """Cluster a held point that has none yet, without touching densities."""
+        if p.cluster is None:
+            neighbours = self._neighbours(p)
+            if self._is_core(p):
+                self._expand(p, neighbours, result)
+            else:
+                for q in neighbours:
+                    if q.cluster is not None and self._is_core(q):
+                        self._join(q.cluster, p, result)
+                        break
+        if p.cluster is not None:
+            result.touched[p.cluster.id] = p.cluster
+        result.inserted.append(p)
+
+    def _is_core(self, p: ReportPoint) -> bool:
+        return p.density >= self.min_weight
+
+    def _cell(self, p: ReportPoint) -> Tuple[str, int, int]:
+        return p.hazard_type, math.floor(p.lon / self.cell_deg), math.floor(p.lat / self.cell_deg)
+
+    def _distance_m(self, a: ReportPoint, b: ReportPoint) -> float:
+        # Equirectangular approximation; exact enough at eps scale
+        x = (b.lon - a.lon) * math.cos(math.radians((a.lat + b.lat) / 2))
+        y = b.lat - a.lat
+        return math.hypot(x, y) * M_PER_DEG
+
+    def _neighbours(self, p: ReportPoint) -> List[ReportPoint]:
+        hazard, cx, cy = self._cell(p)
+        # eps spans more longitude cells away from the equator
+        kx = math.ceil(1.0 / max(math.cos(math.radians(p.lat)), 0.01))
+        found = []
+        for dx in range(-kx, kx + 1):
+            for dy in (-1, 0, 1):
+                for q in self.grid.get((hazard, cx + dx, cy + dy), ()):
+                    if (
+                        q is not p
+                        and abs(q.created_at - p.created_at) <= self.window
+                        and self._distance_m(p, q) <= self.eps_m
+                    ):
+                        found.append(q)
+        return found
+
+    def _insert(self, p: ReportPoint):
+        self.points[p.report_id] = p
+        p.cell = self._cell(p)
+        self.grid.setdefault(p.cell, []).append(p)
+        self.timeline.append(p)
+
+    def _advance(self, created_at: datetime, result: CorrelationResult):
+        """Move the window forward and evict points that fell out of it."""
+        self.now = max(self.now or created_at, created_at)
+        cutoff = self.now - self.window
+        while self.timeline and self.timeline[0].created_at < cutoff:
+            q = self.timeline.popleft()
+            self.points.pop(q.report_id, None)
+            cell = self.grid[q.cell]
+            cell.remove(q)
+            if not cell:
+                del self.grid[q.cell]
+            for n in self._neighbours(q):
+                n.density -= q.weight
+            if q.cluster is not None:
+                q.cluster.members.discard(q)
+                if not q.cluster.members:
+                    self.clusters.pop(q.cluster.id, None)
+                    result.expired.add(q.cluster.id)
+                    result.touched.pop(q.cluster.id, None)
+
+    def _expand(self, c: ReportPoint, neighbours: Iterable[ReportPoint], result: CorrelationResult):
+        """Connect core point `c` with its neighbourhood."""
+        neighbours = list(neighbours)
+        clusters = {q.cluster for q in [c, *neighbours] if q.cluster is not None and self._is_core(q)}
+        if c.cluster is not None:
+            clusters.add(c.cluster)
+        if not clusters:
+            target = Cluster(id=uuid.uuid4(), hazard_type=c.hazard_type)
+            self.clusters[target.id] = target
+        else:
+            target = max(clusters, key=lambda k: k.report_count)
+            for other in clusters - {target}:
+                self._merge(target, other, result)
+        if c.cluster is None:
+            self._join(target, c, result)
+        for q in neighbours:
+            if q.cluster is None:
+                self._join(target, q, result)
+        result.touched[target.id] = target
+
+    def _join(self, cluster: Cluster, p: ReportPoint, result: CorrelationResult):
+        p.cluster = cluster
+        cluster.add(p)
+        cluster.version += 1
+        result.touched[cluster.id] = cluster
+        result.joined.append(p)
+
+    def _merge(self, target: Cluster, other: Cluster, result: CorrelationResult):
+        for m in other.members:
+            m.cluster = target
+        target.absorb(other)
+        target.version += other.version + 1
+        self.clusters.pop(other.id, None)
+        result.touched.pop(other.id, None)
+        result.touched[target.id] = target
+        for old, new in result.merged.items():
+            if new == other.id:
+                result.merged[old] = target.id
+        result.merged[other.id] = target.id
+
+
+correlator = CorrelationEngine()
+
+
+# -- persistence ----------------------------------------------------------
+
+async def warm_start(engine: CorrelationEngine = correlator):
+    """Rebuild in-memory state from reports inside the current window."""
+    engine.reset()
+    async with AsyncSessionLocal() as db:
+        cutoff = func.now() - engine.window
+        # Events that went quiet while no process held the state
+        await expire_stale(db, engine)
+        await db.commit()
+        events = await db.execute(
+            select(
+                HazardEvent.id, HazardEvent.hazard_type, HazardEvent.report_count, HazardEvent.total_weight,
+                func.ST_X(HazardEvent.centroid), func.ST_Y(HazardEvent.centroid),
+                HazardEvent.first_seen, HazardEvent.last_seen, HazardEvent.version,
+            ).where(HazardEvent.status == "ACTIVE", HazardEvent.last_seen >= cutoff)
+        )
+        for row in events:
+            engine.load_event(*row)
+        reports = await db.stream(
+            select(
+                CitizenReport.id, func.ST_X(CitizenReport.location), func.ST_Y(CitizenReport.location),
+                CitizenReport.created_at, CitizenReport.hazard_type, CitizenReport.user_role,
+                CitizenReport.event_id,
+            ).where(CitizenReport.created_at >= cutoff).order_by(CitizenReport.created_at)
+        )
+        async for row in reports:
+            engine.load_point(*row)
+    logger.info("Correlation engine warmed with %d reports, %d events", len(engine), len(engine.clusters))
+
+
+async def expire_stale(db, engine: CorrelationEngine = correlator) -> int:
+    """Mark ACTIVE events with no report inside the window as EXPIRED."""
+    result = await db.execute(
+        update(HazardEvent)
+        .where(HazardEvent.status == "ACTIVE", HazardEvent.last_seen < func.now() - engine.window)
+        .values(status="EXPIRED", updated_at=func.now())
+    )
+    return result.rowcount
+
+
+async def expire_events(engine: CorrelationEngine = correlator):
+    """Advance the engine to the database clock and expire quiet events (periodic)."""
+    async with AsyncSessionLocal() as db:
+        # Same clock and time zone as the reports' created_at defaults
+        now = (await db.execute(select(func.localtimestamp()))).scalar_one()
+        result = engine.expire(now)
+        await persist(db, result)
+        expired = await expire_stale(db, engine)
+        await db.commit()
+    if expired:
+        logger.info("Expired %d quiet hazard events", expired)
+
+
+async def correlate_reports(report_ids: List[str], engine: CorrelationEngine = correlator) -> Dict:
+    """Assign stored reports to hazard events and persist the changes."""
+    async with AsyncSessionLocal() as db:
+        rows = (await db.execute(
+            select(
+                CitizenReport.id, func.ST_X(CitizenReport.location), func.ST_Y(CitizenReport.location),
+                CitizenReport.created_at, CitizenReport.hazard_type, CitizenReport.user_role,
+            ).where(CitizenReport.id.in_([uuid.UUID(str(r)) for r in report_ids]))
+            .order_by(CitizenReport.created_at)
+        )).fetchall()
+
+        # assign() never awaits, so concurrent jobs cannot interleave inside it
+        result = CorrelationResult()
+        for row in rows:
+            engine.assign(*row, result=result)
+
+        await persist(db, result)
+        await db.commit()
+
+    return {
+        "reports": len(rows),
+        "events": sorted({str(e) for e in result.assignments().values() if e}),
+        "merged": len(result.merged),
+    }
+
+
+async def persist(db, result: CorrelationResult):
+    """Write one CorrelationResult in a handful of set-based statements."""
+    if result.touched:
+        rows = []
+        for cluster in result.touched.values():
+            lon, lat = cluster.centroid()
+            rows.append({
+                "id": cluster.id,
+                "hazard_type": cluster.hazard_type,
+                "status": "ACTIVE",
+                "centroid": f"SRID=4326;POINT({lon} {lat})",
+                "report_count": cluster.report_count,
+                "total_weight": cluster.total_weight,
+                "confidence": cluster.confidence(),
+                "first_seen": cluster.first_seen,
+                "last_seen": cluster.last_seen,
+                "version": cluster.version,
+            })
+        stmt = pg_insert(HazardEvent).values(rows)
+        excluded = stmt.excluded
+        await db.execute(stmt.on_conflict_do_update(
+            index_elements=[HazardEvent.id],
+            set_={
+                "centroid": excluded.centroid,
+                "report_count": excluded.report_count,
+                "total_weight": excluded.total_weight,
+                "confidence": excluded.confidence,
+                "first_seen": excluded.first_seen,
+                "last_seen": excluded.last_seen,
+                "version": excluded.version,
+                "updated_at": func.now(),
+            },
+            # An older snapshot from a concurrent job must not win
+            where=HazardEvent.version < excluded.version,
+        ))
+
+    for old, new in result.merged.items():
+        await db.execute(
+            update(HazardEvent).where(HazardEvent.id == old)
+            .values(status="MERGED", merged_into=new, updated_at=func.now())
+        )
+        await db.execute(update(CitizenReport).where(CitizenReport.event_id == old).values(event_id=new))
+
+    if result.expired:
+        await db.execute(
+            update(HazardEvent).where(HazardEvent.id.in_(result.expired), HazardEvent.status == "ACTIVE")
+            .values(status="EXPIRED", updated_at=func.now())
+        )
+
+    assigned = [(rid, eid) for rid, eid in result.assignments().items() if eid is not None]
+    if assigned:
+        v = values(column("id", UUID(as_uuid=True)), column("event_id", UUID(as_uuid=True)), name="v").data(assigned)
+        await db.execute(
+            update(CitizenReport).where(CitizenReport.id == v.c.id).values(event_id=v.c.event_id)
+        )
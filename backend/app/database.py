@@ -2,17 +2,72 @@
 
 import os
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import NullPool
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, poolclass=NullPool)  # Adjust pooling as needed
+# Pool configuration (all overridable from the environment)
+# DB_POOL_MODE=null restores the old connect-per-request behaviour.
+DB_POOL_MODE = os.getenv("DB_POOL_MODE", "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+# asyncpg prepared statement cache; set to 0 behind pgbouncer/Supabase pooler
+DB_STATEMENT_CACHE_SIZE = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+
+
+def pool_options(pool_mode: str = DB_POOL_MODE) -> dict:
+    """Engine keyword arguments for the requested pool mode."""
+    if pool_mode == "null":
+        return {"poolclass": NullPool}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+def async_database_url(url: str) -> str:
+    """Rewrite a postgres URL so it uses the asyncpg driver."""
+    return make_url(url).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+
+
+def make_engine(url: str = DATABASE_URL, pool_mode: str = DB_POOL_MODE):
+    """Build a sync (psycopg2) engine."""
+    return create_engine(url, **pool_options(pool_mode))
+
+
+def make_async_engine(url: str = DATABASE_URL, pool_mode: str = DB_POOL_MODE):
+    """Build an async (asyncpg) engine."""
+    return create_async_engine(
+        async_database_url(url),
+        connect_args={"statement_cache_size": DB_STATEMENT_CACHE_SIZE},
+        **pool_options(pool_mode),
+    )
+
+
+engine = make_engine()
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = make_async_engine()
+# expire_on_commit=False: response models read attributes after commit, and an
+# expired attribute would trigger implicit IO outside the event loop.
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
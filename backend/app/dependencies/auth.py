@@ -1,7 +1,13 @@
 # app/dependencies/auth.py
 
+import hashlib
+import logging
 import os
-from typing import Dict
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
 from fastapi import Depends, HTTPException, status, Request
 from jose import JWTError, jwt
 from app.schemas import UserRoleEnum
@@ -11,11 +17,80 @@ from dotenv import load_dotenv
 # Load environment variables from .env file
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SUPABASE_JWT_SECRET = os.getenv("SUPABASE_JWT_SECRET")
 if not SUPABASE_JWT_SECRET:
     raise ValueError("SUPABASE_JWT_SECRET not set in .env")
 
-def get_token(request: Request) -> str:
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", "10000"))
+# Upper bound on how long a verified token is trusted without re-verifying,
+# also used for tokens that carry no exp claim.
+AUTH_CACHE_MAX_TTL = float(os.getenv("AUTH_CACHE_MAX_TTL", "300"))
+
+
+class VerifiedTokenCache:
+    """Bounded LRU of verified claims, keyed by SHA-256 of the raw token."""
+
+    def __init__(self, maxsize: int = AUTH_CACHE_SIZE, max_ttl: float = AUTH_CACHE_MAX_TTL):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl
+        self._entries: "OrderedDict[bytes, Tuple[float, Dict[str, str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict[str, str]]:
+        key = self.key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, user = entry
+            if expires_at <= now:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return user
+
+    def put(self, token: str, user: Dict[str, str], exp: Optional[float]):
+        if self.maxsize <= 0:
+            return
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        key = self.key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, user)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+token_cache = VerifiedTokenCache()
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+async def get_token(request: Request) -> str:
     """Extract Bearer token from Authorization header."""
     auth = request.headers.get("Authorization")
     if not auth:
@@ -24,24 +99,26 @@ def get_token(request: Request) -> str:
             detail="Authorization header missing",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    scheme, token = auth.split()
-    if scheme.lower() != "bearer":
+    scheme, _, token = auth.partition(" ")
+    if scheme.lower() != "bearer" or not token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid authentication scheme",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return token
+    return token.strip()
 
-# In app/dependencies/auth.py
+def _rejected(reason: str) -> HTTPException:
+    """Log why a token was refused; returns the 401 to raise."""
+    logger.info("JWT rejected: %s", reason, extra={"reason": reason})
+    return credentials_exception
+
+def verify_token(token: str) -> Dict[str, str]:
+    """Return user_id (sub) and user_role (custom claim) for a valid JWT."""
+    user = token_cache.get(token)
+    if user is not None:
+        return user
 
-def get_current_user(token: str = Depends(get_token)) -> Dict[str, str]:
-    """Validate JWT and extract user_id (sub) and user_role (custom claim)."""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
     try:
         payload = jwt.decode(
             token,
@@ -50,32 +127,37 @@ def get_current_user(token: str = Depends(get_token)) -> Dict[str, str]:
             audience="authenticated",
             options={"verify_signature": True, "verify_exp": True},
         )
-        
-        # ADD THIS LINE TO SEE THE PAYLOAD
-        print("✅ DECODED PAYLOAD ON BACKEND:", payload)
-        
-        user_id: str = payload.get("sub")
-        user_role: str = payload.get("user_role") 
-
-        if user_id is None or user_role is None:
-            # This will print if the validation check fails
-            print("❌ VALIDATION FAILED: user_id or user_role is missing from payload.")
-            raise credentials_exception
-        
-        return {"user_id": user_id, "user_role": user_role}
-    
     except JWTError as e:
-        # This will print if the token signature or expiration is invalid
-        print("❌ JWT DECODING ERROR:", e)
-        raise credentials_exception
+        raise _rejected(str(e))
+
+    user_id: str = payload.get("sub")
+    user_role: str = payload.get("user_role")
+    if user_id is None or user_role is None:
+        raise _rejected("missing sub or user_role claim")
+    try:
+        # Profiles are keyed by UUID; a subject that isn't one names no user
+        user_id = str(uuid.UUID(user_id))
+    except (TypeError, ValueError, AttributeError):
+        raise _rejected("sub is not a UUID")
+
+    user = {"user_id": user_id, "user_role": user_role}
+    token_cache.put(token, user, payload.get("exp"))
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("JWT verified for %s (%s)", user_id, user_role, extra={"user_id": user_id, "user_role": user_role, "exp": payload.get("exp")})
+    return user
+
+async def get_current_user(token: str = Depends(get_token)) -> Dict[str, str]:
+    """Validate JWT and extract user_id (sub) and user_role (custom claim)."""
+    # Copy so handlers can't mutate the cached entry
+    return dict(verify_token(token))
 
 def require_role(required_role: UserRoleEnum):
     """Dependency to enforce role-based access."""
-    def role_checker(current_user: Dict[str, str] = Depends(get_current_user)):
+    async def role_checker(current_user: Dict[str, str] = Depends(get_current_user)):
         if current_user["user_role"] != required_role:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Requires {required_role} role",
             )
         return current_user
-    return role_checker
\ No newline at end of file
+    return role_checker
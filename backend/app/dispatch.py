@@ -0,0 +1,402 @@
+# app/dispatch.py
+
+import asyncio
+import logging
+import os
+import random
+import time
+import uuid
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional
+
+import httpx
+from sqlalchemy import insert, text, update
+
+from app.database import AsyncSessionLocal
+from app.metrics import detached
+from app.models import AlertDelivery, Profile, PushTicket
+
+logger = logging.getLogger(__name__)
+
+EXPO_PUSH_URL = os.getenv("EXPO_PUSH_URL", "https://exp.host/--/api/v2/push/send")
+EXPO_ACCESS_TOKEN = os.getenv("EXPO_ACCESS_TOKEN")
+PUSH_CHUNK_SIZE = 100  # Expo accepts at most 100 messages per request
+PUSH_CONCURRENCY = int(os.getenv("PUSH_CONCURRENCY", "8"))
+PUSH_QUEUE_SIZE = int(os.getenv("PUSH_QUEUE_SIZE", "64"))
+PUSH_MAX_RETRIES = int(os.getenv("PUSH_MAX_RETRIES", "5"))
+PUSH_BACKOFF_BASE = float(os.getenv("PUSH_BACKOFF_BASE", "0.5"))
+PUSH_BACKOFF_MAX = float(os.getenv("PUSH_BACKOFF_MAX", "30"))
+PUSH_TIMEOUT = float(os.getenv("PUSH_TIMEOUT", "10"))
+EXPO_RECEIPTS_URL = os.getenv("EXPO_RECEIPTS_URL", "https://exp.host/--/api/v2/push/getReceipts")
+# Expo has receipts ready about 15 minutes after sending and keeps them for a day
+PUSH_RECEIPT_DELAY = float(os.getenv("PUSH_RECEIPT_DELAY", "900"))
+PUSH_RECEIPT_MAX_AGE = float(os.getenv("PUSH_RECEIPT_MAX_AGE", "86400"))
+PUSH_RECEIPT_INTERVAL = float(os.getenv("PUSH_RECEIPT_INTERVAL", "60"))
+PUSH_RECEIPT_BATCH = 1000  # Expo accepts at most 1000 ids per request
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+THROUGHPUT_WINDOW = 60.0  # seconds
+
+# Claim the tickets whose receipt is due, oldest first. The claim is
+# committed before Expo is asked, so no row lock or transaction stays open
+# across the HTTP call; a claimed ticket is skipped by every worker for
+# :lease seconds, which also spaces out retries of receipts not ready yet.
+CLAIM_RECEIPTS_SQL = text("""
+    UPDATE push_tickets
+    SET receipt_checked_at = now()
+    WHERE id IN (
+        SELECT id FROM push_tickets
+        WHERE status = 'ok' AND ticket_id IS NOT NULL AND receipt_status IS NULL
+          AND created_at < now() - make_interval(secs => :delay)
+          AND (receipt_checked_at IS NULL OR receipt_checked_at < now() - make_interval(secs => :lease))
+        ORDER BY created_at
+        LIMIT :batch
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, ticket_id, push_token, created_at < now() - make_interval(secs => :max_age) AS expired
+""")
+
+
+@dataclass
+class DeliveryProgress:
+    """In-memory progress of one alert's fan-out."""
+    alert_id: uuid.UUID
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    pending_chunks: int = 0
+    producing: bool = True
+    finished: bool = False
+    error: Optional[str] = None
+    started_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def done(self) -> bool:
+        return not self.producing and self.pending_chunks == 0
+
+
+class PushDispatcher:
+    """
+    Fans push notifications out to Expo in the background.
+
+    Tokens are streamed by a producer task into a bounded queue of
+    100-message chunks (a full queue pauses the producer), and a fixed pool of
+    workers sends chunks concurrently over one pooled httpx.AsyncClient.
+    A receipt poller later fetches Expo's delivery receipts for the accepted
+    tickets and stops targeting devices that turn out to be unregistered.
+    """
+
+    def __init__(
+        self,
+        url: str = EXPO_PUSH_URL,
+        concurrency: int = PUSH_CONCURRENCY,
+        queue_size: int = PUSH_QUEUE_SIZE,
+        max_retries: int = PUSH_MAX_RETRIES,
+        session_factory=AsyncSessionLocal,
+        receipts_url: str = EXPO_RECEIPTS_URL,
+    ):
+        self.url = url
+        self.receipts_url = receipts_url
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.max_retries = max_retries
+        self.session_factory = session_factory
+        self.progress: Dict[uuid.UUID, DeliveryProgress] = {}
+        self.queue: Optional[asyncio.Queue] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._workers: List[asyncio.Task] = []
+        self._receipts: Optional[asyncio.Task] = None
+        self._producers: set = set()
+        self._recent = deque()  # (timestamp, messages) for the throughput window
+        self.messages_sent = 0
+        self.messages_failed = 0
+        self.chunks_sent = 0
+        self.retries = 0
+        self.receipts_ok = 0
+        self.receipts_failed = 0
+        self.receipts_expired = 0
+
+    async def start(self):
+        headers = {"Accept": "application/json", "Accept-Encoding": "gzip, deflate"}
+        if EXPO_ACCESS_TOKEN:
+            headers["Authorization"] = f"Bearer {EXPO_ACCESS_TOKEN}"
+        self.queue = asyncio.Queue(maxsize=self.queue_size)
+        self._client = httpx.AsyncClient(
+            headers=headers,
+            timeout=PUSH_TIMEOUT,
+            limits=httpx.Limits(
+                max_connections=self.concurrency,
+                max_keepalive_connections=self.concurrency,
+            ),
+        )
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._receipts = asyncio.create_task(self._receipt_loop())
+        logger.info("Push dispatcher started with %d workers", self.concurrency)
+
+    async def stop(self):
+        tasks = list(self._producers) + self._workers + ([self._receipts] if self._receipts else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+        self._receipts = None
+        if self._client:
+            await self._client.aclose()
+            self._client = None
+
+    def dispatch(self, alert_id: uuid.UUID, message: Dict, tokens: AsyncIterator[str]) -> DeliveryProgress:
+        """Start fanning `message` out to `tokens`; returns immediately."""
+        progress = DeliveryProgress(alert_id=alert_id)
+        self.progress[alert_id] = progress
+        task = asyncio.create_task(detached(self._produce(progress, message, tokens)))
+        self._producers.add(task)
+        task.add_done_callback(self._producers.discard)
+        return progress
+
+    def stats(self) -> Dict:
+        """Queue depth, totals and recent messages/sec."""
+        now = time.monotonic()
+        while self._recent and now - self._recent[0][0] > THROUGHPUT_WINDOW:
+            self._recent.popleft()
+        recent = sum(n for _, n in self._recent)
+        return {
+            "queue_depth": self.queue.qsize() if self.queue else 0,
+            "queue_capacity": self.queue_size,
+            "concurrency": self.concurrency,
+            "active_alerts": sum(1 for p in self.progress.values() if not p.finished),
+            "messages_sent": self.messages_sent,
+            "messages_failed": self.messages_failed,
+            "chunks_sent": self.chunks_sent,
+            "retries": self.retries,
+            "receipts_ok": self.receipts_ok,
+            "receipts_failed": self.receipts_failed,
+            "receipts_expired": self.receipts_expired,
+            "throughput_per_sec": round(recent / THROUGHPUT_WINDOW, 2),
+        }
+
+    async def _produce(self, progress: DeliveryProgress, message: Dict, tokens: AsyncIterator[str]):
+        chunk: List[str] = []
+        try:
+            await self._record_start(progress)
+            async for token in tokens:
+                chunk.append(token)
+                if len(chunk) == PUSH_CHUNK_SIZE:
+                    await self._enqueue(progress, message, chunk)
+                    chunk = []
+            if chunk:
+                await self._enqueue(progress, message, chunk)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Dispatch failed for alert %s", progress.alert_id)
+            progress.error = str(e)
+        finally:
+            progress.producing = False
+        if progress.done:
+            await self._finish(progress)
+
+    async def _enqueue(self, progress: DeliveryProgress, message: Dict, chunk: List[str]):
+        progress.total += len(chunk)
+        progress.pending_chunks += 1
+        await self.queue.put((progress, message, chunk))
+
+    async def _worker(self):
+        while True:
+            progress, message, chunk = await self.queue.get()
+            try:
+                tickets = await self._send_with_retry(message, chunk)
+                await self._record_chunk(progress, chunk, tickets)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to record push chunk for alert %s", progress.alert_id)
+            finally:
+                progress.pending_chunks -= 1
+                self.queue.task_done()
+            try:
+                if progress.done:
+                    await self._finish(progress)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # A worker that dies here is never replaced
+                logger.exception("Failed to finish dispatch for alert %s", progress.alert_id)
+
+    async def _send_with_retry(self, message: Dict, chunk: List[str]) -> List[Dict]:
+        """POST one chunk, retrying transport errors, 429 and 5xx with backoff."""
+        payload = [dict(message, to=token) for token in chunk]
+        error = "unknown error"
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+            try:
+                resp = await self._client.post(self.url, json=payload)
+                if resp.status_code not in RETRYABLE_STATUS:
+                    resp.raise_for_status()
+                    tickets = resp.json().get("data", [])
+                    if len(tickets) == len(chunk):
+                        return tickets
+                    error = f"expected {len(chunk)} tickets, got {len(tickets)}"
+                else:
+                    error = f"HTTP {resp.status_code}"
+                    retry_after = resp.headers.get("Retry-After")
+            except httpx.HTTPStatusError as e:
+                # Other 4xx responses will not succeed on retry
+                error = f"HTTP {e.response.status_code}"
+                break
+            except (httpx.TransportError, ValueError) as e:
+                error = f"{type(e).__name__}: {e}"
+
+            if attempt < self.max_retries:
+                self.retries += 1
+                await asyncio.sleep(self._backoff(attempt, retry_after))
+
+        logger.warning("Giving up on push chunk of %d messages: %s", len(chunk), error)
+        return [{"status": "error", "message": error}] * len(chunk)
+
+    @staticmethod
+    def _backoff(attempt: int, retry_after: Optional[str]) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), PUSH_BACKOFF_MAX)
+        delay = min(PUSH_BACKOFF_BASE * (2 ** attempt), PUSH_BACKOFF_MAX)
+        return delay * (0.5 + random.random() / 2)  # jitter
+
+    async def _record_start(self, progress: DeliveryProgress):
+        async with self.session_factory() as db:
+            await db.merge(AlertDelivery(alert_id=progress.alert_id, status="SENDING",
+                                         total_tokens=0, sent_count=0, failed_count=0))
+            await db.commit()
+
+    async def _record_chunk(self, progress: DeliveryProgress, chunk: List[str], tickets: List[Dict]):
+        rows = []
+        unregistered = []
+        for token, ticket in zip(chunk, tickets):
+            ok = ticket.get("status") == "ok"
+            rows.append({
+                "alert_id": progress.alert_id,
+                "push_token": token,
+                "status": "ok" if ok else "error",
+                "ticket_id": ticket.get("id"),
+                "error": None if ok else ticket.get("message"),
+            })
+            if (ticket.get("details") or {}).get("error") == "DeviceNotRegistered":
+                unregistered.append(token)
+
+        sent = sum(1 for r in rows if r["status"] == "ok")
+        failed = len(rows) - sent
+        progress.sent += sent
+        progress.failed += failed
+        self.messages_sent += sent
+        self.messages_failed += failed
+        self.chunks_sent += 1
+        self._recent.append((time.monotonic(), len(rows)))
+
+        async with self.session_factory() as db:
+            await db.execute(insert(PushTicket), rows)
+            await db.execute(
+                update(AlertDelivery)
+                .where(AlertDelivery.alert_id == progress.alert_id)
+                .values(
+                    total_tokens=AlertDelivery.total_tokens + len(rows),
+                    sent_count=AlertDelivery.sent_count + sent,
+                    failed_count=AlertDelivery.failed_count + failed,
+                )
+            )
+            if unregistered:
+                # Expo says these devices are gone; stop targeting them
+                await db.execute(
+                    update(Profile).where(Profile.push_token.in_(unregistered)).values(push_token=None)
+                )
+            await db.commit()
+
+    async def _finish(self, progress: DeliveryProgress):
+        if progress.finished:
+            return
+        progress.finished = True
+        status = "FAILED" if progress.error or (progress.total and not progress.sent) else "COMPLETED"
+        logger.info(
+            "Alert %s dispatch %s: %d sent, %d failed in %.1fs",
+            progress.alert_id, status, progress.sent, progress.failed,
+            time.monotonic() - progress.started_at,
+        )
+        try:
+            async with self.session_factory() as db:
+                await db.execute(
+                    update(AlertDelivery)
+                    .where(AlertDelivery.alert_id == progress.alert_id)
+                    .values(status=status, finished_at=datetime.utcnow())
+                )
+                await db.commit()
+        finally:
+            self.progress.pop(progress.alert_id, None)
+
+    async def _receipt_loop(self):
+        while True:
+            try:
+                checked = await self.check_receipts()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Push receipt check failed")
+                checked = 0
+            # A full batch means more may be due; keep going without sleeping.
+            # Checked tickets are leased, so the next batch is different ones.
+            if checked < PUSH_RECEIPT_BATCH:
+                await asyncio.sleep(PUSH_RECEIPT_INTERVAL)
+
+    async def check_receipts(self) -> int:
+        """
+        Fetch receipts for one batch of due tickets and store them; returns
+        the number of tickets checked. Tickets Expo has no receipt for yet are
+        retried every PUSH_RECEIPT_INTERVAL until PUSH_RECEIPT_MAX_AGE, then
+        marked 'expired'.
+        """
+        async with self.session_factory() as db:
+            due = (await db.execute(CLAIM_RECEIPTS_SQL, {
+                "delay": PUSH_RECEIPT_DELAY, "max_age": PUSH_RECEIPT_MAX_AGE,
+                "lease": PUSH_RECEIPT_INTERVAL, "batch": PUSH_RECEIPT_BATCH,
+            })).all()
+            await db.commit()
+        if not due:
+            return 0
+
+        # Outside any transaction: a slow Expo call holds no connection
+        resp = await self._client.post(self.receipts_url, json={"ids": [row.ticket_id for row in due]})
+        resp.raise_for_status()
+        receipts = resp.json().get("data") or {}
+
+        rows = []
+        unregistered = []
+        for row in due:
+            receipt = receipts.get(row.ticket_id)
+            if receipt is None:
+                if row.expired:
+                    rows.append({"id": row.id, "receipt_status": "expired", "receipt_error": None})
+                    self.receipts_expired += 1
+                continue
+            ok = receipt.get("status") == "ok"
+            rows.append({
+                "id": row.id,
+                "receipt_status": "ok" if ok else "error",
+                "receipt_error": None if ok else receipt.get("message"),
+            })
+            if ok:
+                self.receipts_ok += 1
+            else:
+                self.receipts_failed += 1
+            if (receipt.get("details") or {}).get("error") == "DeviceNotRegistered":
+                unregistered.append(row.push_token)
+
+        if rows or unregistered:
+            async with self.session_factory() as db:
+                if rows:
+                    await db.execute(update(PushTicket), rows)
+                if unregistered:
+                    await db.execute(
+                        update(Profile).where(Profile.push_token.in_(unregistered)).values(push_token=None)
+                    )
+                await db.commit()
+        return len(due)
+
+dispatcher = PushDispatcher()
@@ -0,0 +1,51 @@
+# app/geometry.py
+
+"""
+GeoJSON <-> PostGIS conversion done in-process.
+
+Writes bind geometries as hex EWKB (GeoAlchemy2 wraps them in
+ST_GeomFromEWKT, a binary parse) instead of sending GeoJSON text through
+ST_GeomFromGeoJSON. Reads decode the EWKB that GeoAlchemy2 selects via
+ST_AsEWKB, including from INSERT ... RETURNING, so a write plus its response
+costs one statement instead of INSERT + refresh + ST_AsGeoJSON.
+"""
+
+from typing import Any, Dict, Optional
+
+from geoalchemy2.elements import WKBElement, WKTElement
+from geoalchemy2.shape import from_shape, to_shape
+from shapely import wkb
+from shapely.geometry import mapping, shape
+from shapely.geometry.base import BaseGeometry
+
+SRID = 4326
+
+
+def to_wkb(geojson: Any, srid: int = SRID) -> WKBElement:
+    """GeoJSON (dict or GeoPoint/GeoPolygon model) -> EWKB element for binding."""
+    if hasattr(geojson, "model_dump"):
+        geojson = geojson.model_dump()
+    return from_shape(shape(geojson), srid=srid, extended=True)
+
+
+def to_shapely(value: Any) -> Optional[BaseGeometry]:
+    """Decode whatever a geometry column hands back into a shapely geometry."""
+    if value is None or isinstance(value, BaseGeometry):
+        return value
+    if isinstance(value, (WKBElement, WKTElement)):
+        return to_shape(value)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return wkb.loads(bytes(value))
+    if isinstance(value, str):
+        # Raw hex (E)WKB, e.g. from a text() query
+        return wkb.loads(value, hex=True)
+    if isinstance(value, dict):
+        return shape(value)
+    raise TypeError(f"Cannot decode geometry from {type(value).__name__}")
+
+
+def to_geojson(value: Any) -> Optional[Dict[str, Any]]:
+    """Decode a geometry column value into a GeoJSON dict; dicts pass through."""
+    if value is None or isinstance(value, dict):
+        return value
+    return mapping(to_shapely(value))
@@ -0,0 +1,450 @@
+# app/jobs.py
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import event, func, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import text
+
+from app.database import AsyncSessionLocal, async_engine
+from app.models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_INTAKE_SIZE = int(os.getenv("JOB_INTAKE_SIZE", "10000"))
+JOB_BATCH_SIZE = int(os.getenv("JOB_BATCH_SIZE", "100"))
+JOB_FLUSH_INTERVAL = float(os.getenv("JOB_FLUSH_INTERVAL", "0.02"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BACKOFF = float(os.getenv("JOB_RETRY_BACKOFF", "2.0"))
+JOB_VISIBILITY_TIMEOUT = int(os.getenv("JOB_VISIBILITY_TIMEOUT", "300"))
+JOB_DEFAULT_CONCURRENCY = int(os.getenv("JOB_DEFAULT_CONCURRENCY", "2"))
+# Per-type worker pool sizes, e.g. "event_correlation=4,keyword_tuner=1"
+JOB_CONCURRENCY = os.getenv("JOB_CONCURRENCY", "")
+# Job types this process only enqueues, e.g. when another process owns them
+JOB_DISABLED_TYPES = {t.strip() for t in os.getenv("JOB_DISABLED_TYPES", "").split(",") if t.strip()}
+# Job types run by one process at a time, elected with a Postgres advisory
+# lock; the others only enqueue them and take over if the owner goes away
+JOB_SINGLETON_TYPES = {
+    t.strip() for t in os.getenv("JOB_SINGLETON_TYPES", "event_correlation").split(",") if t.strip()
+}
+
+LATENCY_SAMPLES = 1000
+
+Handler = Callable[[Dict[str, Any]], Awaitable[Optional[Any]]]
+
+CLAIM_SQL = text("""
+    UPDATE jobs
+    SET status = 'RUNNING', locked_at = now(), attempts = attempts + 1
+    WHERE id IN (
+        SELECT id FROM jobs
+        WHERE job_type = :job_type AND status = 'QUEUED' AND run_after <= now()
+        ORDER BY run_after
+        LIMIT :limit
+        FOR UPDATE SKIP LOCKED
+    )
+    RETURNING id, payload, attempts, max_attempts, created_at
+""").columns(Job.id, Job.payload, Job.attempts, Job.max_attempts, Job.created_at)
+
+REQUEUE_STALE_SQL = text("""
+    UPDATE jobs
+    SET status = 'QUEUED', locked_at = NULL
+    WHERE status = 'RUNNING' AND locked_at < now() - make_interval(secs => CAST(:timeout AS double precision))
+""")
+
+OWN_SQL = text("SELECT pg_try_advisory_lock(hashtext(:key))")
+
+DEPTH_SQL = text("""
+    SELECT job_type, status, count(*) FROM jobs
+    WHERE status IN ('QUEUED', 'RUNNING', 'DEAD')
+    GROUP BY job_type, status
+""")
+
+
+class QueueFullError(Exception):
+    """Raised by enqueue() when the in-memory intake is at capacity."""
+
+
+def _parse_concurrency(spec: str) -> Dict[str, int]:
+    sizes = {}
+    for part in filter(None, (p.strip() for p in spec.split(","))):
+        name, _, size = part.partition("=")
+        sizes[name.strip()] = int(size)
+    return sizes
+
+
+def _percentile(samples, pct: float) -> Optional[float]:
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+class _JobType:
+    def __init__(self, name: str, handler: Handler, concurrency: int, setup: Optional[Callable[[], Awaitable[None]]] = None,
+                 tick: Optional[Callable[[], Awaitable[None]]] = None, tick_interval: float = 60.0):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.setup = setup
+        self.tick = tick
+        self.tick_interval = tick_interval
+        self.singleton = name in JOB_SINGLETON_TYPES
+        self.owner = None  # connection holding the advisory lock, for singleton types
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.busy = 0
+        self.wakeup = asyncio.Event()
+        self.processed = 0
+        self.failed = 0
+        self.dead = 0
+        self.queue_latency = deque(maxlen=LATENCY_SAMPLES)
+        self.run_time = deque(maxlen=LATENCY_SAMPLES)
+
+
+class JobQueue:
+    """
+    Durable in-process job queue backed by the `jobs` table.
+
+    enqueue() only appends to a bounded in-memory intake; a flusher writes the
+    intake to Postgres in multi-row batches. enqueue_in() instead inserts the
+    job in the caller's transaction, for jobs that must exist exactly when
+    the caller's own writes do. Per-type dispatchers claim
+    batches with FOR UPDATE SKIP LOCKED (so several API workers can share the
+    table) and run them on a worker pool sized per job type. Failed jobs are
+    retried with backoff and moved to DEAD after max_attempts. Types in
+    JOB_SINGLETON_TYPES are dispatched only by the process holding their
+    advisory lock; its `setup` runs when it takes ownership, and its `tick`
+    runs periodically for as long as it dispatches the type.
+    """
+
+    def __init__(self, intake_size: int = JOB_INTAKE_SIZE, session_factory=AsyncSessionLocal, engine=async_engine):
+        self.session_factory = session_factory
+        self.engine = engine
+        self.intake: asyncio.Queue = asyncio.Queue(maxsize=intake_size)
+        self.types: Dict[str, _JobType] = {}
+        self.db_depth: Dict[str, Dict[str, int]] = {}
+        self._concurrency = _parse_concurrency(JOB_CONCURRENCY)
+        self._tasks: List[asyncio.Task] = []
+        self._running: set = set()
+
+    def handler(self, job_type: str, concurrency: Optional[int] = None, setup: Optional[Callable[[], Awaitable[None]]] = None,
+                tick: Optional[Callable[[], Awaitable[None]]] = None, tick_interval: float = 60.0):
+        """
+        Decorator registering the async handler for a job type. `setup` runs
+        once before this process starts dispatching the type; `tick` every
+        `tick_interval` seconds while it does, jobs or not.
+        """
+        def register(fn: Handler) -> Handler:
+            size = concurrency or self._concurrency.get(job_type, JOB_DEFAULT_CONCURRENCY)
+            self.types[job_type] = _JobType(job_type, fn, size, setup, tick, tick_interval)
+            return fn
+        return register
+
+    def runs(self, job_type: str) -> bool:
+        """Whether this process may execute `job_type` (not just enqueue it)."""
+        return job_type in self.types and job_type not in JOB_DISABLED_TYPES
+
+    def owns(self, job_type: str) -> bool:
+        """Whether this process is currently dispatching `job_type`."""
+        jt = self.types.get(job_type)
+        return jt is not None and jt.dispatcher is not None and not jt.dispatcher.done()
+
+    @property
+    def saturated(self) -> bool:
+        return self.intake.full()
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any]) -> uuid.UUID:
+        """
+        Queue a job without waiting for the database; raises QueueFullError.
+        Call it on the event loop: from a thread, a full intake could only
+        fail after the caller already had the job id.
+        """
+        if job_type not in self.types:
+            raise ValueError(f"No handler registered for job type {job_type!r}")
+        item = (uuid.uuid4(), job_type, payload, time.time())
+        try:
+            self.intake.put_nowait(item)
+        except asyncio.QueueFull:
+            raise QueueFullError(job_type)
+        return item[0]
+
+    async def enqueue_in(self, db: AsyncSession, job_type: str, payload: Dict[str, Any]) -> uuid.UUID:
+        """
+        Insert a job in `db`'s current transaction: it commits or rolls back
+        with the caller's writes. The dispatcher is woken on commit.
+        """
+        jt = self.types.get(job_type)
+        if jt is None:
+            raise ValueError(f"No handler registered for job type {job_type!r}")
+        job_id = uuid.uuid4()
+        await db.execute(
+            insert(Job).values(
+                id=job_id, job_type=job_type, payload=payload,
+                max_attempts=JOB_MAX_ATTEMPTS, created_at=datetime.utcnow(),
+            )
+        )
+        event.listen(db.sync_session, "after_commit", lambda session: jt.wakeup.set(), once=True)
+        return job_id
+
+    async def start(self):
+        self._tasks = [asyncio.create_task(self._flusher()), asyncio.create_task(self._maintenance())]
+        running = [jt for jt in self.types.values() if self.runs(jt.name)]
+        for jt in running:
+            if jt.singleton:
+                await self._try_own(jt)
+            else:
+                await self._start_dispatcher(jt)
+        logger.info("Job queue started: %s", ", ".join(f"{jt.name}={jt.concurrency}" for jt in running if self.owns(jt.name)))
+
+    async def stop(self, timeout: float = 10.0):
+        dispatchers = [jt.dispatcher for jt in self.types.values() if jt.dispatcher is not None]
+        for task in self._tasks + dispatchers:
+            task.cancel()
+        await asyncio.gather(*self._tasks, *dispatchers, return_exceptions=True)
+        self._tasks = []
+        # Persist whatever is still in the intake so it survives the restart
+        await self._flush(self._drain_intake())
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+        for jt in self.types.values():
+            await self._disown(jt)
+
+    async def _start_dispatcher(self, jt: _JobType):
+        if jt.setup is not None:
+            await jt.setup()
+        jt.dispatcher = asyncio.create_task(self._dispatcher(jt))
+
+    async def _try_own(self, jt: _JobType):
+        """Take over a singleton type if no other process holds its lock."""
+        conn = None
+        try:
+            conn = await self.engine.connect()
+            # Autocommit: the lock is session-level and the connection stays idle, not idle in transaction
+            await conn.execution_options(isolation_level="AUTOCOMMIT")
+            if not (await conn.execute(OWN_SQL, {"key": f"jobs:{jt.name}"})).scalar():
+                await conn.close()
+                return
+            jt.owner = conn
+            await self._start_dispatcher(jt)
+            logger.info("This process now runs %s jobs", jt.name)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Failed to take ownership of %s jobs", jt.name)
+            if jt.owner is None and conn is not None:
+                await conn.close()
+            await self._disown(jt)
+
+    async def _disown(self, jt: _JobType):
+        if jt.dispatcher is not None:
+            jt.dispatcher.cancel()
+            await asyncio.gather(jt.dispatcher, return_exceptions=True)
+            jt.dispatcher = None
+        if jt.owner is not None:
+            conn, jt.owner = jt.owner, None
+            try:
+                await conn.close()  # releases the advisory lock
+            except Exception:
+                logger.exception("Failed to release ownership of %s jobs", jt.name)
+
+    async def _check_ownership(self):
+        for jt in self.types.values():
+            if not (jt.singleton and self.runs(jt.name)):
+                continue
+            if jt.owner is None:
+                await self._try_own(jt)
+                continue
+            try:
+                await jt.owner.execute(text("SELECT 1"))
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Connection lost, so is the lock: another process may own the type now
+                logger.warning("Lost ownership of %s jobs", jt.name)
+                await self._disown(jt)
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depths, throughput counters and latency percentiles (seconds)."""
+        types = {}
+        for jt in self.types.values():
+            types[jt.name] = {
+                "concurrency": jt.concurrency,
+                "owned": self.owns(jt.name),
+                "in_flight": jt.busy,
+                "processed": jt.processed,
+                "failed": jt.failed,
+                "dead_lettered": jt.dead,
+                "db_depth": self.db_depth.get(jt.name, {}),
+                "queue_latency_p50": _percentile(jt.queue_latency, 0.50),
+                "queue_latency_p95": _percentile(jt.queue_latency, 0.95),
+                "run_time_p50": _percentile(jt.run_time, 0.50),
+                "run_time_p95": _percentile(jt.run_time, 0.95),
+            }
+        return {"intake_depth": self.intake.qsize(), "intake_capacity": self.intake.maxsize, "types": types}
+
+    def _drain_intake(self) -> List[tuple]:
+        items = []
+        while not self.intake.empty():
+            items.append(self.intake.get_nowait())
+        return items
+
+    def _requeue(self, items: List[tuple]):
+        for item in items:
+            if self.intake.full():
+                logger.error("Job intake full, dropping %s job %s", item[1], item[0])
+                continue
+            self.intake.put_nowait(item)
+
+    async def _flusher(self):
+        while True:
+            items = []
+            try:
+                items.append(await self.intake.get())
+                deadline = time.monotonic() + JOB_FLUSH_INTERVAL
+                while len(items) < JOB_BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        items.append(await asyncio.wait_for(self.intake.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                await self._flush(items)
+            except asyncio.CancelledError:
+                # stop() flushes the intake; put our batch back first
+                self._requeue(items)
+                raise
+            except Exception:
+                logger.exception("Failed to persist %d jobs; retrying", len(items))
+                self._requeue(items)
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+
+    async def _flush(self, items: List[tuple]):
+        if not items:
+            return
+        rows = [
+            {
+                "id": job_id,
+                "job_type": job_type,
+                "payload": payload,
+                "max_attempts": JOB_MAX_ATTEMPTS,
+                "created_at": datetime.utcfromtimestamp(enqueued_at),
+            }
+            for job_id, job_type, payload, enqueued_at in items
+        ]
+        async with self.session_factory() as db:
+            # Ids are generated at enqueue time, so a re-flushed batch is a no-op
+            await db.execute(pg_insert(Job).on_conflict_do_nothing(index_elements=[Job.id]), rows)
+            await db.commit()
+        for job_type in {row["job_type"] for row in rows}:
+            self.types[job_type].wakeup.set()
+
+    async def _dispatcher(self, jt: _JobType):
+        next_tick = time.monotonic() + jt.tick_interval
+        while True:
+            if jt.tick is not None and time.monotonic() >= next_tick:
+                next_tick = time.monotonic() + jt.tick_interval
+                try:
+                    await jt.tick()
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Periodic task for %s jobs failed", jt.name)
+            # Clear first so a wakeup arriving while we claim is not lost
+            jt.wakeup.clear()
+            limit = min(jt.concurrency - jt.busy, JOB_BATCH_SIZE)
+            claimed = []
+            if limit > 0:
+                try:
+                    claimed = await self._claim(jt.name, limit)
+                except asyncio.CancelledError:
+                    raise
+                except Exception:
+                    logger.exception("Failed to claim %s jobs", jt.name)
+            for row in claimed:
+                jt.busy += 1
+                task = asyncio.create_task(self._run(jt, row))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+            if claimed and len(claimed) == limit and jt.busy < jt.concurrency:
+                continue  # a full batch: more jobs are probably waiting
+            try:
+                await asyncio.wait_for(jt.wakeup.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _claim(self, job_type: str, limit: int):
+        async with self.session_factory() as db:
+            rows = (await db.execute(CLAIM_SQL, {"job_type": job_type, "limit": limit})).fetchall()
+            await db.commit()
+        return rows
+
+    async def _run(self, jt: _JobType, row):
+        started = time.time()
+        jt.queue_latency.append(started - row.created_at.replace(tzinfo=timezone.utc).timestamp())
+        try:
+            try:
+                result = await jt.handler(row.payload)
+            except Exception as e:
+                jt.failed += 1
+                logger.exception("Job %s (%s) failed on attempt %d", row.id, jt.name, row.attempts)
+                await self._fail(jt, row, f"{type(e).__name__}: {e}")
+            else:
+                jt.processed += 1
+                async with self.session_factory() as db:
+                    await db.execute(
+                        update(Job).where(Job.id == row.id)
+                        .values(status="DONE", result=result, finished_at=datetime.utcnow(), locked_at=None)
+                    )
+                    await db.commit()
+        except Exception:
+            # The row stays RUNNING and is requeued after the visibility timeout
+            logger.exception("Failed to record outcome of job %s", row.id)
+        finally:
+            jt.run_time.append(time.time() - started)
+            jt.busy -= 1
+            jt.wakeup.set()
+
+    async def _fail(self, jt: _JobType, row, error: str):
+        values = {"last_error": error[:2000], "locked_at": None}
+        if row.attempts >= row.max_attempts:
+            jt.dead += 1
+            values.update(status="DEAD", finished_at=datetime.utcnow())
+            logger.error("Job %s (%s) dead-lettered after %d attempts", row.id, jt.name, row.attempts)
+        else:
+            delay = JOB_RETRY_BACKOFF ** row.attempts
+            values.update(status="QUEUED", run_after=func.now() + timedelta(seconds=delay))
+        async with self.session_factory() as db:
+            await db.execute(update(Job).where(Job.id == row.id).values(**values))
+            await db.commit()
+
+    async def _maintenance(self):
+        """Requeue jobs abandoned by crashed workers, refresh depth gauges and singleton ownership."""
+        while True:
+            try:
+                await self._check_ownership()
+                async with self.session_factory() as db:
+                    result = await db.execute(REQUEUE_STALE_SQL, {"timeout": float(JOB_VISIBILITY_TIMEOUT)})
+                    if result.rowcount:
+                        logger.warning("Requeued %d stale running jobs", result.rowcount)
+                    depth: Dict[str, Dict[str, int]] = {}
+                    for job_type, status, count in (await db.execute(DEPTH_SQL)).fetchall():
+                        depth.setdefault(job_type, {})[status] = count
+                    await db.commit()
+                self.db_depth = depth
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Job queue maintenance failed")
+            await asyncio.sleep(max(JOB_POLL_INTERVAL * 10, 5.0))
+
+
+job_queue = JobQueue()
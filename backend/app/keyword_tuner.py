@@ -0,0 +1,106 @@
+# app/keyword_tuner.py
+
+import logging
+import os
+from typing import Dict
+
+from sqlalchemy.sql import text
+
+from app.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Feedback rows claimed per statement
+KEYWORD_TUNER_BATCH = int(os.getenv("KEYWORD_TUNER_BATCH", "1000"))
+# Pseudo-votes on each side; a keyword with no feedback scores 0.5
+KEYWORD_SCORE_PRIOR = float(os.getenv("KEYWORD_SCORE_PRIOR", "1"))
+# Keywords with at least this many votes and a score below the threshold stop being scraped
+KEYWORD_RETIRE_MIN_FEEDBACK = int(os.getenv("KEYWORD_RETIRE_MIN_FEEDBACK", "20"))
+KEYWORD_RETIRE_SCORE = float(os.getenv("KEYWORD_RETIRE_SCORE", "0.15"))
+KEYWORD_RETIRED_STATUS = os.getenv("KEYWORD_RETIRED_STATUS", "RETIRED")
+
+# One statement per batch: claim uncounted feedback (SKIP LOCKED, so
+# concurrent tuner jobs split the backlog instead of double counting), fold
+# the votes into keyword_feedback_stats, then rescore and possibly retire the
+# touched keywords. Upserts run in keyword order so concurrent batches lock
+# rows in the same order.
+TUNE_SQL = text("""
+    WITH claimed AS (
+        UPDATE analyst_feedback f
+        SET tuned_at = now()
+        WHERE f.id IN (
+            SELECT id FROM analyst_feedback
+            WHERE tuned_at IS NULL
+            ORDER BY created_at
+            LIMIT :batch
+            FOR UPDATE SKIP LOCKED
+        )
+        RETURNING f.social_post_id, upper(f.action) AS action
+    ),
+    votes AS (
+        SELECT p.found_by_keyword_id AS keyword_id,
+               count(*) FILTER (WHERE c.action = 'CONFIRMED') AS confirmed,
+               count(*) FILTER (WHERE c.action = 'DISMISSED') AS dismissed
+        FROM claimed c
+        JOIN social_posts p ON p.id = c.social_post_id
+        WHERE p.found_by_keyword_id IS NOT NULL AND c.action IN ('CONFIRMED', 'DISMISSED')
+        GROUP BY p.found_by_keyword_id
+    ),
+    totals AS (
+        INSERT INTO keyword_feedback_stats AS s (keyword_id, confirmed, dismissed, updated_at)
+        SELECT keyword_id, confirmed, dismissed, now() FROM votes ORDER BY keyword_id
+        ON CONFLICT (keyword_id) DO UPDATE
+        SET confirmed = s.confirmed + EXCLUDED.confirmed,
+            dismissed = s.dismissed + EXCLUDED.dismissed,
+            updated_at = now()
+        RETURNING keyword_id, confirmed, dismissed
+    ),
+    scores AS (
+        SELECT keyword_id,
+               confirmed + dismissed AS votes,
+               (confirmed + CAST(:prior AS double precision))
+                   / (confirmed + dismissed + 2 * CAST(:prior AS double precision)) AS score
+        FROM totals
+    ),
+    rescored AS (
+        UPDATE scraping_keywords k
+        SET effectiveness_score = s.score,
+            status = CASE
+                WHEN k.status = 'ACTIVE' AND s.votes >= :min_feedback AND s.score < CAST(:retire_score AS double precision)
+                THEN :retired_status ELSE k.status
+            END
+        FROM scores s
+        JOIN scraping_keywords old ON old.id = s.keyword_id
+        WHERE k.id = s.keyword_id
+        RETURNING old.status AS old_status, k.status AS new_status
+    )
+    SELECT
+        (SELECT count(*) FROM claimed) AS feedback,
+        (SELECT count(*) FROM rescored) AS keywords,
+        (SELECT count(*) FROM rescored WHERE old_status = 'ACTIVE' AND new_status <> 'ACTIVE') AS retired
+""")
+
+
+async def tune_keywords(batch: int = KEYWORD_TUNER_BATCH) -> Dict[str, int]:
+    """Fold all uncounted analyst feedback into keyword scores, one batch per transaction."""
+    summary = {"feedback": 0, "keywords": 0, "retired": 0, "batches": 0}
+    params = {
+        "batch": batch,
+        "prior": KEYWORD_SCORE_PRIOR,
+        "min_feedback": KEYWORD_RETIRE_MIN_FEEDBACK,
+        "retire_score": KEYWORD_RETIRE_SCORE,
+        "retired_status": KEYWORD_RETIRED_STATUS,
+    }
+    while True:
+        async with AsyncSessionLocal() as db:
+            row = (await db.execute(TUNE_SQL, params)).one()
+            await db.commit()
+        summary["batches"] += 1
+        summary["feedback"] += row.feedback
+        summary["keywords"] += row.keywords
+        summary["retired"] += row.retired
+        if row.feedback < batch:
+            break
+    if summary["retired"]:
+        logger.info("Retired low-yield scraping keywords", extra=summary)
+    return summary
@@ -0,0 +1,191 @@
+# app/live_feed.py
+
+import asyncio
+import json
+import logging
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Deque, Dict, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Channels fed by the triggers in migrations/0008_live_feed_notify.sql
+REPORT_FEED_CHANNEL = "report_feed"
+ALERT_FEED_CHANNEL = "alert_feed"
+
+LIVE_FEED_QUEUE_SIZE = int(os.getenv("LIVE_FEED_QUEUE_SIZE", "256"))
+# A subscriber that loses this many events without reading is disconnected
+LIVE_FEED_MAX_DROPPED = int(os.getenv("LIVE_FEED_MAX_DROPPED", "1000"))
+LIVE_FEED_MAX_SUBSCRIBERS = int(os.getenv("LIVE_FEED_MAX_SUBSCRIBERS", "5000"))
+LIVE_FEED_HEARTBEAT = float(os.getenv("LIVE_FEED_HEARTBEAT", "15"))
+
+SEVERITY_RANK = {"INFO": 0, "WARNING": 1, "CRITICAL": 2}
+
+BBox = Tuple[float, float, float, float]
+
+
+@dataclass
+class FeedEvent:
+    seq: int
+    kind: str  # 'report' or 'alert'
+    data: Dict[str, Any]
+    bbox: BBox  # point reports have a degenerate bbox
+    encoded: bytes  # SSE frame, built once and shared by every subscriber
+
+
+class Subscriber:
+    """One client's filter and bounded outbox."""
+
+    def __init__(self, bbox: Optional[BBox], min_severity: Optional[str], reports: bool, alerts: bool, maxlen: int):
+        self.bbox = bbox
+        self.min_rank = SEVERITY_RANK.get(min_severity, 0) if min_severity else 0
+        self.reports = reports
+        self.alerts = alerts
+        self.maxlen = maxlen
+        self.queue: Deque[FeedEvent] = deque()
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.dropped_since_read = 0
+        self.closed = False
+
+    def wants(self, event: FeedEvent) -> bool:
+        if event.kind == "report":
+            if not self.reports:
+                return False
+        elif not self.alerts or SEVERITY_RANK.get(event.data.get("severity"), 0) < self.min_rank:
+            return False
+        if self.bbox is None:
+            return True
+        min_lon, min_lat, max_lon, max_lat = self.bbox
+        e_min_lon, e_min_lat, e_max_lon, e_max_lat = event.bbox
+        return e_min_lon <= max_lon and e_max_lon >= min_lon and e_min_lat <= max_lat and e_max_lat >= min_lat
+
+    def offer(self, event: FeedEvent):
+        """Queue an event; when full, conflate by dropping the oldest report."""
+        if len(self.queue) >= self.maxlen:
+            victim = next((e for e in self.queue if e.kind == "report"), None)
+            if victim is not None:
+                self.queue.remove(victim)
+            elif event.kind == "report":
+                # Outbox is all alerts; the new report is the one to go
+                self._drop()
+                return
+            else:
+                self.queue.popleft()
+            self._drop()
+        self.queue.append(event)
+        self.ready.set()
+
+    async def next_batch(self, timeout: float):
+        """Wait for events; returns [] on timeout (time for a heartbeat)."""
+        if not self.queue:
+            self.ready.clear()
+            try:
+                await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return []
+        batch = list(self.queue)
+        self.queue.clear()
+        self.dropped_since_read = 0
+        return batch
+
+    def _drop(self):
+        self.dropped += 1
+        self.dropped_since_read += 1
+
+
+class LiveFeed:
+    """
+    Fans report/alert notifications out to SSE subscribers.
+
+    Events arrive from the process-wide LISTEN connection (app/notify.py), are
+    encoded once, and are appended to each matching subscriber's bounded
+    outbox. A slow client loses its oldest report events first; one that
+    loses LIVE_FEED_MAX_DROPPED events between two reads is disconnected.
+    """
+
+    def __init__(self, queue_size: int = LIVE_FEED_QUEUE_SIZE, max_subscribers: int = LIVE_FEED_MAX_SUBSCRIBERS):
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self.subscribers: Set[Subscriber] = set()
+        self._seq = 0
+        self.published = 0
+        self.delivered = 0
+        self.disconnected_slow = 0
+
+    @property
+    def full(self) -> bool:
+        return len(self.subscribers) >= self.max_subscribers
+
+    def subscribe(self, bbox=None, min_severity=None, reports=True, alerts=True) -> Subscriber:
+        sub = Subscriber(bbox, min_severity, reports, alerts, self.queue_size)
+        self.subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub: Subscriber):
+        sub.closed = True
+        self.subscribers.discard(sub)
+
+    def publish(self, kind: str, data: Dict[str, Any], bbox: BBox):
+        self._seq += 1
+        self.published += 1
+        frame = f"id: {self._seq}\nevent: {kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+        event = FeedEvent(self._seq, kind, data, bbox, frame)
+        for sub in list(self.subscribers):
+            if not sub.wants(event):
+                continue
+            sub.offer(event)
+            self.delivered += 1
+            if sub.dropped_since_read >= LIVE_FEED_MAX_DROPPED:
+                self.disconnected_slow += 1
+                self.unsubscribe(sub)
+                sub.ready.set()
+
+    def on_report(self, payload: str):
+        """PgListener callback for REPORT_FEED_CHANNEL."""
+        try:
+            data = json.loads(payload)
+            lon, lat = float(data["lon"]), float(data["lat"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Bad report notification", extra={"payload": payload})
+            return
+        self.publish("report", data, (lon, lat, lon, lat))
+
+    def on_alert(self, payload: str):
+        """PgListener callback for ALERT_FEED_CHANNEL."""
+        try:
+            data = json.loads(payload)
+            bbox = tuple(float(v) for v in data["bbox"])
+        except (ValueError, KeyError, TypeError):
+            logger.warning("Bad alert notification", extra={"payload": payload})
+            return
+        self.publish("alert", data, bbox)
+
+    def stats(self) -> Dict:
+        return {
+            "subscribers": len(self.subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "queued": sum(len(s.queue) for s in self.subscribers),
+            "disconnected_slow": self.disconnected_slow,
+        }
+
+
+async def sse_stream(feed: LiveFeed, sub: Subscriber, heartbeat: float = LIVE_FEED_HEARTBEAT):
+    """Async iterator of SSE frames for one subscriber; unsubscribes on exit."""
+    try:
+        yield b"retry: 3000\n\n"
+        while not sub.closed:
+            batch = await sub.next_batch(heartbeat)
+            if batch:
+                yield b"".join(e.encoded for e in batch)
+            elif not sub.closed:
+                yield b": keepalive\n\n"
+        # Closed by the feed (too slow): tell the client why before ending
+        yield b"event: dropped\ndata: {\"reason\":\"slow consumer\"}\n\n"
+    finally:
+        feed.unsubscribe(sub)
+
+
+live_feed = LiveFeed()
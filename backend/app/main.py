@@ -1,20 +1,125 @@
 # app/main.py
 
-from typing import Dict
-from fastapi import Depends, FastAPI
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from fastapi import Depends, FastAPI, HTTPException, Query, Request, status
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from app.admission import AdmissionMiddleware, admission
+from app.alert_index import ALERT_CHANNEL, alert_index
+from app.database import async_engine, engine
 from app.dependencies.auth import get_current_user
-from app.routers import user, reports, admin
+from app.dispatch import dispatcher
+from app.jobs import QueueFullError, job_queue
+from app.live_feed import ALERT_FEED_CHANNEL, REPORT_FEED_CHANNEL, live_feed, sse_stream
+from app.media import media_store
+from app.metrics import METRICS_TOKEN, MetricsMiddleware, instrument_engine, registry
+from app.notify import listener
+from app.profile_buffer import profile_buffer
+from app.routers import user, reports, admin, events, tiles, alerts, media
+from app.routers.reports import parse_bbox
+from app.schemas import AlertSeverityEnum
+from app import tasks  # noqa: F401  registers the job handlers
+from app.tiles import tile_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Start background subsystems
+    await dispatcher.start()
+    await profile_buffer.start()
+    await media_store.start()
+    # Correlation warms up in whichever process takes ownership of its jobs
+    await job_queue.start()
+    # The alert index (re)loads itself on every LISTEN (re)connect
+    listener.subscribe(ALERT_CHANNEL, alert_index.on_notify, on_connect=alert_index.load)
+    # Live feed; report inserts from any worker also invalidate local tiles
+    listener.subscribe(REPORT_FEED_CHANNEL, live_feed.on_report)
+    listener.subscribe(REPORT_FEED_CHANNEL, tile_cache.on_report_notify)
+    listener.subscribe(ALERT_FEED_CHANNEL, live_feed.on_alert)
+    await listener.start()
+    yield
+    # Shut down in reverse order
+    await listener.stop()
+    await job_queue.stop()
+    await dispatcher.stop()
+    await profile_buffer.stop()
+    await media_store.stop()
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="Samudra Prahari Backend",
     description="API for coastal hazard reporting and alerting",
     version="1.0",
+    lifespan=lifespan,
 )
 
 # Include routers
 app.include_router(user.router)
 app.include_router(reports.router)
 app.include_router(admin.router)
+app.include_router(events.router)
+app.include_router(tiles.router)
+app.include_router(alerts.router)
+app.include_router(media.router)
+
+# Per-user rate limits and priority load shedding; see app/admission.py
+app.add_middleware(AdmissionMiddleware)
+# Per-route latency and per-request statement counts; see app/metrics.py.
+# Added last so it wraps admission and also counts shed requests.
+app.add_middleware(MetricsMiddleware)
+instrument_engine(async_engine.sync_engine)
+instrument_engine(engine)
+registry.register_collector("push_dispatcher", dispatcher.stats)
+registry.register_collector("profile_buffer", profile_buffer.stats)
+registry.register_collector("tile_cache", tile_cache.stats)
+registry.register_collector("alert_index", alert_index.stats)
+registry.register_collector("live_feed", live_feed.stats)
+registry.register_collector("pg_listener", listener.stats)
+registry.register_collector("media", media_store.stats)
+registry.register_collector("admission", admission.stats)
+
+@app.exception_handler(QueueFullError)
+async def queue_full_handler(request: Request, exc: QueueFullError):
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Server is busy, please retry shortly"},
+        headers={"Retry-After": "1"},
+    )
+
+@app.get("/api/live")
+async def live(
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    severity: Optional[AlertSeverityEnum] = Query(None, description="minimum alert severity"),
+    reports: bool = True,
+    alerts: bool = True,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """Server-Sent Events stream of new citizen reports and alerts."""
+    if live_feed.full:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many live subscribers, please retry shortly",
+            headers={"Retry-After": "5"},
+        )
+    sub = live_feed.subscribe(
+        bbox=parse_bbox(bbox) if bbox else None,
+        min_severity=severity.value if severity else None,
+        reports=reports,
+        alerts=alerts,
+    )
+    return StreamingResponse(
+        sse_stream(live_feed, sub),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/metrics", include_in_schema=False)
+def metrics(request: Request):
+    """Prometheus text exposition for this worker."""
+    if METRICS_TOKEN and request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid metrics token")
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/test-auth")
 def test_auth(current_user: Dict[str, str] = Depends(get_current_user)):
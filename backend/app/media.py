@@ -0,0 +1,400 @@
+# app/media.py
+
+"""
+Resumable, content-addressed media uploads.
+
+A client opens an upload session with the file's size (and optionally its
+SHA-256, which short-circuits re-uploads of a file we already have), then
+sends the bytes in chunks, each tagged with the offset it starts at. Chunks
+are streamed straight to a staging file, so memory use is one network read
+regardless of file size; after a dropped connection the client asks for the
+current offset and carries on from there.
+
+When the last byte arrives the file is hashed and moved to
+objects/<aa>/<bb>/<sha256>.<ext>; if that object already exists the upload
+is simply discarded. Image variants (thumbnail, downscaled copy) are then
+rendered by a process pool, off the event loop and off the GIL. A record of
+the completed upload is kept for MEDIA_UPLOAD_TTL_HOURS, so a client whose
+final response was lost can repeat the last chunk and get it again.
+
+LocalMediaStore keeps everything on a local (or shared network) filesystem;
+session metadata lives next to the staging file, so any worker that sees the
+same MEDIA_ROOT can accept the next chunk.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MEDIA_ROOT = os.getenv("MEDIA_ROOT", "./media")
+MEDIA_MAX_BYTES = int(os.getenv("MEDIA_MAX_BYTES", str(25 * 1024 * 1024)))
+# Largest chunk accepted by one PATCH; clients on weak links send less
+MEDIA_MAX_CHUNK_BYTES = int(os.getenv("MEDIA_MAX_CHUNK_BYTES", str(4 * 1024 * 1024)))
+# Abandoned partial uploads, and records of completed ones, are deleted
+# after this long without a chunk
+MEDIA_UPLOAD_TTL_HOURS = float(os.getenv("MEDIA_UPLOAD_TTL_HOURS", "24"))
+MEDIA_THUMB_WORKERS = int(os.getenv("MEDIA_THUMB_WORKERS", "2"))
+
+CONTENT_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/webp": "webp",
+    "video/mp4": "mp4",
+}
+# name -> longest edge in pixels; rendered for images only, always JPEG
+VARIANTS = {"thumb": 320, "1280": 1280}
+
+UPLOAD_ID_RE = re.compile(r"^[A-Za-z0-9_-]{22}$")
+OBJECT_NAME_RE = re.compile(r"^([0-9a-f]{64})(?:_([a-z0-9]+))?\.([a-z0-9]+)$")
+SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+HASH_BLOCK = 1024 * 1024
+
+
+class UploadError(Exception):
+    """A chunk or session request the client has to correct."""
+
+
+class OffsetMismatch(UploadError):
+    def __init__(self, offset: int):
+        super().__init__(f"Upload is at offset {offset}")
+        self.offset = offset
+
+
+@dataclass
+class UploadSession:
+    upload_id: str
+    user_id: str
+    size: int
+    content_type: str
+    offset: int = 0
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+
+@dataclass
+class StoredObject:
+    sha256: str
+    name: str  # file name under objects/, e.g. <sha256>.jpg
+    size: int
+    content_type: str
+    deduplicated: bool
+    variants: List[str]  # object names of the image variants (rendered async)
+
+
+def render_variants(source: str, targets: List[Tuple[str, int]]) -> List[str]:
+    """
+    Process-pool worker: write a JPEG per (path, max_edge) from `source`.
+
+    JPEG sources are decoded at reduced scale (Image.draft), so a 12 MP photo
+    is never fully decoded just to make a 320 px thumbnail.
+    """
+    from PIL import Image, ImageOps
+
+    written = []
+    for path, edge in sorted(targets, key=lambda t: t[1], reverse=True):
+        if os.path.exists(path):
+            continue
+        with Image.open(source) as im:
+            im.draft("RGB", (edge, edge))
+            im = ImageOps.exif_transpose(im)
+            im.thumbnail((edge, edge), Image.LANCZOS)
+            if im.mode not in ("RGB", "L"):
+                im = im.convert("RGB")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            im.save(tmp, "JPEG", quality=82, optimize=True, progressive=True)
+            os.replace(tmp, path)
+        written.append(path)
+    return written
+
+
+class LocalMediaStore:
+    def __init__(self, root: str = MEDIA_ROOT, max_bytes: int = MEDIA_MAX_BYTES, workers: int = MEDIA_THUMB_WORKERS):
+        self.root = Path(root)
+        self.staging = self.root / "uploads"
+        self.objects = self.root / "objects"
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._rendering: set = set()  # strong refs to in-flight variant renders
+        self._last_purge = 0.0
+        self.uploads_completed = 0
+        self.deduplicated = 0
+        self.bytes_received = 0
+        self.variants_rendered = 0
+        self.variant_failures = 0
+
+    # ------------------------------------------------------------ lifecycle
+
+    async def start(self):
+        await asyncio.to_thread(self._makedirs)
+
+    async def stop(self):
+        if self._rendering:
+            await asyncio.wait(self._rendering, timeout=30)
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # ------------------------------------------------------------ sessions
+
+    def existing(self, sha256: str, content_type: str) -> Optional[StoredObject]:
+        """The stored object for a client-supplied hash, if we already have it."""
+        sha256 = sha256.lower()
+        if not SHA256_RE.match(sha256) or content_type not in CONTENT_TYPES:
+            return None
+        name = f"{sha256}.{CONTENT_TYPES[content_type]}"
+        path = self.object_path(name)
+        if path is None or not path.exists():
+            return None
+        self.deduplicated += 1
+        return StoredObject(sha256, name, path.stat().st_size, content_type, True, self._variant_names(sha256, content_type))
+
+    async def create(self, user_id: str, size: int, content_type: str) -> UploadSession:
+        if content_type not in CONTENT_TYPES:
+            raise UploadError(f"Unsupported content type {content_type}")
+        if not 0 < size <= self.max_bytes:
+            raise UploadError(f"Size must be between 1 and {self.max_bytes} bytes")
+        now = time.time()
+        session = UploadSession(secrets.token_urlsafe(16), user_id, size, content_type, 0, now, now)
+        await asyncio.to_thread(self._create_files, session)
+        if now - self._last_purge > 3600:
+            self._last_purge = now
+            asyncio.get_running_loop().run_in_executor(None, self._purge_stale)
+        return session
+
+    async def get(self, upload_id: str, user_id: str) -> Optional[UploadSession]:
+        if not UPLOAD_ID_RE.match(upload_id):
+            return None
+        session = await asyncio.to_thread(self._read_session, upload_id)
+        if session is None or session.user_id != user_id:
+            return None
+        return session
+
+    async def completed(self, upload_id: str, user_id: str) -> Optional[Tuple[UploadSession, StoredObject]]:
+        """The session and stored object of an upload that completed within MEDIA_UPLOAD_TTL_HOURS."""
+        if not UPLOAD_ID_RE.match(upload_id):
+            return None
+        completed = await asyncio.to_thread(self._read_completed, upload_id)
+        if completed is None or completed[0].user_id != user_id:
+            return None
+        return completed
+
+    async def append(
+        self, upload_id: str, user_id: str, offset: int, chunks: AsyncIterator[bytes],
+    ) -> Tuple[UploadSession, Optional[StoredObject]]:
+        """
+        Stream one chunk into the staging file at `offset`.
+
+        Returns the updated session, and the stored object once the upload is
+        complete. Raises OffsetMismatch if `offset` is not where the upload
+        currently stands (e.g. a retried chunk that already landed). Any chunk
+        sent to an upload that has already completed gets the stored object
+        again, as the final chunk did.
+        """
+        lock = self._locks.setdefault(upload_id, asyncio.Lock())
+        async with lock:
+            session = await self.get(upload_id, user_id)
+            if session is None:
+                self._locks.pop(upload_id, None)
+                completed = await self.completed(upload_id, user_id)
+                if completed is None:
+                    raise KeyError(upload_id)
+                return completed
+            if offset != session.offset:
+                raise OffsetMismatch(session.offset)
+            written = await self._write_chunk(session, chunks)
+            session.offset += written
+            session.updated_at = time.time()
+            self.bytes_received += written
+            if session.offset < session.size:
+                await asyncio.to_thread(self._write_session, session)
+                return session, None
+            stored = await self._finish(session)
+        self._locks.pop(upload_id, None)
+        return session, stored
+
+    # ------------------------------------------------------------ objects
+
+    def object_path(self, name: str) -> Optional[Path]:
+        """Filesystem path for an object name, or None if the name is not one of ours."""
+        match = OBJECT_NAME_RE.match(name)
+        if match is None:
+            return None
+        digest = match.group(1)
+        return self.objects / digest[:2] / digest[2:4] / name
+
+    def stats(self) -> Dict:
+        return {
+            "uploads_completed": self.uploads_completed,
+            "deduplicated": self.deduplicated,
+            "bytes_received": self.bytes_received,
+            "variants_rendered": self.variants_rendered,
+            "variant_failures": self.variant_failures,
+            "variants_in_flight": len(self._rendering),
+        }
+
+    # ------------------------------------------------------------ internals
+
+    def _makedirs(self):
+        self.staging.mkdir(parents=True, exist_ok=True)
+        self.objects.mkdir(parents=True, exist_ok=True)
+
+    def _part_path(self, upload_id: str) -> Path:
+        return self.staging / f"{upload_id}.part"
+
+    def _meta_path(self, upload_id: str) -> Path:
+        return self.staging / f"{upload_id}.json"
+
+    def _done_path(self, upload_id: str) -> Path:
+        return self.staging / f"{upload_id}.done.json"
+
+    def _create_files(self, session: UploadSession):
+        self._makedirs()
+        self._part_path(session.upload_id).touch()
+        self._write_session(session)
+
+    def _write_session(self, session: UploadSession):
+        meta = self._meta_path(session.upload_id)
+        tmp = meta.with_suffix(".json.tmp")
+        tmp.write_text(json.dumps(asdict(session)))
+        os.replace(tmp, meta)
+
+    def _read_session(self, upload_id: str) -> Optional[UploadSession]:
+        try:
+            session = UploadSession(**json.loads(self._meta_path(upload_id).read_text()))
+        except FileNotFoundError:
+            return None
+        # The data file is the source of truth for how much arrived (a worker
+        # may have died after writing a chunk but before updating metadata).
+        try:
+            session.offset = min(self._part_path(upload_id).stat().st_size, session.size)
+        except FileNotFoundError:
+            return None
+        return session
+
+    def _read_completed(self, upload_id: str) -> Optional[Tuple[UploadSession, StoredObject]]:
+        try:
+            record = json.loads(self._done_path(upload_id).read_text())
+        except FileNotFoundError:
+            return None
+        session = UploadSession(**record["session"])
+        sha256 = record["sha256"]
+        variants = self._variant_names(sha256, session.content_type)
+        return session, StoredObject(sha256, record["name"], session.size, session.content_type, record["deduplicated"], variants)
+
+    async def _write_chunk(self, session: UploadSession, chunks: AsyncIterator[bytes]) -> int:
+        limit = min(MEDIA_MAX_CHUNK_BYTES, session.size - session.offset)
+        f = await asyncio.to_thread(open, self._part_path(session.upload_id), "r+b")
+        written = 0
+        try:
+            await asyncio.to_thread(f.seek, session.offset)
+            async for data in chunks:
+                if not data:
+                    continue
+                if written + len(data) > limit:
+                    raise UploadError(f"Chunk would exceed the declared size or {MEDIA_MAX_CHUNK_BYTES} bytes")
+                await asyncio.to_thread(f.write, data)
+                written += len(data)
+            await asyncio.to_thread(f.flush)
+        except BaseException:
+            # Keep whatever prefix made it to disk; truncate anything past it
+            # so the next offset the client sees is consistent.
+            await asyncio.to_thread(f.truncate, session.offset + written)
+            raise
+        finally:
+            await asyncio.to_thread(f.close)
+        return written
+
+    async def _finish(self, session: UploadSession) -> StoredObject:
+        sha256, name, deduplicated = await asyncio.to_thread(self._commit, session)
+        self.uploads_completed += 1
+        if deduplicated:
+            self.deduplicated += 1
+        variants = self._variant_names(sha256, session.content_type)
+        if variants:
+            targets = [(self.object_path(v), edge) for v, edge in zip(variants, VARIANTS.values())]
+            self._render(self.object_path(name), targets)
+        return StoredObject(sha256, name, session.size, session.content_type, deduplicated, variants)
+
+    def _commit(self, session: UploadSession) -> Tuple[str, str, bool]:
+        part = self._part_path(session.upload_id)
+        digest = hashlib.sha256()
+        with open(part, "rb") as f:
+            while block := f.read(HASH_BLOCK):
+                digest.update(block)
+        sha256 = digest.hexdigest()
+        name = f"{sha256}.{CONTENT_TYPES[session.content_type]}"
+        target = self.object_path(name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        deduplicated = target.exists()
+        if deduplicated:
+            part.unlink()
+        else:
+            os.replace(part, target)
+        # Written before the session goes away, so every worker can answer a replay
+        done = self._done_path(session.upload_id)
+        tmp = done.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"session": asdict(session), "sha256": sha256, "name": name, "deduplicated": deduplicated}))
+        os.replace(tmp, done)
+        self._meta_path(session.upload_id).unlink(missing_ok=True)
+        return sha256, name, deduplicated
+
+    def _variant_names(self, sha256: str, content_type: str) -> List[str]:
+        if not content_type.startswith("image/"):
+            return []
+        return [f"{sha256}_{variant}.jpg" for variant in VARIANTS]
+
+    def _render(self, source: Path, targets: List[Tuple[Path, int]]):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self._pool, render_variants, str(source), [(str(p), e) for p, e in targets])
+        self._rendering.add(future)
+        future.add_done_callback(self._rendered)
+
+    def _rendered(self, future: asyncio.Future):
+        self._rendering.discard(future)
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            self.variant_failures += 1
+            logger.warning("Media variant rendering failed", extra={"error": repr(error)})
+        else:
+            self.variants_rendered += len(future.result())
+
+    def _purge_stale(self):
+        cutoff = time.time() - MEDIA_UPLOAD_TTL_HOURS * 3600
+        removed = 0
+        for path in self.staging.glob("*.part"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    self._meta_path(path.stem).unlink(missing_ok=True)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        for path in self.staging.glob("*.done.json"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        if removed:
+            logger.info("Purged stale uploads", extra={"removed": removed})
+
+
+media_store = LocalMediaStore()
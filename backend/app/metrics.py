@@ -0,0 +1,275 @@
+# app/metrics.py
+
+import contextvars
+import logging
+import os
+import re
+import threading
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("app.slow_query")
+
+# Statements slower than this are logged (0 disables the log)
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+SLOW_QUERY_MAX_CHARS = 1000
+# When set, /metrics requires "Authorization: Bearer <METRICS_TOKEN>"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20, 50, 100)
+
+LabelValues = Tuple[str, ...]
+T = TypeVar("T")
+
+
+@dataclass
+class RequestStats:
+    """DB work done on behalf of one request."""
+    scope: Optional[Dict[str, Any]] = None
+    statements: int = 0
+    db_seconds: float = 0.0
+    finished: bool = False  # response done; tasks that copied the context stop counting
+
+    @property
+    def route(self) -> str:
+        # The router fills scope["route"] before the endpoint runs, so work is
+        # attributed to the route template rather than the raw path.
+        route = self.scope.get("route") if self.scope else None
+        return getattr(route, "path", "unmatched")
+
+
+_current: contextvars.ContextVar[Optional[RequestStats]] = contextvars.ContextVar("request_stats", default=None)
+
+
+def current_stats() -> Optional[RequestStats]:
+    stats = _current.get()
+    return None if stats is None or stats.finished else stats
+
+
+async def detached(coro: Awaitable[T]) -> T:
+    """
+    Run `coro` outside the current request's stats. Wrap background work
+    started from a request, e.g. asyncio.create_task(detached(...)):
+    tasks copy the context, so its DB work would otherwise count towards
+    (and be reported in the headers of) that request.
+    """
+    _current.set(None)  # only affects the task's own copy of the context
+    return await coro
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, labels)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(buckets)
+        # per label set: [count per bucket (+Inf last)], sum, count
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()):
+        entry = self._values.get(labels)
+        if entry is None:
+            entry = self._values[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+        counts, totals = entry
+        counts[bisect_left(self.buckets, value)] += 1
+        totals[0] += value
+        totals[1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for labels, (counts, (total, count)) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                le_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, labels, le_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, labels)} {total:g}")
+            lines.append(f"{self.name}_count{_labels(self.labels, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in the Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = Counter("http_requests_total", "HTTP requests by route and status.", ("method", "route", "status"))
+        self.latency = Histogram(
+            "http_request_duration_seconds", "HTTP request latency by route (SSE streams excluded).",
+            ("method", "route"),
+        )
+        self.request_statements = Histogram(
+            "http_request_db_statements", "SQL statements issued per request.",
+            ("method", "route"), buckets=STATEMENT_BUCKETS,
+        )
+        self.request_db_time = Histogram(
+            "http_request_db_seconds", "Database time per request.", ("method", "route"),
+        )
+        self.statements = Counter("db_statements_total", "SQL statements executed, by originating route.", ("route",))
+        self.statement_time = Histogram(
+            "db_statement_duration_seconds", "SQL statement latency, by originating route.", ("route",),
+        )
+        self.slow_queries = Counter("db_slow_queries_total", "Statements slower than DB_SLOW_QUERY_MS.", ("route",))
+        self._collectors: List[Tuple[str, Callable[[], Dict]]] = []
+
+    def register_collector(self, prefix: str, stats: Callable[[], Dict]):
+        """Expose the numeric values of a component's stats() dict as gauges."""
+        self._collectors.append((prefix, stats))
+
+    def observe_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats, streaming: bool):
+        key = (method, route)
+        with self._lock:
+            self.requests.inc((method, route, str(status)))
+            if not streaming:
+                self.latency.observe(seconds, key)
+            self.request_statements.observe(stats.statements, key)
+            self.request_db_time.observe(stats.db_seconds, key)
+
+    def observe_statement(self, route: str, seconds: float, slow: bool):
+        with self._lock:
+            self.statements.inc((route,))
+            self.statement_time.observe(seconds, (route,))
+            if slow:
+                self.slow_queries.inc((route,))
+
+    def render(self) -> str:
+        lines: List[str] = []
+        with self._lock:
+            for metric in (
+                self.requests, self.latency, self.request_statements, self.request_db_time,
+                self.statements, self.statement_time, self.slow_queries,
+            ):
+                lines.extend(metric.render())
+        for prefix, stats in self._collectors:
+            try:
+                values = stats()
+            except Exception:
+                logger.exception("Metrics collector failed", extra={"collector": prefix})
+                continue
+            for key, value in values.items():
+                if isinstance(value, bool):
+                    value = int(value)
+                if not isinstance(value, (int, float)):
+                    continue
+                name = re.sub(r"[^a-zA-Z0-9_]", "_", f"{prefix}_{key}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def instrument_engine(engine, slow_query_ms: float = DB_SLOW_QUERY_MS):
+    """Count statements and DB time per request on a (sync) Engine.
+
+    For an AsyncEngine pass async_engine.sync_engine; events fire inside the
+    greenlet that carries the request's context, so the contextvar is visible.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_metrics_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["_metrics_start"].pop()
+        stats = current_stats()
+        route = stats.route if stats else "background"
+        if stats is not None:
+            stats.statements += 1
+            stats.db_seconds += elapsed
+        slow = slow_query_ms > 0 and elapsed * 1000 >= slow_query_ms
+        registry.observe_statement(route, elapsed, slow)
+        if slow:
+            slow_query_logger.warning(
+                "Slow query",
+                extra={
+                    "duration_ms": round(elapsed * 1000, 1),
+                    "route": route,
+                    "statement": " ".join(statement.split())[:SLOW_QUERY_MAX_CHARS],
+                },
+            )
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        # Keep the start-time stack balanced when a statement fails
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("_metrics_start"):
+            conn.info["_metrics_start"].pop()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: per-route latency/status, plus the statement count and
+    DB time accumulated by instrument_engine() while the request ran. Adds
+    X-DB-Statements and Server-Timing headers to every response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(scope=scope)
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        streaming = False
+
+        async def send_wrapper(message):
+            nonlocal status_code, streaming
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                streaming = headers.get("content-type", "").startswith("text/event-stream")
+                headers.append("X-DB-Statements", str(stats.statements))
+                headers.append(
+                    "Server-Timing",
+                    f"db;dur={stats.db_seconds * 1000:.1f}, app;dur={(time.perf_counter() - start) * 1000:.1f}",
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            stats.finished = True
+            _current.reset(token)
+            registry.observe_request(
+                scope["method"], stats.route, status_code, time.perf_counter() - start, stats, streaming,
+            )
@@ -1,6 +1,6 @@
 # app/models.py
 
-from sqlalchemy import Column, Enum, ForeignKey, String, DateTime, func, JSON
+from sqlalchemy import Column, Enum, Float, ForeignKey, Index, Integer, String, DateTime, func, JSON
 from sqlalchemy.dialects.postgresql import UUID, ARRAY
 from sqlalchemy.ext.declarative import declarative_base
 from geoalchemy2 import Geometry
@@ -47,6 +47,35 @@ class CitizenReport(Base):
     media_urls = Column(ARRAY(String), default=[])
     created_at = Column(DateTime, server_default=func.now())
     user_role = Column(Enum(UserRoleEnum, name="user_role_enum"), nullable=False)
+    event_id = Column(UUID(as_uuid=True), ForeignKey("hazard_events.id"), index=True)
+    idempotency_key = Column(String)  # client-supplied, unique per user (batch sync)
+
+    __table_args__ = (
+        Index(
+            "uq_citizen_reports_user_idempotency_key", "user_id", "idempotency_key",
+            unique=True, postgresql_where=idempotency_key.isnot(None),
+        ),
+        # Keyset pagination for GET /api/reports (see migrations/0006)
+        Index("ix_citizen_reports_created_id", created_at.desc(), id.desc()),
+        Index("ix_citizen_reports_hazard_created_id", hazard_type, created_at.desc(), id.desc()),
+        Index("ix_citizen_reports_role_created_id", user_role, created_at.desc(), id.desc()),
+    )
+
+# HazardEvent model (cluster of correlated citizen reports, see app/correlation.py)
+class HazardEvent(Base):
+    __tablename__ = "hazard_events"
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4())
+    hazard_type = Column(Enum(HazardTypeEnum, name="hazard_type_enum"), nullable=False)
+    status = Column(String, nullable=False, default="ACTIVE")  # ACTIVE, MERGED, EXPIRED
+    centroid = Column(Geometry(geometry_type='POINT', srid=4326), nullable=False)
+    report_count = Column(Integer, nullable=False, default=0)
+    total_weight = Column(Float, nullable=False, default=0)
+    confidence = Column(Float, nullable=False, default=0)
+    first_seen = Column(DateTime, nullable=False)
+    last_seen = Column(DateTime, nullable=False)
+    version = Column(Integer, nullable=False, default=0)
+    merged_into = Column(UUID(as_uuid=True), ForeignKey("hazard_events.id"))
+    updated_at = Column(DateTime, server_default=func.now())
 
 # Alert model
 class Alert(Base):
@@ -58,6 +87,7 @@ class Alert(Base):
     affected_area = Column(Geometry(geometry_type='POLYGON', srid=4326), nullable=False)
     created_at = Column(DateTime, server_default=func.now())
     created_by = Column(UUID(as_uuid=True), ForeignKey("profiles.id"), nullable=False)
+    expires_at = Column(DateTime, index=True)  # NULL never expires
 
 # AnalystFeedback model
 class AnalystFeedback(Base):
@@ -67,4 +97,63 @@ class AnalystFeedback(Base):
     action = Column(String, nullable=False)
     correction_data = Column(JSON)
     created_by = Column(UUID(as_uuid=True), ForeignKey("profiles.id"), nullable=False)
-    created_at = Column(DateTime, server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime, server_default=func.now())
+    tuned_at = Column(DateTime)  # set once counted by the keyword tuner
+
+# KeywordFeedbackStats model (running analyst votes per scraping keyword,
+# see app/keyword_tuner.py; scraping_keywords itself is owned by the scraper)
+class KeywordFeedbackStats(Base):
+    __tablename__ = "keyword_feedback_stats"
+    keyword_id = Column(UUID(as_uuid=True), primary_key=True)
+    confirmed = Column(Integer, nullable=False, default=0)
+    dismissed = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
+
+# AlertDelivery model (per-alert push fan-out progress)
+class AlertDelivery(Base):
+    __tablename__ = "alert_deliveries"
+    alert_id = Column(UUID(as_uuid=True), ForeignKey("alerts.id"), primary_key=True)
+    status = Column(String, nullable=False, default="SENDING")  # SENDING, COMPLETED, FAILED
+    total_tokens = Column(Integer, nullable=False, default=0)
+    sent_count = Column(Integer, nullable=False, default=0)
+    failed_count = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime)
+
+# PushTicket model (Expo push ticket / receipt per device)
+class PushTicket(Base):
+    __tablename__ = "push_tickets"
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4())
+    alert_id = Column(UUID(as_uuid=True), ForeignKey("alerts.id"), nullable=False, index=True)
+    push_token = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # 'ok' or 'error'
+    ticket_id = Column(String)
+    error = Column(String)
+    created_at = Column(DateTime, server_default=func.now())
+    receipt_status = Column(String)  # 'ok', 'error' or 'expired' once the receipt is checked
+    receipt_error = Column(String)
+    receipt_checked_at = Column(DateTime)  # last receipt poll claim, see app/dispatch.py
+
+# Job model (durable background job queue, see app/jobs.py)
+class Job(Base):
+    __tablename__ = "jobs"
+    id = Column(UUID(as_uuid=True), primary_key=True, server_default=func.uuid_generate_v4())
+    job_type = Column(String, nullable=False)
+    payload = Column(JSON, nullable=False)
+    status = Column(String, nullable=False, default="QUEUED")  # QUEUED, RUNNING, DONE, DEAD
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    run_after = Column(DateTime, nullable=False, server_default=func.now())
+    locked_at = Column(DateTime)
+    last_error = Column(String)
+    result = Column(JSON)
+    created_at = Column(DateTime, server_default=func.now())
+    finished_at = Column(DateTime)
+
+# DeviceCell model (pushable devices per grid cell, kept by triggers in
+# migrations/0009_device_cells.sql; see app/audience_grid.py)
+class DeviceCell(Base):
+    __tablename__ = "device_cells"
+    cell_x = Column(Integer, primary_key=True)
+    cell_y = Column(Integer, primary_key=True)
+    devices = Column(Integer, nullable=False)
@@ -0,0 +1,128 @@
+# app/notify.py
+
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy.engine import make_url
+
+from app.database import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_KEEPALIVE = float(os.getenv("NOTIFY_KEEPALIVE", "30"))
+NOTIFY_RECONNECT_MAX = float(os.getenv("NOTIFY_RECONNECT_MAX", "30"))
+
+Callback = Callable[[str], None]
+ConnectHook = Callable[[], Awaitable[None]]
+
+
+def listen_dsn(url: str = DATABASE_URL) -> str:
+    """Plain postgresql:// DSN for asyncpg.connect, whatever driver the URL names."""
+    return make_url(url).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class PgListener:
+    """
+    One dedicated Postgres connection per process that LISTENs on every
+    channel registered with subscribe() and fans notifications out to
+    in-process callbacks.
+
+    Callbacks run on the event loop and must not block. Notifications sent
+    while the connection is down are lost, so each subscriber can register an
+    on_connect hook; it runs after every (re)connect so the subscriber can
+    resynchronise from the database.
+    """
+
+    def __init__(self, dsn: Optional[str] = None):
+        self.dsn = dsn
+        self._callbacks: Dict[str, List[Callback]] = defaultdict(list)
+        self._connect_hooks: List[ConnectHook] = []
+        self._conn: Optional[asyncpg.Connection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+        self.notifications = 0
+        self.reconnects = 0
+
+    def subscribe(self, channel: str, callback: Callback, on_connect: Optional[ConnectHook] = None):
+        """Register a callback for a channel. Call before start()."""
+        self._callbacks[channel].append(callback)
+        if on_connect is not None:
+            self._connect_hooks.append(on_connect)
+
+    async def start(self):
+        if self._task is None and self._callbacks:
+            self._task = asyncio.create_task(self._run())
+            # Don't hold up startup forever if the database is unreachable;
+            # _run keeps retrying in the background.
+            try:
+                await asyncio.wait_for(self._connected.wait(), timeout=10)
+            except asyncio.TimeoutError:
+                logger.warning("LISTEN connection not ready, retrying in background")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self._close()
+
+    def stats(self) -> Dict:
+        return {
+            "connected": self._connected.is_set(),
+            "channels": sorted(self._callbacks),
+            "notifications": self.notifications,
+            "reconnects": self.reconnects,
+        }
+
+    def _dispatch(self, connection, pid, channel, payload):
+        self.notifications += 1
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                callback(payload)
+            except Exception:
+                logger.exception("Notification callback failed", extra={"channel": channel})
+
+    async def _run(self):
+        delay = 0.5
+        while True:
+            lost = asyncio.Event()
+            try:
+                self._conn = await asyncpg.connect(self.dsn or listen_dsn())
+                self._conn.add_termination_listener(lambda conn: lost.set())
+                for channel in self._callbacks:
+                    await self._conn.add_listener(channel, self._dispatch)
+                for hook in self._connect_hooks:
+                    await hook()
+                self._connected.set()
+                delay = 0.5
+                logger.info("LISTEN connection ready", extra={"channels": sorted(self._callbacks)})
+                # Keepalive also detects half-open connections
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=NOTIFY_KEEPALIVE)
+                    except asyncio.TimeoutError:
+                        await self._conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("LISTEN connection failed", extra={"error": str(e)})
+            self._connected.clear()
+            await self._close()
+            self.reconnects += 1
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, NOTIFY_RECONNECT_MAX)
+
+    async def _close(self):
+        conn, self._conn = self._conn, None
+        if conn is not None and not conn.is_closed():
+            try:
+                await asyncio.wait_for(conn.close(), timeout=5)
+            except Exception:
+                conn.terminate()
+
+
+listener = PgListener()
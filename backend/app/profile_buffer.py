@@ -0,0 +1,244 @@
+# app/profile_buffer.py
+
+import asyncio
+import logging
+import math
+import os
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Boolean, Float, String, case, column, func, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.database import AsyncSessionLocal
+from app.models import Profile
+
+logger = logging.getLogger(__name__)
+
+# Moves shorter than this (from the last accepted location) are dropped
+PROFILE_MIN_MOVE_M = float(os.getenv("PROFILE_MIN_MOVE_M", "100"))
+PROFILE_FLUSH_INTERVAL_MS = int(os.getenv("PROFILE_FLUSH_INTERVAL_MS", "500"))
+# Flush early once this many users are pending
+PROFILE_FLUSH_MAX_BATCH = int(os.getenv("PROFILE_FLUSH_MAX_BATCH", "5000"))
+# Users whose last accepted location is remembered for the distance check
+PROFILE_TRACKED_USERS = int(os.getenv("PROFILE_TRACKED_USERS", "200000"))
+
+EARTH_RADIUS_M = 6371008.8
+_UNSET = object()
+
+
+def haversine_m(a: Tuple[float, float], b: Tuple[float, float]) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (a[0], a[1], b[0], b[1]))
+    h = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(h))
+
+
+@dataclass
+class PendingUpdate:
+    # _UNSET leaves the column alone; None clears it
+    location: object = _UNSET  # (lon, lat) or None
+    push_token: object = _UNSET
+
+    def merge(self, newer: "PendingUpdate"):
+        if newer.location is not _UNSET:
+            self.location = newer.location
+        if newer.push_token is not _UNSET:
+            self.push_token = newer.push_token
+
+
+class ProfileWriteBuffer:
+    """
+    Write-behind buffer for the high-frequency profile fields
+    (last_known_location, push_token).
+
+    Updates are kept per user (latest wins) and written every
+    PROFILE_FLUSH_INTERVAL_MS as one UPDATE ... FROM (VALUES ...). Location
+    moves shorter than PROFILE_MIN_MOVE_M from the last accepted location are
+    dropped, so stored locations are never further than that from the
+    device's real position plus one flush interval of lag. create_alert
+    flushes before resolving its audience.
+    """
+
+    def __init__(
+        self,
+        flush_interval_ms: int = PROFILE_FLUSH_INTERVAL_MS,
+        min_move_m: float = PROFILE_MIN_MOVE_M,
+        max_batch: int = PROFILE_FLUSH_MAX_BATCH,
+        tracked_users: int = PROFILE_TRACKED_USERS,
+    ):
+        self.flush_interval = flush_interval_ms / 1000
+        self.min_move_m = min_move_m
+        self.max_batch = max_batch
+        self.tracked_users = tracked_users
+        self._pending: Dict[str, PendingUpdate] = {}
+        self._last_location: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+        # Users whose profile row is known to exist, so the API checks once per user
+        self._known: "OrderedDict[str, None]" = OrderedDict()
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.received = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.rows_written = 0
+        self.flushes = 0
+        self.last_flush_ms = 0.0
+
+    def submit(self, user_id: str, location=_UNSET, push_token=_UNSET) -> bool:
+        """
+        Buffer an update; returns False if it was dropped as a negligible move.
+        Raises ValueError if `user_id` is not a UUID, so a bad id is refused
+        here instead of failing every flush it would be part of.
+        """
+        user_id = str(uuid.UUID(user_id))
+        self.received += 1
+        if location is not _UNSET and location is not None and push_token is _UNSET:
+            last = self._last_location.get(user_id)
+            if last is not None and haversine_m(last, location) < self.min_move_m:
+                self.dropped += 1
+                return False
+        if location is not _UNSET:
+            self._remember(user_id, location)
+
+        update = PendingUpdate(location=location, push_token=push_token)
+        pending = self._pending.get(user_id)
+        if pending is None:
+            self._pending[user_id] = update
+        else:
+            pending.merge(update)
+            self.coalesced += 1
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+        return True
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def flush(self) -> int:
+        """Write everything pending now; returns the number of users written."""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            start = time.perf_counter()
+            try:
+                await self._write(batch)
+            except BaseException:
+                # Put the batch back without clobbering anything newer
+                for user_id, update in batch.items():
+                    newer = self._pending.get(user_id)
+                    if newer is not None:
+                        update.merge(newer)
+                    self._pending[user_id] = update
+                raise
+            self.flushes += 1
+            self.rows_written += len(batch)
+            self.last_flush_ms = (time.perf_counter() - start) * 1000
+            return len(batch)
+
+    def stats(self) -> Dict:
+        return {
+            "pending": len(self._pending),
+            "received": self.received,
+            "dropped_small_moves": self.dropped,
+            "coalesced": self.coalesced,
+            "rows_written": self.rows_written,
+            "flushes": self.flushes,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "write_reduction": round(self.received / self.rows_written, 2) if self.rows_written else None,
+        }
+
+    def known(self, user_id: str) -> bool:
+        """Whether `user_id`'s profile row was seen to exist (see mark_known)."""
+        if user_id not in self._known:
+            return False
+        self._known.move_to_end(user_id)
+        return True
+
+    def mark_known(self, user_id: str):
+        self._known[user_id] = None
+        self._known.move_to_end(user_id)
+        while len(self._known) > self.tracked_users:
+            self._known.popitem(last=False)
+
+    def _remember(self, user_id: str, location):
+        if location is None:
+            self._last_location.pop(user_id, None)
+            return
+        self._last_location[user_id] = location
+        self._last_location.move_to_end(user_id)
+        while len(self._last_location) > self.tracked_users:
+            self._last_location.popitem(last=False)
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Profile buffer flush failed", extra={"pending": len(self._pending)})
+
+    async def _write(self, batch: Dict[str, PendingUpdate]):
+        rows = []
+        for user_id, u in batch.items():
+            try:
+                profile_id = uuid.UUID(user_id)
+            except ValueError:
+                # One bad id must not fail (and re-queue) the whole batch
+                logger.error("Dropping profile update with invalid user id", extra={"user_id": user_id})
+                continue
+            set_location = u.location is not _UNSET
+            has_point = set_location and u.location is not None
+            # Placeholder 0.0 rather than NULL keeps the VALUES column typed
+            # as float even when no row in the batch carries a location.
+            lon, lat = u.location if has_point else (0.0, 0.0)
+            set_token = u.push_token is not _UNSET
+            token = u.push_token if set_token else None
+            rows.append((profile_id, set_location, has_point, lon, lat, set_token, token))
+        if not rows:
+            return
+        v = values(
+            column("id", UUID(as_uuid=True)),
+            column("set_location", Boolean),
+            column("has_point", Boolean),
+            column("lon", Float),
+            column("lat", Float),
+            column("set_token", Boolean),
+            column("push_token", String),
+            name="v",
+        ).data(rows)
+        new_location = case(
+            (v.c.has_point, func.ST_SetSRID(func.ST_MakePoint(v.c.lon, v.c.lat), 4326)),
+            else_=None,
+        )
+        stmt = (
+            update(Profile)
+            .where(Profile.id == v.c.id)
+            .values(
+                last_known_location=case((v.c.set_location, new_location), else_=Profile.last_known_location),
+                push_token=case((v.c.set_token, v.c.push_token), else_=Profile.push_token),
+            )
+        )
+        async with AsyncSessionLocal() as db:
+            await db.execute(stmt)
+            await db.commit()
+
+
+profile_buffer = ProfileWriteBuffer()
@@ -1,71 +1,160 @@
 # app/routers/admin.py
 
-from typing import Dict, List
+from datetime import datetime, timedelta, timezone
+from typing import Dict
+import uuid
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy.sql import text
-from geoalchemy2.functions import ST_GeomFromGeoJSON, ST_Within
-from app.database import get_db
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.alert_index import ALERT_DEFAULT_TTL_HOURS, alert_index
+from app.audience import iter_push_tokens
+from app.audience_grid import preview_audience
+from app.database import get_async_db
 from app.dependencies.auth import get_current_user, require_role
-from app.models import Alert, AnalystFeedback, Profile, UserRoleEnum
-from app.schemas import AlertCreate, AlertResponse, AnalystFeedbackCreate, AnalystFeedbackResponse, SetUserRole
-from app.tasks import trigger_keyword_tuner
-import httpx
-import os
-
-router = APIRouter(prefix="/api/admin", tags=["Admin"])
+from app.dispatch import dispatcher
+from app.geometry import to_wkb
+from app.jobs import job_queue
+from app.models import Alert, AlertDelivery, AlertSeverityEnum, AnalystFeedback, Job, Profile, UserRoleEnum
+from app.profile_buffer import profile_buffer
+from app.schemas import (
+    AlertCreate,
+    AlertDeliveryResponse,
+    AlertPreviewRequest,
+    AlertPreviewResponse,
+    AlertResponse,
+    AnalystFeedbackCreate,
+    AnalystFeedbackResponse,
+    AudienceCountResponse,
+    SetUserRole,
+)
+from app.serializers import FastJSONResponse, response_class, serialize_alerts, serialize_feedback, use_fast_json
+from app.tasks import AUDIENCE_COUNT, trigger_audience_count, trigger_keyword_tuner
+
+FAST_JSON = use_fast_json("admin")
+
+router = APIRouter(prefix="/api/admin", tags=["Admin"], default_response_class=response_class("admin"))
 
 
 @router.post("/alerts/create", status_code=status.HTTP_202_ACCEPTED, response_model=AlertResponse)
-def create_alert(
+async def create_alert(
     alert: AlertCreate,
     current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Create and dispatch a geo-targeted alert."""
 
     # Convert Pydantic model to dict
     alert_data = alert.dict()
     alert_data["created_by"] = current_user["user_id"]
-    alert_data["affected_area"] = ST_GeomFromGeoJSON(alert.affected_area.json())
-
-    # Insert alert into DB
-    db_alert = Alert(**alert_data)
-    db.add(db_alert)
-    db.commit()
-    db.refresh(db_alert)
-
-    # Geospatial query to find push tokens in affected area
-    query = text("""
-        SELECT push_token
-        FROM profiles
-        WHERE push_token IS NOT NULL
-        AND ST_Within(last_known_location, ST_GeomFromGeoJSON(:affected_area))
-    """)
-    result = db.execute(query, {"affected_area": alert.affected_area.json()}).fetchall()
-    push_tokens = [row[0] for row in result if row[0]]
-
-    # Send notifications via Expo Push API (synchronously)
-    if push_tokens:
-        expo_url = os.getenv("EXPO_PUSH_URL", "https://exp.host/--/api/v2/push/send")
-        with httpx.Client() as client:
-            for i in range(0, len(push_tokens), 100):
-                chunk = push_tokens[i:i+100]
-                payload = [{"to": t, "title": alert.title, "body": alert.message} for t in chunk]
-                try:
-                    client.post(expo_url, json=payload)
-                except httpx.HTTPStatusError:
-                    # Log error but continue
-                    pass
-
+    alert_data["affected_area"] = to_wkb(alert.affected_area)
+    if alert.expires_at is None:
+        alert_data["expires_at"] = datetime.utcnow() + timedelta(hours=ALERT_DEFAULT_TTL_HOURS)
+    elif alert.expires_at.tzinfo is not None:
+        # Stored as naive UTC like every other timestamp
+        alert_data["expires_at"] = alert.expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+    # Insert alert into DB; RETURNING hands back the stored row (geometry as EWKB)
+    result = await db.execute(insert(Alert).values(**alert_data).returning(Alert))
+    db_alert = result.scalar_one()
+    await db.commit()
+
+    # Visible to /api/alerts/active here immediately; other workers pick it up
+    # from the alerts_notify trigger.
+    alert_index.add(db_alert)
+
+    # Buffered location/push_token updates must be in the table before the
+    # audience query runs.
+    await profile_buffer.flush()
+
+    # Fan the push notifications out in the background; the official gets
+    # the 202 as soon as the alert is stored.
+    message = {
+        "title": alert.title,
+        "body": alert.message,
+        "data": {"alert_id": str(db_alert.id), "severity": alert.severity.value},
+        "priority": "high" if alert.severity == AlertSeverityEnum.CRITICAL else "default",
+        "sound": "default",
+    }
+    dispatcher.dispatch(db_alert.id, message, iter_push_tokens(alert.affected_area.json()))
+
+    if FAST_JSON:
+        return FastJSONResponse(serialize_alerts([db_alert])[0], status_code=status.HTTP_202_ACCEPTED)
     return db_alert
 
 
+@router.post("/alerts/preview", response_model=AlertPreviewResponse)
+async def preview_alert(
+    preview: AlertPreviewRequest,
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Dry run: estimated audience of an alert area from the per-cell device grid."""
+    estimate = await preview_audience(preview.affected_area.model_dump())
+    job_id = None
+    if preview.exact:
+        # Committed before we answer, so polling it on any worker finds it
+        job_id = await trigger_audience_count(db, preview.affected_area.json())
+        await db.commit()
+    return AlertPreviewResponse(**vars(estimate), exact_count_job_id=job_id)
+
+
+@router.get("/alerts/preview/{job_id}", response_model=AudienceCountResponse)
+async def get_preview_count(
+    job_id: uuid.UUID,
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Exact audience count queued by a preview; devices is set once status is DONE."""
+    job = await db.get(Job, job_id)
+    if job is None or job.job_type != AUDIENCE_COUNT:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown audience count job")
+    devices = (job.result or {}).get("devices") if job.status == "DONE" else None
+    return AudienceCountResponse(job_id=job.id, status=job.status, devices=devices)
+
+
+@router.get("/alerts/{alert_id}/delivery", response_model=AlertDeliveryResponse)
+async def get_alert_delivery(
+    alert_id: uuid.UUID,
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Push delivery progress for an alert."""
+
+    delivery = await db.get(AlertDelivery, alert_id)
+    if not delivery:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No delivery for this alert")
+    return delivery
+
+
+@router.get("/dispatch/stats")
+async def get_dispatch_stats(
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+):
+    """Push dispatcher queue depth and throughput for this worker."""
+    return dispatcher.stats()
+
+
+@router.get("/profile-buffer/stats")
+async def get_profile_buffer_stats(
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+):
+    """Write-behind profile buffer counters for this worker."""
+    return profile_buffer.stats()
+
+
+@router.get("/jobs/metrics")
+async def get_job_metrics(
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+):
+    """Background job queue depth, throughput and latency for this worker."""
+    return job_queue.metrics()
+
+
 @router.post("/feedback", status_code=status.HTTP_201_CREATED, response_model=AnalystFeedbackResponse)
-def create_feedback(
+async def create_feedback(
     feedback: AnalystFeedbackCreate,
     current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Log analyst feedback on social media post."""
 
@@ -74,27 +163,30 @@ def create_feedback(
 
     db_feedback = AnalystFeedback(**feedback_data)
     db.add(db_feedback)
-    db.commit()
-    db.refresh(db_feedback)
-
-    # Queue background job for keyword tuner
-    trigger_keyword_tuner(db_feedback.id)
-
+    await db.flush()
+    # Queue background job for keyword tuner, in the same transaction
+    await trigger_keyword_tuner(db, db_feedback.id)
+    await db.commit()
+    await db.refresh(db_feedback)
+
+    if FAST_JSON:
+        return FastJSONResponse(serialize_feedback([db_feedback])[0], status_code=status.HTTP_201_CREATED)
     return db_feedback
 
 
 @router.post("/users/{user_id}/set-role", status_code=status.HTTP_204_NO_CONTENT)
-def set_user_role(
+async def set_user_role(
     user_id: str,
     role_data: SetUserRole,
     current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Promote or demote a user's role."""
 
-    profile = db.query(Profile).filter(Profile.id == user_id).first()
+    result = await db.execute(select(Profile).where(Profile.id == user_id))
+    profile = result.scalar_one_or_none()
     if not profile:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     profile.role = role_data.new_role
-    db.commit()
+    await db.commit()
@@ -0,0 +1,19 @@
+# app/routers/alerts.py
+
+from typing import Dict, List
+from fastapi import APIRouter, Depends, Query
+from app.alert_index import alert_index
+from app.dependencies.auth import get_current_user
+from app.schemas import ActiveAlertResponse
+
+router = APIRouter(prefix="/api/alerts", tags=["Alerts"])
+
+
+@router.get("/active", response_model=List[ActiveAlertResponse])
+async def get_active_alerts(
+    lon: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """Active alerts covering a location, answered from the in-memory index."""
+    return [vars(alert) for alert in alert_index.lookup(lon, lat)]
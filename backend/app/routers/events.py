@@ -0,0 +1,63 @@
+# app/routers/events.py
+
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.dependencies.auth import get_current_user
+from app.models import HazardEvent
+from app.schemas import HazardEventResponse, HazardTypeEnum
+
+router = APIRouter(prefix="/api/events", tags=["Events"])
+
+EVENT_COLUMNS = (
+    HazardEvent.id, HazardEvent.hazard_type, HazardEvent.status,
+    func.ST_X(HazardEvent.centroid).label("lon"), func.ST_Y(HazardEvent.centroid).label("lat"),
+    HazardEvent.report_count, HazardEvent.total_weight, HazardEvent.confidence,
+    HazardEvent.first_seen, HazardEvent.last_seen,
+)
+
+
+def _to_response(row) -> HazardEventResponse:
+    data = dict(row._mapping)
+    data["centroid"] = {"type": "Point", "coordinates": (data.pop("lon"), data.pop("lat"))}
+    return HazardEventResponse(**data)
+
+
+@router.get("", response_model=List[HazardEventResponse])
+async def list_events(
+    hazard_type: Optional[HazardTypeEnum] = None,
+    event_status: str = Query("ACTIVE", alias="status"),
+    min_confidence: float = Query(0.0, ge=0.0, le=1.0),
+    since: Optional[datetime] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Dict[str, str] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """List correlated hazard events, most recently active first."""
+    stmt = select(*EVENT_COLUMNS).where(
+        HazardEvent.status == event_status,
+        HazardEvent.confidence >= min_confidence,
+    )
+    if hazard_type:
+        stmt = stmt.where(HazardEvent.hazard_type == hazard_type)
+    if since:
+        stmt = stmt.where(HazardEvent.last_seen >= since)
+    rows = await db.execute(stmt.order_by(HazardEvent.last_seen.desc()).limit(limit))
+    return [_to_response(row) for row in rows]
+
+
+@router.get("/{event_id}", response_model=HazardEventResponse)
+async def get_event(
+    event_id: uuid.UUID,
+    current_user: Dict[str, str] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Fetch one hazard event."""
+    row = (await db.execute(select(*EVENT_COLUMNS).where(HazardEvent.id == event_id))).first()
+    if not row:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Event not found")
+    return _to_response(row)
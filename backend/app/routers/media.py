@@ -0,0 +1,116 @@
+# app/routers/media.py
+
+from typing import Dict, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response, status
+from fastapi.responses import FileResponse
+from app.dependencies.auth import get_current_user, require_role
+from app.media import CONTENT_TYPES, OffsetMismatch, StoredObject, UploadError, UploadSession, media_store
+from app.models import UserRoleEnum
+from app.schemas import MediaUploadCreate, MediaUploadResponse
+
+router = APIRouter(prefix="/api/media", tags=["Media"])
+
+MEDIA_TYPES = {ext: content_type for content_type, ext in CONTENT_TYPES.items()}
+
+
+def upload_response(request: Request, session: UploadSession, stored: Optional[StoredObject] = None) -> MediaUploadResponse:
+    if stored is None:
+        return MediaUploadResponse(upload_id=session.upload_id, offset=session.offset, size=session.size)
+    return stored_response(request, stored)
+
+
+def stored_response(request: Request, stored: StoredObject) -> MediaUploadResponse:
+    url = lambda name: str(request.url_for("get_media", name=name))
+    return MediaUploadResponse(
+        offset=stored.size,
+        size=stored.size,
+        complete=True,
+        url=url(stored.name),
+        sha256=stored.sha256,
+        deduplicated=stored.deduplicated,
+        variants={name.rsplit("_", 1)[1].split(".")[0]: url(name) for name in stored.variants},
+    )
+
+
+@router.post("/uploads", response_model=MediaUploadResponse, status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    upload: MediaUploadCreate,
+    request: Request,
+    response: Response,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """Open a resumable upload; returns it already complete if `sha256` is a file we have."""
+    if upload.sha256:
+        stored = media_store.existing(upload.sha256, upload.content_type)
+        if stored is not None and stored.size == upload.size:
+            response.status_code = status.HTTP_200_OK
+            return stored_response(request, stored)
+    try:
+        session = await media_store.create(current_user["user_id"], upload.size, upload.content_type)
+    except UploadError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    return upload_response(request, session)
+
+
+@router.get("/uploads/{upload_id}", response_model=MediaUploadResponse)
+async def get_upload(
+    upload_id: str,
+    request: Request,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """Where an upload stands; resume by sending the next chunk at `offset`."""
+    session = await media_store.get(upload_id, current_user["user_id"])
+    if session is None:
+        completed = await media_store.completed(upload_id, current_user["user_id"])
+        if completed is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired upload")
+        return upload_response(request, *completed)
+    return upload_response(request, session)
+
+
+@router.patch("/uploads/{upload_id}", response_model=MediaUploadResponse)
+async def append_upload(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(..., ge=0),
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """
+    Append the raw request body at `Upload-Offset`. The body is streamed to
+    disk as it arrives; the final chunk, and any retry of it, returns the
+    stored file's URL.
+    """
+    try:
+        session, stored = await media_store.append(upload_id, current_user["user_id"], upload_offset, request.stream())
+    except KeyError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Unknown or expired upload")
+    except OffsetMismatch as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e), headers={"Upload-Offset": str(e.offset)})
+    except UploadError as e:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e))
+    return upload_response(request, session, stored)
+
+
+@router.get("/stats")
+async def get_media_stats(
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+):
+    """Upload, dedupe and thumbnailing counters for this worker."""
+    return media_store.stats()
+
+
+@router.get("/{name}", name="get_media")
+async def get_media(
+    name: str,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """A stored file or variant by object name (`<sha256>.<ext>`, `<sha256>_thumb.jpg`)."""
+    path = media_store.object_path(name)
+    if path is None or not path.is_file():
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="No such media")
+    # Content-addressed: the bytes behind a name never change
+    return FileResponse(
+        path,
+        media_type=MEDIA_TYPES.get(name.rsplit(".", 1)[1], "application/octet-stream"),
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
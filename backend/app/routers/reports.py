@@ -1,43 +1,223 @@
 # app/routers/reports.py
 
-import json # <-- Add json import
-from typing import Dict
-from fastapi import APIRouter, Depends, status
-from sqlalchemy.orm import Session
-# Import ST_AsGeoJSON
-from geoalchemy2.functions import ST_GeomFromGeoJSON, ST_AsGeoJSON 
-from app.database import get_db
-from app.dependencies.auth import get_current_user
+import base64
+import uuid
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import func, insert, select, tuple_
+from sqlalchemy.sql import Select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_async_db
+from app.dependencies.auth import get_current_user, require_role
+from app.geometry import to_wkb
 from app.models import CitizenReport, UserRoleEnum
-from app.schemas import CitizenReportCreate, CitizenReportResponse
-from app.tasks import trigger_event_correlation
+from app.schemas import (
+    BatchItemResult,
+    CitizenReportBatchCreate,
+    CitizenReportBatchResponse,
+    CitizenReportCreate,
+    CitizenReportPage,
+    CitizenReportResponse,
+    HazardTypeEnum,
+)
+from app.serializers import FastJSONResponse, response_class, serialize_reports, use_fast_json
+from app.tasks import trigger_event_correlation, trigger_event_correlation_batch
+from app.tiles import tile_cache
 
-router = APIRouter(prefix="/api/reports", tags=["Reports"])
+FAST_JSON = use_fast_json("reports")
+
+router = APIRouter(prefix="/api/reports", tags=["Reports"], default_response_class=response_class("reports"))
+
+Cursor = Tuple[datetime, uuid.UUID]
+
+
+def encode_cursor(created_at: datetime, report_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{report_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, _, report_id = raw.partition("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(report_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(v) for v in bbox.split(","))
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="bbox must be min_lon,min_lat,max_lon,max_lat",
+        )
+    if min_lon > max_lon or min_lat > max_lat:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="bbox is inverted")
+    return min_lon, min_lat, max_lon, max_lat
+
+
+def report_query(
+    bbox: Optional[Tuple[float, float, float, float]] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    hazard_type: Optional[HazardTypeEnum] = None,
+    user_role: Optional[UserRoleEnum] = None,
+    after: Optional[Cursor] = None,
+) -> Select:
+    """Filtered citizen reports, newest first, resuming strictly after `after`.
+
+    The ORDER BY matches ix_citizen_reports_created_id (and the hazard_type /
+    user_role composites), so each page is an index range scan whose cost
+    doesn't grow with how deep the client has paged.
+    """
+    stmt = select(CitizenReport)
+    if bbox:
+        stmt = stmt.where(func.ST_Intersects(CitizenReport.location, func.ST_MakeEnvelope(*bbox, 4326)))
+    if since:
+        stmt = stmt.where(CitizenReport.created_at >= since)
+    if until:
+        stmt = stmt.where(CitizenReport.created_at < until)
+    if hazard_type:
+        stmt = stmt.where(CitizenReport.hazard_type == hazard_type)
+    if user_role:
+        stmt = stmt.where(CitizenReport.user_role == user_role)
+    if after:
+        stmt = stmt.where(tuple_(CitizenReport.created_at, CitizenReport.id) < tuple_(*after))
+    return stmt.order_by(CitizenReport.created_at.desc(), CitizenReport.id.desc())
+
+
+@router.get("", response_model=CitizenReportPage)
+async def list_citizen_reports(
+    bbox: Optional[str] = Query(None, description="min_lon,min_lat,max_lon,max_lat"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    hazard_type: Optional[HazardTypeEnum] = None,
+    user_role: Optional[UserRoleEnum] = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=500),
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """List citizen reports for the dashboard, keyset-paginated on (created_at, id)."""
+    stmt = report_query(
+        bbox=parse_bbox(bbox) if bbox else None,
+        since=since,
+        until=until,
+        hazard_type=hazard_type,
+        user_role=user_role,
+        after=decode_cursor(cursor) if cursor else None,
+    )
+    # One extra row tells us whether there is a next page
+    reports = (await db.scalars(stmt.limit(limit + 1))).all()
+    next_cursor = None
+    if len(reports) > limit:
+        reports = reports[:limit]
+        next_cursor = encode_cursor(reports[-1].created_at, reports[-1].id)
+    if FAST_JSON:
+        return FastJSONResponse({"items": serialize_reports(reports), "next_cursor": next_cursor})
+    return CitizenReportPage(
+        items=[CitizenReportResponse.model_validate(r, from_attributes=True) for r in reports],
+        next_cursor=next_cursor,
+    )
 
 @router.post("/citizen", status_code=status.HTTP_201_CREATED, response_model=CitizenReportResponse)
-def create_citizen_report(
+async def create_citizen_report(
     report: CitizenReportCreate,
     current_user: Dict[str, str] = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Submit a new citizen hazard report."""
     report_data = report.dict(exclude={"location"})
     report_data["user_id"] = current_user["user_id"]
     report_data["user_role"] = current_user["user_role"]
-    report_data["location"] = ST_GeomFromGeoJSON(report.location.json())
+    report_data["location"] = to_wkb(report.location)
     report_data["media_urls"] = [str(url) for url in report.media_urls]
 
-    db_report = CitizenReport(**report_data)
-    db.add(db_report)
-    db.commit()
-    db.refresh(db_report)
+    # One round trip: RETURNING brings back id, created_at and the location
+    # as EWKB, which CitizenReportResponse decodes in-process.
+    result = await db.execute(insert(CitizenReport).values(**report_data).returning(CitizenReport))
+    db_report = result.scalar_one()
+    # Same transaction: the report never exists without its correlation job
+    await trigger_event_correlation(db, db_report.id)
+    await db.commit()
+
+    await tile_cache.invalidate_points([report.location.coordinates])
+
+    if FAST_JSON:
+        return FastJSONResponse(serialize_reports([db_report])[0], status_code=status.HTTP_201_CREATED)
+    return db_report
+
+@router.post("/citizen/batch", response_model=CitizenReportBatchResponse)
+async def create_citizen_reports_batch(
+    batch: CitizenReportBatchCreate,
+    current_user: Dict[str, str] = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Submit a batch of citizen reports (offline sync), deduplicated on idempotency_key."""
+    # A key repeated inside the batch is inserted once; the first occurrence wins.
+    rows = {}
+    for item in batch.reports:
+        if item.idempotency_key in rows:
+            continue
+        rows[item.idempotency_key] = {
+            "user_id": current_user["user_id"],
+            "user_role": current_user["user_role"],
+            "hazard_type": item.hazard_type,
+            "description": item.description,
+            "location": to_wkb(item.location),
+            "media_urls": [str(url) for url in item.media_urls],
+            "idempotency_key": item.idempotency_key,
+        }
+
+    # One multi-row INSERT; keys this user already submitted are skipped by
+    # the partial unique index and simply don't come back from RETURNING.
+    stmt = (
+        pg_insert(CitizenReport)
+        .values(list(rows.values()))
+        .on_conflict_do_nothing(
+            index_elements=[CitizenReport.user_id, CitizenReport.idempotency_key],
+            index_where=CitizenReport.idempotency_key.isnot(None),
+        )
+        .returning(CitizenReport.id, CitizenReport.idempotency_key)
+    )
+    created = {key: report_id for report_id, key in (await db.execute(stmt)).all()}
 
-    trigger_event_correlation(db_report.id)
+    existing = {}
+    if len(created) < len(rows):
+        missing = [key for key in rows if key not in created]
+        result = await db.execute(
+            select(CitizenReport.id, CitizenReport.idempotency_key).where(
+                CitizenReport.user_id == current_user["user_id"],
+                CitizenReport.idempotency_key.in_(missing),
+            )
+        )
+        existing = {key: report_id for report_id, key in result.all()}
+    if created:
+        await trigger_event_correlation_batch(db, list(created.values()))
+    await db.commit()
 
-    # --- THE FIX IS HERE ---
-    # Convert the raw geometry from the DB back into a JSON-friendly dict
-    # so it matches the Pydantic response model.
-    location_geojson_str = db.scalar(ST_AsGeoJSON(db_report.location))
-    db_report.location = json.loads(location_geojson_str)
+    if created:
+        await tile_cache.invalidate_points(
+            item.location.coordinates
+            for item in batch.reports if item.idempotency_key in created
+        )
 
-    return db_report
\ No newline at end of file
+    results = []
+    seen = set()
+    for item in batch.reports:
+        key = item.idempotency_key
+        if key in created and key not in seen:
+            results.append(BatchItemResult(idempotency_key=key, status="CREATED", id=created[key]))
+        else:
+            report_id = created.get(key) or existing[key]
+            results.append(BatchItemResult(idempotency_key=key, status="DUPLICATE", id=report_id))
+        seen.add(key)
+    return CitizenReportBatchResponse(
+        created=len(created),
+        duplicates=len(results) - len(created),
+        results=results,
+    )
\ No newline at end of file
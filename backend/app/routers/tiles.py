@@ -0,0 +1,33 @@
+# app/routers/tiles.py
+
+from typing import Dict
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from app.dependencies.auth import get_current_user, require_role
+from app.models import UserRoleEnum
+from app.tiles import tile_cache, valid_tile
+
+router = APIRouter(prefix="/api/tiles", tags=["Tiles"])
+
+MVT_MEDIA_TYPE = "application/vnd.mapbox-vector-tile"
+
+
+@router.get("/reports/{z}/{x}/{y}.mvt")
+async def get_report_tile(
+    z: int,
+    x: int,
+    y: int,
+    current_user: Dict[str, str] = Depends(get_current_user),
+):
+    """Citizen reports as a Mapbox vector tile (layer `reports`), clustered at low zoom."""
+    if not valid_tile(z, x, y):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Tile out of range")
+    tile, source = await tile_cache.get((z, x, y))
+    return Response(content=tile, media_type=MVT_MEDIA_TYPE, headers={"X-Tile-Cache": source})
+
+
+@router.get("/stats")
+async def get_tile_cache_stats(
+    current_user: Dict[str, str] = Depends(require_role(UserRoleEnum.OFFICIAL)),
+):
+    """Tile cache size and hit rates for this worker."""
+    return tile_cache.stats()
@@ -2,44 +2,55 @@
 
 from typing import Dict
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from geoalchemy2.functions import ST_GeomFromGeoJSON
-import json
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.database import get_db
+from app.database import get_async_db
 from app.dependencies.auth import get_current_user
 from app.models import Profile
+from app.profile_buffer import profile_buffer
 from app.schemas import ProfileUpdate
 
 router = APIRouter(prefix="/api/me", tags=["User"])
 
 
 @router.patch("/profile", status_code=status.HTTP_204_NO_CONTENT)
-def update_profile(
+async def update_profile(
     profile_update: ProfileUpdate,
     current_user: Dict[str, str] = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Update authenticated user's profile."""
     user_id = current_user["user_id"]
 
-    profile = db.query(Profile).filter(Profile.id == user_id).first()
-    if not profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
-        )
-
     # Get dict of only provided fields
     update_data = profile_update.dict(exclude_unset=True)
 
-    # Handle last_known_location separately
-    if profile_update.last_known_location:
-        update_data["last_known_location"] = ST_GeomFromGeoJSON(
-            profile_update.last_known_location.json()
+    if "full_name" in update_data:
+        result = await db.execute(
+            update(Profile).where(Profile.id == user_id).values(full_name=profile_update.full_name)
         )
-
-    # Apply updates to SQLAlchemy model
-    for key, value in update_data.items():
-        setattr(profile, key, value)
-
-    db.commit()
+        if result.rowcount == 0:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+            )
+        await db.commit()
+        profile_buffer.mark_known(user_id)
+
+    # last_known_location / push_token come from the app's background location
+    # task; they go through the write-behind buffer. The flush can't report a
+    # missing profile, so its existence is checked here, once per user.
+    buffered = {}
+    if "last_known_location" in update_data:
+        location = profile_update.last_known_location
+        buffered["location"] = tuple(location.coordinates) if location else None
+    if "push_token" in update_data:
+        buffered["push_token"] = profile_update.push_token
+    if buffered:
+        if not profile_buffer.known(user_id):
+            if await db.scalar(select(Profile.id).where(Profile.id == user_id)) is None:
+                raise HTTPException(
+                    status_code=status.HTTP_404_NOT_FOUND, detail="Profile not found"
+                )
+            profile_buffer.mark_known(user_id)
+        profile_buffer.submit(user_id, **buffered)
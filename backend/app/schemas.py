@@ -5,7 +5,9 @@ from datetime import datetime
 from enum import Enum
 from typing import List, Optional, Tuple, Dict
 
-from pydantic import BaseModel, Field, HttpUrl
+from pydantic import BaseModel, Field, HttpUrl, field_validator
+
+from app.geometry import to_geojson
 
 # Enums (match database ENUM types)
 class UserRoleEnum(str, Enum):
@@ -42,6 +44,12 @@ class CitizenReportCreate(BaseModel):
     location: GeoPoint
     media_urls: List[HttpUrl] = Field(default_factory=list)
 
+class CitizenReportBatchItem(CitizenReportCreate):
+    idempotency_key: str = Field(..., min_length=1, max_length=128)
+
+class CitizenReportBatchCreate(BaseModel):
+    reports: List[CitizenReportBatchItem] = Field(..., min_length=1, max_length=500)
+
 class ProfileUpdate(BaseModel):
     full_name: Optional[str] = None
     push_token: Optional[str] = None
@@ -52,6 +60,7 @@ class AlertCreate(BaseModel):
     title: str
     message: str
     affected_area: GeoPolygon
+    expires_at: Optional[datetime] = None  # UTC; defaults to ALERT_DEFAULT_TTL_HOURS from now
 
 class AnalystFeedbackCreate(BaseModel):
     social_post_id: uuid.UUID
@@ -72,12 +81,29 @@ class CitizenReportResponse(BaseModel):
     created_at: datetime
     user_role: UserRoleEnum
 
+    # Geometry columns arrive as EWKB (WKBElement); decode in-process
+    _decode_location = field_validator("location", mode="before")(to_geojson)
+
     class Config:
         orm_mode = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
 
+class BatchItemResult(BaseModel):
+    idempotency_key: str
+    status: str  # 'CREATED' or 'DUPLICATE'
+    id: uuid.UUID
+
+class CitizenReportBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    results: List[BatchItemResult]
+
+class CitizenReportPage(BaseModel):
+    items: List[CitizenReportResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
+
 class AlertResponse(BaseModel):
     id: uuid.UUID
     severity: AlertSeverityEnum
@@ -86,6 +112,9 @@ class AlertResponse(BaseModel):
     affected_area: GeoPolygon
     created_at: datetime
     created_by: uuid.UUID
+    expires_at: Optional[datetime] = None
+
+    _decode_affected_area = field_validator("affected_area", mode="before")(to_geojson)
 
     class Config:
         orm_mode = True
@@ -93,6 +122,15 @@ class AlertResponse(BaseModel):
             datetime: lambda v: v.isoformat()
         }
 
+class ActiveAlertResponse(BaseModel):
+    id: uuid.UUID
+    severity: AlertSeverityEnum
+    title: str
+    message: str
+    affected_area: GeoPolygon
+    created_at: datetime
+    expires_at: Optional[datetime] = None
+
 class AnalystFeedbackResponse(BaseModel):
     id: uuid.UUID
     social_post_id: uuid.UUID
@@ -105,4 +143,67 @@ class AnalystFeedbackResponse(BaseModel):
         orm_mode = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
-        }
\ No newline at end of file
+        }
+
+class AlertPreviewRequest(BaseModel):
+    affected_area: GeoPolygon
+    exact: bool = False  # also queue an exact count (poll /alerts/preview/{job_id})
+
+class AlertPreviewResponse(BaseModel):
+    estimated_devices: int
+    lower_bound: int
+    upper_bound: int
+    cells: int
+    exact_count_job_id: Optional[uuid.UUID] = None
+
+class AudienceCountResponse(BaseModel):
+    job_id: uuid.UUID
+    status: str  # QUEUED, RUNNING, DONE, DEAD
+    devices: Optional[int] = None
+
+class MediaUploadCreate(BaseModel):
+    size: int = Field(..., gt=0)
+    content_type: str
+    sha256: Optional[str] = None  # lets the server skip re-uploads of known files
+
+class MediaUploadResponse(BaseModel):
+    upload_id: Optional[str] = None  # None once complete
+    offset: int
+    size: int
+    complete: bool = False
+    url: Optional[str] = None  # put this in CitizenReportCreate.media_urls
+    sha256: Optional[str] = None
+    deduplicated: bool = False
+    variants: Dict[str, str] = Field(default_factory=dict)  # rendered in the background
+
+class AlertDeliveryResponse(BaseModel):
+    alert_id: uuid.UUID
+    status: str
+    total_tokens: int
+    sent_count: int
+    failed_count: int
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+    class Config:
+        orm_mode = True
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
+
+class HazardEventResponse(BaseModel):
+    id: uuid.UUID
+    hazard_type: HazardTypeEnum
+    status: str
+    centroid: GeoPoint
+    report_count: int
+    total_weight: float
+    confidence: float
+    first_seen: datetime
+    last_seen: datetime
+
+    class Config:
+        orm_mode = True
+        json_encoders = {
+            datetime: lambda v: v.isoformat()
+        }
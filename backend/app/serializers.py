@@ -0,0 +1,131 @@
+# app/serializers.py
+
+"""
+Fast JSON path for the report, alert and feedback responses.
+
+The default path validates every ORM row into a pydantic response model and
+then runs jsonable_encoder over the result before json.dumps. The
+serializers here build plain dicts straight from the rows (UUIDs, datetimes
+and enums are left for orjson to encode natively; geometry EWKB is decoded
+in one vectorized shapely call per response) and FastJSONResponse renders
+them with orjson. The JSON is identical to the pydantic path.
+
+Routers opt in through FAST_JSON_ROUTERS and return a FastJSONResponse
+directly, which bypasses response_model validation (the model still
+documents the endpoint in OpenAPI).
+"""
+
+import os
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import orjson
+import shapely
+from fastapi.responses import JSONResponse
+from geoalchemy2.elements import WKBElement
+from shapely.geometry import mapping
+
+from app.geometry import to_geojson
+
+# Comma-separated router names using the fast path, e.g. "reports,admin"
+FAST_JSON_ROUTERS = {name.strip() for name in os.getenv("FAST_JSON_ROUTERS", "").split(",") if name.strip()}
+
+
+def use_fast_json(router: str) -> bool:
+    return router in FAST_JSON_ROUTERS
+
+
+def _default(value: Any):
+    # Anything orjson does not know natively; geometry is the usual suspect
+    if isinstance(value, WKBElement):
+        return to_geojson(value)
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+class FastJSONResponse(JSONResponse):
+    """orjson-rendered JSON, byte-compatible with the pydantic output for our models."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def response_class(router: str):
+    """default_response_class for a router: FastJSONResponse when opted in."""
+    return FastJSONResponse if use_fast_json(router) else JSONResponse
+
+
+def geojson_many(values: Sequence[Any]) -> List[Optional[Dict[str, Any]]]:
+    """Decode a column of geometry values with one shapely call.
+
+    Polygon coordinates may come back as numpy arrays: render the result with
+    FastJSONResponse, not json.dumps.
+    """
+    if not values or not all(isinstance(v, WKBElement) for v in values):
+        return [to_geojson(v) for v in values]
+    geoms = shapely.from_wkb([v.data if isinstance(v.data, (bytes, str)) else bytes(v.data) for v in values])
+    types = shapely.get_type_id(geoms)
+    if (types == shapely.GeometryType.POINT.value).all():
+        coords = shapely.get_coordinates(geoms).tolist()
+        return [{"type": "Point", "coordinates": (x, y)} for x, y in coords]
+    if (types == shapely.GeometryType.POLYGON.value).all() and not shapely.get_num_interior_rings(geoms).any():
+        # Shell-only polygons (every alert area): one coordinate array split
+        # per row; the numpy slices go to orjson as-is (OPT_SERIALIZE_NUMPY)
+        coords, index = shapely.get_coordinates(geoms, return_index=True)
+        bounds = np.searchsorted(index, np.arange(1, len(geoms)))
+        return [{"type": "Polygon", "coordinates": [ring]} for ring in np.split(coords, bounds)]
+    return [mapping(g) for g in geoms]
+
+
+def serialize_reports(reports: Sequence[Any]) -> List[Dict[str, Any]]:
+    """CitizenReportResponse-shaped dicts for ORM rows."""
+    locations = geojson_many([r.location for r in reports])
+    return [
+        {
+            "id": r.id,
+            "user_id": r.user_id,
+            "hazard_type": r.hazard_type,
+            "description": r.description,
+            "location": location,
+            "media_urls": r.media_urls or [],
+            "created_at": r.created_at,
+            "user_role": r.user_role,
+        }
+        for r, location in zip(reports, locations)
+    ]
+
+
+def serialize_alerts(alerts: Sequence[Any]) -> List[Dict[str, Any]]:
+    """AlertResponse-shaped dicts for ORM rows."""
+    areas = geojson_many([a.affected_area for a in alerts])
+    return [
+        {
+            "id": a.id,
+            "severity": a.severity,
+            "title": a.title,
+            "message": a.message,
+            "affected_area": area,
+            "created_at": a.created_at,
+            "created_by": a.created_by,
+            "expires_at": a.expires_at,
+        }
+        for a, area in zip(alerts, areas)
+    ]
+
+
+def serialize_feedback(rows: Sequence[Any]) -> List[Dict[str, Any]]:
+    """AnalystFeedbackResponse-shaped dicts for ORM rows."""
+    return [
+        {
+            "id": f.id,
+            "social_post_id": f.social_post_id,
+            "action": f.action,
+            "correction_data": f.correction_data,
+            "created_by": f.created_by,
+            "created_at": f.created_at,
+        }
+        for f in rows
+    ]
@@ -2,17 +2,64 @@
 
 import uuid
 import logging
+from typing import Any, Dict, List
 
-# In-memory queue simulation for MVP
-# Can be replaced with RQ/Redis later
-def trigger_event_correlation(report_id: uuid.UUID):
-    """Stub for triggering event correlation engine."""
-    logging.info(f"Queued event correlation for report ID: {report_id}")
-    # TODO: Implement actual logic or enqueue to RQ/Redis
-    pass
-
-def trigger_keyword_tuner(feedback_id: uuid.UUID):
-    """Stub for triggering keyword tuner service."""
-    logging.info(f"Queued keyword tuner for feedback ID: {feedback_id}")
-    # TODO: Implement actual logic or enqueue to RQ/Redis
-    pass
\ No newline at end of file
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.audience_grid import count_audience
+from app.correlation import CORRELATION_SWEEP_SECONDS, correlate_reports, expire_events, warm_start
+from app.keyword_tuner import tune_keywords
+from app.jobs import job_queue
+
+EVENT_CORRELATION = "event_correlation"
+KEYWORD_TUNER = "keyword_tuner"
+AUDIENCE_COUNT = "audience_count"
+
+# Enqueue side: called from request handlers. Jobs are inserted in the
+# request's transaction, so they are durable (and visible to every worker)
+# by the time the response goes out.
+async def trigger_event_correlation(db: AsyncSession, report_id: uuid.UUID):
+    """Queue the event correlation engine for a new citizen report (commit `db` after)."""
+    job_id = await job_queue.enqueue_in(db, EVENT_CORRELATION, {"report_id": str(report_id)})
+    logging.info(f"Queued event correlation for report ID: {report_id} (job {job_id})")
+    return job_id
+
+async def trigger_event_correlation_batch(db: AsyncSession, report_ids: List[uuid.UUID]):
+    """Queue one event correlation job for a batch of citizen reports (commit `db` after)."""
+    job_id = await job_queue.enqueue_in(db, EVENT_CORRELATION, {"report_ids": [str(r) for r in report_ids]})
+    logging.info(f"Queued event correlation for {len(report_ids)} reports (job {job_id})")
+    return job_id
+
+async def trigger_keyword_tuner(db: AsyncSession, feedback_id: uuid.UUID):
+    """Queue the keyword tuner service for new analyst feedback (commit `db` after)."""
+    job_id = await job_queue.enqueue_in(db, KEYWORD_TUNER, {"feedback_id": str(feedback_id)})
+    logging.info(f"Queued keyword tuner for feedback ID: {feedback_id} (job {job_id})")
+    return job_id
+
+async def trigger_audience_count(db: AsyncSession, affected_area: str):
+    """Queue an exact audience count for an alert preview, GeoJSON polygon (commit `db` after)."""
+    job_id = await job_queue.enqueue_in(db, AUDIENCE_COUNT, {"affected_area": affected_area})
+    logging.info(f"Queued audience count (job {job_id})")
+    return job_id
+
+# Worker side
+# Singleton by default (JOB_SINGLETON_TYPES): the clustering state is in
+# memory, so one process holds it, rebuilds it when it takes over and
+# expires quiet events on a timer
+@job_queue.handler(EVENT_CORRELATION, setup=warm_start, tick=expire_events, tick_interval=CORRELATION_SWEEP_SECONDS)
+async def run_event_correlation(payload: Dict[str, Any]):
+    """Assign citizen reports to hazard events."""
+    report_ids = payload.get("report_ids") or [payload["report_id"]]
+    return await correlate_reports(report_ids)
+
+@job_queue.handler(AUDIENCE_COUNT)
+async def run_audience_count(payload: Dict[str, Any]):
+    """Count the devices an alert over the given area would reach."""
+    return {"devices": await count_audience(payload["affected_area"])}
+
+@job_queue.handler(KEYWORD_TUNER)
+async def run_keyword_tuner(payload: Dict[str, Any]):
+    """Recalibrate scraping keywords from analyst feedback."""
+    # Drains every uncounted feedback row, not just payload["feedback_id"];
+    # jobs queued behind it usually find nothing left to do.
+    return await tune_keywords()
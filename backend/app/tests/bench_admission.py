@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Surge benchmark for admission control (app/admission.py).
+
+Runs an in-process stand-in for the API whose handlers hold one of
+--pool "database connections" for --service-ms, then floods it with PUBLIC
+report submissions from many users while a few OFFICIAL clients poll an
+admin endpoint. Each scenario runs twice:
+  * off - no admission control: everyone queues on the connection pool
+  * on  - AdmissionMiddleware with the given limit and default role shares
+
+Reports admin latency percentiles and what happened to the public traffic.
+Tokens are minted with app/tests/gen_jwt.py; no database is needed.
+
+Usage:
+    python -m app.tests.bench_admission --public-clients 400 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from collections import Counter
+from typing import Dict, List
+
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+import httpx  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.responses import JSONResponse  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from app.admission import ADMISSION_ROLE_SHARE, ADMISSION_USER_BURST, ADMISSION_USER_RATE, AdmissionController, AdmissionMiddleware  # noqa: E402
+from app.dependencies.auth import SUPABASE_JWT_SECRET  # noqa: E402
+from app.tests.gen_jwt import mint_token  # noqa: E402
+
+
+def build_app(pool: int, service_s: float):
+    connections = asyncio.Semaphore(pool)
+
+    async def handler(request):
+        async with connections:
+            await asyncio.sleep(service_s)
+        return JSONResponse({"ok": True})
+
+    return Starlette(routes=[
+        Route("/api/reports/citizen", handler, methods=["POST"]),
+        Route("/api/admin/reports", handler, methods=["GET"]),
+    ])
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def client_loop(client, method, path, token, stop_at, latencies, statuses, think_s=0.0):
+    headers = {"Authorization": f"Bearer {token}"}
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        response = await client.request(method, path, headers=headers)
+        latencies.append((time.perf_counter() - start) * 1000)
+        statuses[response.status_code] += 1
+        if response.status_code == 429:
+            # Well-behaved clients honour Retry-After
+            await asyncio.sleep(float(response.headers["retry-after"]))
+        elif think_s:
+            await asyncio.sleep(think_s)
+
+
+async def run(args, admission: bool) -> Dict:
+    app = build_app(args.pool, args.service_ms / 1000)
+    controller = None
+    if admission:
+        controller = AdmissionController(
+            limit=args.limit,
+            shares=ADMISSION_ROLE_SHARE,
+            rates=ADMISSION_USER_RATE,
+            bursts=ADMISSION_USER_BURST,
+            queue_timeout=args.queue_timeout,
+            max_queue=args.max_queue,
+        )
+        app = AdmissionMiddleware(app, controller)
+
+    public_tokens = [mint_token("PUBLIC", secret=SUPABASE_JWT_SECRET) for _ in range(args.public_users)]
+    admin_tokens = [mint_token("OFFICIAL", secret=SUPABASE_JWT_SECRET) for _ in range(args.admin_clients)]
+    public_lat, admin_lat = [], []
+    public_status, admin_status = Counter(), Counter()
+
+    limits = httpx.Limits(max_connections=None)
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench", limits=limits) as client:
+        stop_at = time.perf_counter() + args.duration
+        tasks = [
+            client_loop(client, "POST", "/api/reports/citizen", public_tokens[i % len(public_tokens)], stop_at, public_lat, public_status)
+            for i in range(args.public_clients)
+        ] + [
+            client_loop(client, "GET", "/api/admin/reports", token, stop_at, admin_lat, admin_status, think_s=args.admin_think_ms / 1000)
+            for token in admin_tokens
+        ]
+        await asyncio.gather(*tasks)
+
+    result = {
+        "admission": admission,
+        "admin_requests": len(admin_lat),
+        "admin_p50_ms": percentile(admin_lat, 0.50),
+        "admin_p99_ms": percentile(admin_lat, 0.99),
+        "admin_max_ms": max(admin_lat, default=0.0),
+        "admin_statuses": dict(admin_status),
+        "public_ok_per_s": public_status[200] / args.duration,
+        "public_p50_ms": statistics.median(public_lat) if public_lat else 0.0,
+        "public_statuses": dict(public_status),
+    }
+    if controller is not None:
+        result["controller"] = controller.stats()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--public-clients", type=int, default=400, help="concurrent PUBLIC clients in the surge")
+    parser.add_argument("--public-users", type=int, default=5000, help="distinct PUBLIC tokens the clients rotate through")
+    parser.add_argument("--admin-clients", type=int, default=4)
+    parser.add_argument("--admin-think-ms", type=float, default=50)
+    parser.add_argument("--pool", type=int, default=20, help="simulated database connections")
+    parser.add_argument("--service-ms", type=float, default=10, help="time each request holds a connection")
+    parser.add_argument("--limit", type=int, default=24, help="ADMISSION_MAX_CONCURRENCY for the 'on' run")
+    parser.add_argument("--queue-timeout", type=float, default=0.5)
+    parser.add_argument("--max-queue", type=int, default=256)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [asyncio.run(run(args, admission=False)), asyncio.run(run(args, admission=True))]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'admission':<11}{'admin p50':>11}{'admin p99':>11}{'admin max':>11}{'public ok/s':>13}{'public 429':>12}")
+    print("-" * 69)
+    for r in results:
+        print(
+            f"{'on' if r['admission'] else 'off':<11}{r['admin_p50_ms']:>9.1f}ms{r['admin_p99_ms']:>9.1f}ms"
+            f"{r['admin_max_ms']:>9.1f}ms{r['public_ok_per_s']:>13.0f}{r['public_statuses'].get(429, 0):>12}"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    main()
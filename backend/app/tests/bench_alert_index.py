@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Benchmark point-in-polygon lookups against the active alert index.
+
+Builds N synthetic alerts (jagged coastal polygons with --vertices vertices
+each) along the Indian coastline and answers M random device locations,
+mostly near the coast, with:
+  * naive - loop over every alert polygon, unprepared shapely contains
+  * index - app.alert_index.ActiveAlertIndex.lookup (STRtree + prepared)
+
+No database is needed. Reported: lookups/sec and p50/p99 latency per mode,
+plus how many lookups hit at least one alert.
+
+Usage:
+    SUPABASE_JWT_SECRET=x DATABASE_URL=postgresql://localhost/x \\
+        python -m app.tests.bench_alert_index --alerts 10,100,1000 --lookups 100000
+"""
+
+import argparse
+import json
+import math
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from shapely.geometry import Point
+
+from app.alert_index import ActiveAlertIndex
+from app.geometry import to_shapely, to_wkb
+
+COAST = [(68.7, 23.0), (72.8, 19.0), (74.8, 12.9), (76.9, 8.3), (80.2, 13.1), (82.3, 17.0), (87.0, 20.5)]
+
+
+def coast_point(rng: random.Random):
+    """A point near the coastline polyline."""
+    i = rng.randrange(len(COAST) - 1)
+    (x0, y0), (x1, y1) = COAST[i], COAST[i + 1]
+    t = rng.random()
+    return x0 + (x1 - x0) * t + rng.gauss(0, 0.3), y0 + (y1 - y0) * t + rng.gauss(0, 0.3)
+
+
+def alert_polygon(rng: random.Random, vertices: int) -> dict:
+    lon, lat = coast_point(rng)
+    radius = rng.uniform(0.05, 0.6)
+    ring = []
+    for k in range(vertices):
+        angle = 2 * math.pi * k / vertices
+        r = radius * (0.7 + 0.3 * math.sin(5 * angle) + rng.uniform(-0.05, 0.05))
+        ring.append((lon + r * math.cos(angle), lat + r * math.sin(angle)))
+    ring.append(ring[0])
+    return {"type": "Polygon", "coordinates": [ring]}
+
+
+def make_alerts(count: int, vertices: int, rng: random.Random):
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(), severity="WARNING", title="bench", message="bench",
+            created_at=now, expires_at=now + timedelta(hours=1),
+            affected_area=to_wkb(alert_polygon(rng, vertices)),
+        )
+        for _ in range(count)
+    ]
+
+
+def timed(fn, points):
+    samples = []
+    hits = 0
+    start = time.perf_counter()
+    for lon, lat in points:
+        t0 = time.perf_counter()
+        if fn(lon, lat):
+            hits += 1
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "lookups_per_sec": len(points) / elapsed,
+        "p50_us": statistics.median(samples) * 1e6,
+        "p99_us": samples[int(len(samples) * 0.99)] * 1e6,
+        "hits": hits,
+    }
+
+
+def run(sizes, lookups: int, naive_lookups: int, vertices: int, seed: int):
+    results = []
+    for count in sizes:
+        rng = random.Random(seed)
+        alerts = make_alerts(count, vertices, rng)
+        points = [coast_point(rng) for _ in range(lookups)]
+
+        index = ActiveAlertIndex()
+        start = time.perf_counter()
+        index.replace(alerts)
+        build_s = time.perf_counter() - start
+
+        unprepared = [to_shapely(a.affected_area) for a in alerts]
+
+        def naive(lon, lat):
+            p = Point(lon, lat)
+            return [g for g in unprepared if g.contains(p)]
+
+        results.append({"alerts": count, "mode": "naive", "build_ms": 0.0, **timed(naive, points[:naive_lookups])})
+        results.append({"alerts": count, "mode": "index", "build_ms": build_s * 1000, **timed(index.lookup, points)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--alerts", default="10,100,1000", help="comma-separated active alert counts")
+    parser.add_argument("--lookups", type=int, default=100000)
+    parser.add_argument("--naive-lookups", type=int, default=5000, help="the naive loop is slow; sample fewer")
+    parser.add_argument("--vertices", type=int, default=500, help="vertices per alert polygon")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.alerts.split(",")]
+    results = run(sizes, args.lookups, args.naive_lookups, args.vertices, args.seed)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'alerts':>8}  {'mode':<7}{'build (ms)':>12}{'lookups/s':>14}{'p50 (us)':>10}{'p99 (us)':>10}{'hit %':>8}")
+    print("-" * 71)
+    for r in results:
+        total = args.naive_lookups if r["mode"] == "naive" else args.lookups
+        print(
+            f"{r['alerts']:>8}  {r['mode']:<7}{r['build_ms']:>12.1f}{r['lookups_per_sec']:>14,.0f}"
+            f"{r['p50_us']:>10.1f}{r['p99_us']:>10.1f}{100 * r['hits'] / total:>8.1f}"
+        )
+    print()
+
+
+if __name__ == "__main__":
+    main()
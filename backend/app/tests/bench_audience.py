@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark alert audience resolution on a synthetic profiles table.
+
+Builds `bench_audience.profiles` with N random devices across the Indian
+coastline bounding box, then compares, for a complex coastline polygon:
+  * legacy    - unindexed ST_Within over the whole polygon, fetchall()
+  * streaming - app.audience (GiST index + ST_Subdivide + server-side cursor)
+
+Reported per table size: time to first token batch, total time, tokens.
+The schema is dropped at the end unless --keep is given.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m app.tests.bench_audience --rows 100000,1000000
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import text
+
+load_dotenv()
+
+from app.audience import stream_push_tokens  # noqa: E402
+from app.database import async_database_url  # noqa: E402
+
+SCHEMA = "bench_audience"
+LEGACY_SQL = text("""
+    SELECT push_token
+    FROM profiles
+    WHERE push_token IS NOT NULL
+    AND ST_Within(last_known_location, ST_GeomFromGeoJSON(:affected_area))
+""")
+
+
+def coastline_polygon(vertices: int = 2000) -> str:
+    """A thin, jagged strip along the Kerala coast with many vertices."""
+    random.seed(42)
+    lat0, lat1 = 8.0, 12.5
+    west = []
+    for i in range(vertices):
+        lat = lat0 + (lat1 - lat0) * i / (vertices - 1)
+        lon = 75.0 + 0.6 * (lat - lat0) / (lat1 - lat0) + 0.05 * math.sin(i / 3) + random.uniform(-0.02, 0.02)
+        west.append((lon, lat))
+    east = [(lon + 0.4, lat) for lon, lat in reversed(west)]
+    ring = west + east + [west[0]]
+    return json.dumps({"type": "Polygon", "coordinates": [ring]})
+
+
+def build_table(sync_engine, rows: int):
+    with sync_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"""
+            CREATE TABLE {SCHEMA}.profiles (
+                id UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+                push_token VARCHAR,
+                last_known_location geometry(POINT, 4326)
+            )
+        """))
+        conn.execute(text(f"""
+            INSERT INTO {SCHEMA}.profiles (push_token, last_known_location)
+            SELECT 'ExponentPushToken[' || g || ']',
+                   ST_SetSRID(ST_MakePoint(68 + random() * 22, 6 + random() * 18), 4326)
+            FROM generate_series(1, :rows) AS g
+        """), {"rows": rows})
+    with sync_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.profiles"))
+
+
+async def measure_legacy(engine, area: str) -> dict:
+    start = time.perf_counter()
+    async with engine.connect() as conn:
+        tokens = [row[0] for row in (await conn.execute(LEGACY_SQL, {"affected_area": area})).fetchall()]
+    elapsed = time.perf_counter() - start
+    return {"first_batch_s": elapsed, "total_s": elapsed, "tokens": len(tokens)}
+
+
+async def measure_streaming(engine, area: str, batch_size: int) -> dict:
+    start = time.perf_counter()
+    first = None
+    count = 0
+    async for batch in stream_push_tokens(area, batch_size=batch_size, engine=engine):
+        if first is None:
+            first = time.perf_counter() - start
+        count += len(batch)
+    return {"first_batch_s": first or 0.0, "total_s": time.perf_counter() - start, "tokens": count}
+
+
+async def run(sizes, batch_size: int, keep: bool):
+    url = os.getenv("DATABASE_URL")
+    sync_engine = create_engine(url)
+    engine = create_async_engine(
+        async_database_url(url),
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    area = coastline_polygon()
+    results = []
+    try:
+        for rows in sizes:
+            build_table(sync_engine, rows)
+            results.append({"rows": rows, "mode": "legacy", **await measure_legacy(engine, area)})
+            with sync_engine.begin() as conn:
+                conn.execute(text(f"CREATE INDEX ON {SCHEMA}.profiles USING GIST (last_known_location)"))
+                conn.execute(text(f"ANALYZE {SCHEMA}.profiles"))
+            results.append({"rows": rows, "mode": "streaming", **await measure_streaming(engine, area, batch_size)})
+    finally:
+        await engine.dispose()
+        if not keep:
+            with sync_engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        sync_engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="1000000", help="comma-separated table sizes")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--keep", action="store_true", help="keep the bench schema afterwards")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.rows.split(",")]
+    results = asyncio.run(run(sizes, args.batch_size, args.keep))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'rows':>10}  {'mode':<10}{'first batch (ms)':>18}{'total (ms)':>12}{'tokens':>10}")
+    print("-" * 62)
+    for r in results:
+        print(f"{r['rows']:>10}  {r['mode']:<10}{r['first_batch_s'] * 1000:>18.1f}{r['total_s'] * 1000:>12.1f}{r['tokens']:>10}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of per-request auth overhead.
+
+Compares the old get_current_user (python-jose decode + print of the payload
+on every call) with the current verify_token path:
+  * legacy - decode and verify every time, print payload
+  * miss   - verify_token with an empty cache (decode + cache insert)
+  * hit    - verify_token with a warm cache (digest + LRU lookup)
+
+Tokens are minted with app/tests/gen_jwt.py for all three roles.
+
+Usage:
+    python -m app.tests.bench_auth --users 1000 --requests 100000
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import random
+import time
+
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+from jose import jwt  # noqa: E402
+
+from app.dependencies.auth import SUPABASE_JWT_SECRET, token_cache, verify_token  # noqa: E402
+from app.tests.gen_jwt import ROLES, mint_token  # noqa: E402
+
+
+def legacy_get_current_user(token: str):
+    """The pre-cache implementation, kept here for comparison."""
+    payload = jwt.decode(
+        token,
+        SUPABASE_JWT_SECRET,
+        algorithms=["HS256"],
+        audience="authenticated",
+        options={"verify_signature": True, "verify_exp": True},
+    )
+    print("✅ DECODED PAYLOAD ON BACKEND:", payload)
+    return {"user_id": payload.get("sub"), "user_role": payload.get("user_role")}
+
+
+def timed(fn, tokens, requests: int, before_each=None) -> float:
+    """Mean microseconds per call."""
+    total = 0.0
+    for i in range(requests):
+        token = tokens[i % len(tokens)]
+        if before_each:
+            before_each()
+        start = time.perf_counter()
+        fn(token)
+        total += time.perf_counter() - start
+    return total / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=1000, help="distinct tokens in rotation")
+    parser.add_argument("--requests", type=int, default=100000)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    tokens = [mint_token(random.choice(ROLES), secret=SUPABASE_JWT_SECRET) for _ in range(args.users)]
+    random.shuffle(tokens)
+
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        legacy = timed(legacy_get_current_user, tokens, args.requests)
+
+    miss = timed(verify_token, tokens, args.requests, before_each=token_cache.clear)
+
+    token_cache.clear()
+    for token in tokens:
+        verify_token(token)
+    hit = timed(verify_token, tokens, args.requests)
+
+    results = {"legacy_us": legacy, "miss_us": miss, "hit_us": hit, "speedup_hit": legacy / hit}
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'path':<10}{'us/request':>14}")
+    print("-" * 24)
+    print(f"{'legacy':<10}{legacy:>14.2f}")
+    print(f"{'miss':<10}{miss:>14.2f}")
+    print(f"{'hit':<10}{hit:>14.2f}")
+    print(f"\ncache hit is {results['speedup_hit']:.1f}x faster than legacy\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Replay synthetic citizen reports through the correlation engine.
+
+Generates N reports over several days: bursts around random coastal
+hotspots (real hazard events) mixed with uniform background noise, with a
+realistic role mix. Each report is inserted with CorrelationEngine.assign()
+and the per-insert latency is recorded. No database is needed.
+
+Usage:
+    python -m app.tests.bench_correlation --reports 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+os.environ.setdefault("SUPABASE_JWT_SECRET", "bench-secret")
+
+from app.correlation import CorrelationEngine, CorrelationResult  # noqa: E402
+
+HAZARDS = ["HIGH_WAVES", "SWELL_SURGE", "COASTAL_FLOODING", "UNUSUAL_TIDE", "TSUNAMI_SIGHTING", "OTHER"]
+ROLES = [("PUBLIC", 0.85), ("VERIFIED_VOLUNTEER", 0.12), ("OFFICIAL", 0.03)]
+# Rough points along the Indian coastline (lon, lat)
+COAST = [(72.8, 19.0), (73.8, 15.5), (74.8, 12.9), (76.2, 9.9), (77.5, 8.1),
+         (79.8, 11.9), (80.3, 13.1), (82.2, 16.9), (83.3, 17.7), (85.8, 19.8), (87.9, 21.6)]
+
+
+def synthetic_reports(n: int, days: float, hotspots: int, noise: float, seed: int = 7):
+    rng = random.Random(seed)
+    start = datetime(2025, 10, 1)
+    span = timedelta(days=days).total_seconds()
+    events = []
+    for _ in range(hotspots):
+        lon, lat = rng.choice(COAST)
+        events.append((lon + rng.uniform(-0.5, 0.5), lat + rng.uniform(-0.5, 0.5),
+                       rng.uniform(0, span), rng.choice(HAZARDS)))
+    roles, weights = zip(*ROLES)
+    reports = []
+    for _ in range(n):
+        if rng.random() < noise:
+            lon, lat = rng.choice(COAST)
+            lon += rng.uniform(-2, 2)
+            lat += rng.uniform(-2, 2)
+            t = rng.uniform(0, span)
+            hazard = rng.choice(HAZARDS)
+        else:
+            elon, elat, et, hazard = rng.choice(events)
+            lon = elon + rng.gauss(0, 0.005)  # ~500 m spread
+            lat = elat + rng.gauss(0, 0.005)
+            t = et + abs(rng.gauss(0, 3600))
+        reports.append((uuid.uuid4(), lon, lat, start + timedelta(seconds=t), hazard,
+                        rng.choices(roles, weights)[0]))
+    reports.sort(key=lambda r: r[3])
+    return reports
+
+
+def percentile(ordered, pct):
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reports", type=int, default=100000)
+    parser.add_argument("--days", type=float, default=7.0)
+    parser.add_argument("--hotspots", type=int, default=400)
+    parser.add_argument("--noise", type=float, default=0.3, help="fraction of uncorrelated reports")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    reports = synthetic_reports(args.reports, args.days, args.hotspots, args.noise)
+    engine = CorrelationEngine()
+    latencies = []
+    clustered = 0
+    events = {}
+    merged = set()
+
+    for report in reports:
+        result = CorrelationResult()
+        start = time.perf_counter()
+        engine.assign(*report, result=result)
+        latencies.append(time.perf_counter() - start)
+        merged.update(result.merged)
+        events.update(result.touched)
+        clustered += result.inserted[0].cluster is not None
+
+    latencies.sort()
+    total = sum(latencies)
+    results = {
+        "reports": len(reports),
+        "events": len(events.keys() - merged),
+        "single_report_events": sum(1 for k, c in events.items() if k not in merged and c.report_count == 1),
+        "clustered_on_insert": clustered,
+        "merges": len(merged),
+        "window_points_at_end": len(engine),
+        "inserts_per_sec": len(reports) / total,
+        "p50_us": percentile(latencies, 0.50) * 1e6,
+        "p95_us": percentile(latencies, 0.95) * 1e6,
+        "p99_us": percentile(latencies, 0.99) * 1e6,
+        "max_us": latencies[-1] * 1e6,
+    }
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print()
+    for key, value in results.items():
+        print(f"{key:<22}{value:>14.1f}" if isinstance(value, float) else f"{key:<22}{value:>14}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark request throughput for the three database modes:
+  * nullpool - new PostgreSQL connection per request (old behaviour)
+  * pooled   - sync QueuePool engine, requests run on a thread pool
+  * async    - asyncpg engine with AsyncSession, requests run on the event loop
+
+Each simulated request checks out a session, runs the profile lookup used by
+PATCH /api/me/profile and closes the session.
+
+Usage:
+    DATABASE_URL=postgresql://... python -m app.tests.bench_db --concurrency 32 --duration 10
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import sessionmaker
+
+load_dotenv()
+
+from app.database import make_async_engine, make_engine  # noqa: E402
+
+QUERY = text("SELECT id, role FROM profiles WHERE id = CAST(:id AS uuid)")
+PROFILE_ID = "ac633484-1e8a-4221-8697-afc5dddaee22"
+
+
+def bench_sync(label: str, pool_mode: str, concurrency: int, duration: float) -> dict:
+    engine = make_engine(os.getenv("DATABASE_URL"), pool_mode=pool_mode)
+    Session = sessionmaker(bind=engine)
+    deadline = time.perf_counter() + duration
+
+    def worker() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            with Session() as db:
+                db.execute(QUERY, {"id": PROFILE_ID}).first()
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        total = sum(pool.map(lambda _: worker(), range(concurrency)))
+    elapsed = time.perf_counter() - start
+    engine.dispose()
+    return {"mode": label, "requests": total, "rps": total / elapsed}
+
+
+async def bench_async(concurrency: int, duration: float) -> dict:
+    engine = make_async_engine(os.getenv("DATABASE_URL"), pool_mode="queue")
+    Session = async_sessionmaker(engine, expire_on_commit=False)
+    deadline = time.perf_counter() + duration
+
+    async def worker() -> int:
+        done = 0
+        while time.perf_counter() < deadline:
+            async with Session() as db:
+                (await db.execute(QUERY, {"id": PROFILE_ID})).first()
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    total = sum(await asyncio.gather(*(worker() for _ in range(concurrency))))
+    elapsed = time.perf_counter() - start
+    await engine.dispose()
+    return {"mode": "async", "requests": total, "rps": total / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = [
+        bench_sync("nullpool", "null", args.concurrency, args.duration),
+        bench_sync("pooled", "queue", args.concurrency, args.duration),
+        asyncio.run(bench_async(args.concurrency, args.duration)),
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'mode':<10}{'requests':>12}{'req/s':>12}")
+    print("-" * 34)
+    for r in results:
+        print(f"{r['mode']:<10}{r['requests']:>12}{r['rps']:>12.1f}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
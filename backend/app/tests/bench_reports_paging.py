@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Benchmark GET /api/reports paging: keyset vs OFFSET latency at page N.
+
+Builds `bench_reports.citizen_reports` (same columns as the real table, same
+indexes as migrations/0006) with N synthetic reports spread over a year and
+the Indian coastline, then times the query built by
+app.routers.reports.report_query for a list of page numbers:
+  * offset - ORDER BY created_at DESC, id DESC OFFSET page*limit LIMIT limit
+  * keyset - same ORDER BY, WHERE (created_at, id) < cursor LIMIT limit
+
+The keyset cursor for page N is looked up once, outside the timed loop, the
+way a client would hold it after paging there. Each query is repeated and the
+median is reported. Optional --hazard-type / --bbox apply the same filters to
+both modes. The schema is dropped at the end unless --keep is given.
+
+Requires the public schema to be migrated (the bench table copies
+public.citizen_reports and its enum types).
+
+Usage:
+    DATABASE_URL=postgresql://... python -m app.tests.bench_reports_paging --rows 1000000 --pages 1,10,100,1000
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import text
+
+load_dotenv()
+
+from app.database import async_database_url  # noqa: E402
+from app.routers.reports import parse_bbox, report_query  # noqa: E402
+
+SCHEMA = "bench_reports"
+
+
+def build_table(sync_engine, rows: int):
+    with sync_engine.begin() as conn:
+        conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        conn.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        conn.execute(text(f"CREATE TABLE {SCHEMA}.citizen_reports (LIKE public.citizen_reports INCLUDING DEFAULTS)"))
+        conn.execute(text(f"""
+            INSERT INTO {SCHEMA}.citizen_reports (id, user_id, hazard_type, location, created_at, user_role)
+            SELECT uuid_generate_v4(), uuid_generate_v4(),
+                   (enum_range(NULL::hazard_type_enum))[1 + floor(random() * 6)::int],
+                   ST_SetSRID(ST_MakePoint(68 + random() * 22, 6 + random() * 18), 4326),
+                   now() - random() * interval '365 days',
+                   (enum_range(NULL::user_role_enum))[1 + floor(random() * 3)::int]
+            FROM generate_series(1, :rows)
+        """), {"rows": rows})
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.citizen_reports (created_at DESC, id DESC)"))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.citizen_reports (hazard_type, created_at DESC, id DESC)"))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.citizen_reports (user_role, created_at DESC, id DESC)"))
+        conn.execute(text(f"CREATE INDEX ON {SCHEMA}.citizen_reports USING GIST (location)"))
+    with sync_engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text(f"VACUUM ANALYZE {SCHEMA}.citizen_reports"))
+
+
+async def timed(conn, stmt, repeat: int) -> dict:
+    samples = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = len((await conn.execute(stmt)).all())
+        samples.append(time.perf_counter() - start)
+    return {"median_ms": statistics.median(samples) * 1000, "max_ms": max(samples) * 1000, "rows": rows}
+
+
+async def measure(engine, pages, limit: int, repeat: int, filters: dict) -> list:
+    results = []
+    async with engine.connect() as conn:
+        base = report_query(**filters)
+        for page in pages:
+            offset = page * limit
+            anchor = (await conn.execute(base.offset(offset - 1).limit(1))).first() if offset else None
+            if offset and anchor is None:
+                print(f"page {page} is past the end of the table, skipping")
+                continue
+            results.append({"page": page, "mode": "offset", **await timed(conn, base.offset(offset).limit(limit), repeat)})
+            keyset = report_query(**filters, after=(anchor.created_at, anchor.id) if anchor else None)
+            results.append({"page": page, "mode": "keyset", **await timed(conn, keyset.limit(limit), repeat)})
+    return results
+
+
+async def run(rows: int, pages, limit: int, repeat: int, filters: dict, keep: bool):
+    url = os.getenv("DATABASE_URL")
+    sync_engine = create_engine(url)
+    engine = create_async_engine(
+        async_database_url(url),
+        connect_args={"server_settings": {"search_path": f"{SCHEMA},public"}},
+    )
+    try:
+        build_table(sync_engine, rows)
+        return await measure(engine, pages, limit, repeat, filters)
+    finally:
+        await engine.dispose()
+        if not keep:
+            with sync_engine.begin() as conn:
+                conn.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        sync_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--pages", default="0,10,100,1000,5000", help="comma-separated page numbers (0-based)")
+    parser.add_argument("--limit", type=int, default=100, help="page size")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--hazard-type", help="filter, e.g. COASTAL_FLOODING")
+    parser.add_argument("--bbox", help="filter, min_lon,min_lat,max_lon,max_lat")
+    parser.add_argument("--keep", action="store_true", help="keep the bench schema afterwards")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    filters = {}
+    if args.hazard_type:
+        filters["hazard_type"] = args.hazard_type
+    if args.bbox:
+        filters["bbox"] = parse_bbox(args.bbox)
+    pages = [int(p) for p in args.pages.split(",")]
+    results = asyncio.run(run(args.rows, pages, args.limit, args.repeat, filters, args.keep))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\nrows={args.rows} limit={args.limit} filters={filters or 'none'}")
+    print(f"{'page':>8}  {'mode':<8}{'median (ms)':>14}{'max (ms)':>12}{'rows':>8}")
+    print("-" * 52)
+    for r in results:
+        print(f"{r['page']:>8}  {r['mode']:<8}{r['median_ms']:>14.2f}{r['max_ms']:>12.2f}{r['rows']:>8}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark response serialization cost for 1k-row report/alert/feedback lists.
+
+Rows are ORM-shaped objects carrying what a select hands back (UUIDs, naive
+datetimes, enums, geometry as EWKB WKBElements). Modes:
+  * default - what FastAPI does for response_model endpoints: build the
+              pydantic models from attributes, run fastapi.routing.serialize_response
+              against the response field, render with JSONResponse
+  * fast    - app.serializers.serialize_* + FastJSONResponse (orjson)
+
+Both outputs are parsed and compared before timing, so a mismatch fails
+loudly. No database is needed.
+
+Usage:
+    SUPABASE_JWT_SECRET=x DATABASE_URL=postgresql://localhost/x \\
+        python -m app.tests.bench_serialization --rows 1000 --repeat 50
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import List
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from app.geometry import to_wkb
+from app.models import AlertSeverityEnum, HazardTypeEnum, UserRoleEnum
+from app.schemas import AlertResponse, AnalystFeedbackResponse, CitizenReportResponse
+from app.serializers import FastJSONResponse, serialize_alerts, serialize_feedback, serialize_reports
+
+
+def make_reports(n: int, rng: random.Random):
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(), user_id=uuid.uuid4(), hazard_type=rng.choice(list(HazardTypeEnum)),
+            description="Waves over the sea wall near the fish market",
+            location=to_wkb({"type": "Point", "coordinates": [rng.uniform(68, 88), rng.uniform(8, 23)]}),
+            media_urls=["https://example.com/media/1.jpg"], created_at=now - timedelta(seconds=i),
+            user_role=UserRoleEnum.PUBLIC,
+        )
+        for i in range(n)
+    ]
+
+
+def make_alerts(n: int, rng: random.Random, vertices: int = 64):
+    now = datetime.utcnow()
+    alerts = []
+    for i in range(n):
+        lon, lat, r = rng.uniform(68, 88), rng.uniform(8, 23), rng.uniform(0.05, 0.5)
+        ring = [[lon + r * math.cos(2 * math.pi * k / vertices), lat + r * math.sin(2 * math.pi * k / vertices)]
+                for k in range(vertices)]
+        ring.append(ring[0])
+        alerts.append(SimpleNamespace(
+            id=uuid.uuid4(), severity=AlertSeverityEnum.WARNING, title="High waves", message="Stay away from the shore",
+            affected_area=to_wkb({"type": "Polygon", "coordinates": [ring]}), created_at=now - timedelta(seconds=i),
+            created_by=uuid.uuid4(), expires_at=now + timedelta(hours=24),
+        ))
+    return alerts
+
+
+def make_feedback(n: int, rng: random.Random):
+    now = datetime.utcnow()
+    return [
+        SimpleNamespace(
+            id=uuid.uuid4(), social_post_id=uuid.uuid4(), action=rng.choice(["CONFIRMED", "DISMISSED"]),
+            correction_data={"hazard_type": "HIGH_WAVES"} if i % 3 == 0 else None,
+            created_by=uuid.uuid4(), created_at=now - timedelta(seconds=i),
+        )
+        for i in range(n)
+    ]
+
+
+def default_path(model, rows) -> bytes:
+    field = create_response_field(name="response", type_=List[model])
+    content = [model.model_validate(r, from_attributes=True) for r in rows]
+    body = asyncio.run(serialize_response(field=field, response_content=content))
+    return JSONResponse(body).body
+
+
+def fast_path(serializer, rows) -> bytes:
+    return FastJSONResponse(serializer(rows)).body
+
+
+def timed(fn, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    return {"p50_ms": statistics.median(samples) * 1000, "p99_ms": samples[int(len(samples) * 0.99)] * 1000}
+
+
+def run(rows: int, repeat: int, seed: int):
+    rng = random.Random(seed)
+    cases = [
+        ("CitizenReportResponse", CitizenReportResponse, serialize_reports, make_reports(rows, rng)),
+        ("AlertResponse", AlertResponse, serialize_alerts, make_alerts(rows, rng)),
+        ("AnalystFeedbackResponse", AnalystFeedbackResponse, serialize_feedback, make_feedback(rows, rng)),
+    ]
+    results = []
+    for name, model, serializer, data in cases:
+        slow, fast = default_path(model, data), fast_path(serializer, data)
+        if json.loads(slow) != json.loads(fast):
+            raise SystemExit(f"{name}: fast path output differs from the pydantic path")
+        base = timed(lambda: default_path(model, data), repeat)
+        quick = timed(lambda: fast_path(serializer, data), repeat)
+        results.append({"model": name, "rows": rows, "mode": "default", "bytes": len(slow), **base})
+        results.append({
+            "model": name, "rows": rows, "mode": "fast", "bytes": len(fast), **quick,
+            "speedup": base["p50_ms"] / quick["p50_ms"],
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = run(args.rows, args.repeat, args.seed)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"\n{'model':<26}{'mode':<9}{'bytes':>10}{'p50 (ms)':>10}{'p99 (ms)':>10}{'speedup':>9}")
+    print("-" * 74)
+    for r in results:
+        speedup = f"{r['speedup']:.1f}x" if "speedup" in r else ""
+        print(f"{r['model']:<26}{r['mode']:<9}{r['bytes']:>10}{r['p50_ms']:>10.2f}{r['p99_ms']:>10.2f}{speedup:>9}")
+    print()
+
+
+if __name__ == "__main__":
+    main()
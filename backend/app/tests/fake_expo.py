@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Local fake of the Expo push API for testing alert fan-out.
+
+Mimics POST /--/api/v2/push/send: returns one ticket per message, with
+configurable latency and failure injection, and POST
+/--/api/v2/push/getReceipts for the tickets it issued. Point the backend at it with
+    EXPO_PUSH_URL=http://127.0.0.1:9090/--/api/v2/push/send
+    EXPO_RECEIPTS_URL=http://127.0.0.1:9090/--/api/v2/push/getReceipts
+    PUSH_RECEIPT_DELAY=0
+
+Usage:
+    python -m app.tests.fake_expo --port 9090 --latency-ms 50 --error-rate 0.05 --http-error-rate 0.02 --receipt-error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from typing import Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Expo Push API")
+
+settings = {"latency_ms": 0.0, "error_rate": 0.0, "http_error_rate": 0.0, "receipt_error_rate": 0.0}
+counters = {"requests": 0, "messages": 0, "ticket_errors": 0, "http_errors": 0, "receipts": 0, "receipt_errors": 0,
+            "started": time.monotonic()}
+tickets_issued: Dict[str, str] = {}  # ticket id -> push token
+
+
+@app.post("/--/api/v2/push/send")
+async def push_send(request: Request):
+    messages: List[Dict] = await request.json()
+    if isinstance(messages, dict):
+        messages = [messages]
+    counters["requests"] += 1
+
+    if settings["latency_ms"]:
+        await asyncio.sleep(settings["latency_ms"] / 1000)
+
+    if random.random() < settings["http_error_rate"]:
+        counters["http_errors"] += 1
+        return JSONResponse({"errors": [{"code": "TOO_MANY_REQUESTS"}]}, status_code=429, headers={"Retry-After": "1"})
+
+    tickets = []
+    for msg in messages:
+        counters["messages"] += 1
+        if random.random() < settings["error_rate"]:
+            counters["ticket_errors"] += 1
+            tickets.append({
+                "status": "error",
+                "message": f"\"{msg.get('to')}\" is not a registered push notification recipient",
+                "details": {"error": "DeviceNotRegistered"},
+            })
+        else:
+            ticket_id = str(uuid.uuid4())
+            tickets_issued[ticket_id] = msg.get("to")
+            tickets.append({"status": "ok", "id": ticket_id})
+    return {"data": tickets}
+
+
+@app.post("/--/api/v2/push/getReceipts")
+async def get_receipts(request: Request):
+    ids: List[str] = (await request.json()).get("ids", [])
+    receipts = {}
+    for ticket_id in ids:
+        token = tickets_issued.pop(ticket_id, None)
+        if token is None:
+            continue  # unknown or already fetched: Expo omits it
+        counters["receipts"] += 1
+        if random.random() < settings["receipt_error_rate"]:
+            counters["receipt_errors"] += 1
+            receipts[ticket_id] = {
+                "status": "error",
+                "message": f"\"{token}\" is not a registered push notification recipient",
+                "details": {"error": "DeviceNotRegistered"},
+            }
+        else:
+            receipts[ticket_id] = {"status": "ok"}
+    return {"data": receipts}
+
+
+@app.get("/stats")
+async def stats():
+    elapsed = time.monotonic() - counters["started"]
+    return {**counters, "messages_per_sec": counters["messages"] / elapsed if elapsed else 0.0}
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9090)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of tickets returned as DeviceNotRegistered")
+    parser.add_argument("--http-error-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--receipt-error-rate", type=float, default=0.0, help="fraction of receipts returned as DeviceNotRegistered")
+    args = parser.parse_args()
+
+    settings.update(latency_ms=args.latency_ms, error_rate=args.error_rate, http_error_rate=args.http_error_rate,
+                    receipt_error_rate=args.receipt_error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
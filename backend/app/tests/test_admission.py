@@ -0,0 +1,135 @@
+import asyncio
+
+import pytest
+
+from app.admission import AdmissionController, AdmissionMiddleware, PriorityLimiter, Rejected, TokenBuckets
+from app.dependencies.auth import SUPABASE_JWT_SECRET
+from app.tests.gen_jwt import mint_token
+
+SHARES = {"PUBLIC": 0.5, "VERIFIED_VOLUNTEER": 0.75, "OFFICIAL": 1.0}
+
+
+def limiter(limit=4, queue_timeout=0.2, max_queue=8):
+    return PriorityLimiter(limit, SHARES, queue_timeout, max_queue)
+
+
+def test_role_ceilings_keep_headroom_for_officials():
+    async def run():
+        lim = limiter(queue_timeout=0)
+        await lim.acquire("PUBLIC")
+        await lim.acquire("PUBLIC")
+        with pytest.raises(Rejected):
+            await lim.acquire("PUBLIC")
+        await lim.acquire("VERIFIED_VOLUNTEER")
+        with pytest.raises(Rejected):
+            await lim.acquire("VERIFIED_VOLUNTEER")
+        await lim.acquire("OFFICIAL")
+        return lim.in_flight
+
+    assert asyncio.run(run()) == 4
+
+
+def test_freed_slot_goes_to_highest_priority_waiter():
+    async def run():
+        lim = limiter(limit=1)
+        await lim.acquire("OFFICIAL")
+        order = []
+
+        async def wait(role):
+            await lim.acquire(role)
+            order.append(role)
+
+        waiters = [asyncio.create_task(wait(role)) for role in ("PUBLIC", "VERIFIED_VOLUNTEER", "OFFICIAL")]
+        await asyncio.sleep(0)
+        lim.release()
+        await asyncio.sleep(0)
+        lim.release()
+        await asyncio.sleep(0)
+        lim.release()
+        await asyncio.gather(*waiters)
+        return order
+
+    assert asyncio.run(run()) == ["OFFICIAL", "VERIFIED_VOLUNTEER", "PUBLIC"]
+
+
+def test_waiter_is_shed_after_queue_timeout():
+    async def run():
+        lim = limiter(limit=1, queue_timeout=0.01)
+        await lim.acquire("OFFICIAL")
+        with pytest.raises(Rejected) as e:
+            await lim.acquire("OFFICIAL")
+        return e.value.reason, lim.queued, lim.in_flight
+
+    assert asyncio.run(run()) == ("overloaded", 0, 1)
+
+
+def test_full_queue_rejects_immediately():
+    async def run():
+        lim = limiter(limit=1, max_queue=1)
+        await lim.acquire("OFFICIAL")
+        waiter = asyncio.create_task(lim.acquire("OFFICIAL"))
+        await asyncio.sleep(0)
+        with pytest.raises(Rejected):
+            await lim.acquire("OFFICIAL")
+        lim.release()
+        await waiter
+        return lim.in_flight
+
+    assert asyncio.run(run()) == 1
+
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def run():
+        lim = limiter(limit=1)
+        await lim.acquire("OFFICIAL")
+        waiter = asyncio.create_task(lim.acquire("OFFICIAL"))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        lim.release()
+        return lim.in_flight, lim.queued
+
+    assert asyncio.run(run()) == (0, 0)
+
+
+def test_token_bucket_refills_at_role_rate():
+    buckets = TokenBuckets({"PUBLIC": 1.0}, {"PUBLIC": 2.0})
+    assert buckets.take("u", "PUBLIC", now=0.0) == 0
+    assert buckets.take("u", "PUBLIC", now=0.0) == 0
+    assert buckets.take("u", "PUBLIC", now=0.0) == pytest.approx(1.0)
+    assert buckets.take("u", "PUBLIC", now=1.0) == 0
+    # Other users have their own bucket
+    assert buckets.take("v", "PUBLIC", now=0.0) == 0
+
+
+def test_user_buckets_only_charge_report_submission():
+    async def ok(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def call(app, method, path, token=None):
+        headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+        scope = {"type": "http", "method": method, "path": path, "headers": headers, "client": ("10.0.0.1", 1234)}
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        await app(scope, None, send)
+        return sent[0]["status"]
+
+    async def run():
+        controller = AdmissionController(limit=8, shares=SHARES, rates={"PUBLIC": 0.001}, bursts={"PUBLIC": 1},
+                                         queue_timeout=0, max_queue=0)
+        app = AdmissionMiddleware(ok, controller)
+        token = mint_token("PUBLIC", secret=SUPABASE_JWT_SECRET)
+        statuses = [await call(app, "GET", "/api/tiles/10/1/1.mvt", token) for _ in range(3)]
+        statuses += [await call(app, "PATCH", "/api/me/profile", token) for _ in range(3)]
+        # Anonymous callers behind one address don't share a bucket
+        statuses += [await call(app, "GET", "/api/alerts/active") for _ in range(3)]
+        submits = [await call(app, "POST", "/api/reports/citizen", token) for _ in range(2)]
+        return statuses, submits
+
+    statuses, submits = asyncio.run(run())
+    assert statuses == [200] * 9
+    assert submits == [200, 429]
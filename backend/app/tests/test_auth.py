@@ -0,0 +1,27 @@
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.dependencies.auth import SUPABASE_JWT_SECRET, verify_token
+from app.tests.gen_jwt import mint_token
+
+
+def test_non_uuid_subject_is_unauthorized():
+    with pytest.raises(HTTPException) as e:
+        verify_token(mint_token("PUBLIC", sub="not-a-uuid", secret=SUPABASE_JWT_SECRET))
+    assert e.value.status_code == 401
+
+
+def test_subject_is_normalized():
+    sub = uuid.uuid4()
+    user = verify_token(mint_token("PUBLIC", sub=str(sub).upper(), secret=SUPABASE_JWT_SECRET))
+    assert user == {"user_id": str(sub), "user_role": "PUBLIC"}
+
+
+def test_rejection_reason_is_in_the_log_message(caplog):
+    caplog.set_level("INFO", logger="app.dependencies.auth")
+    with pytest.raises(HTTPException):
+        verify_token(mint_token("PUBLIC", secret="some-other-secret"))
+    assert caplog.records[-1].getMessage().startswith("JWT rejected: ")
+    assert caplog.records[-1].getMessage() != "JWT rejected: "
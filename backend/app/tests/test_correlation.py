@@ -0,0 +1,157 @@
+# app/tests/test_correlation.py
+
+import uuid
+from datetime import datetime, timedelta
+
+from app.correlation import CorrelationEngine, CorrelationResult
+
+T0 = datetime(2025, 10, 1, 12, 0)
+
+
+def make_engine(**kwargs):
+    return CorrelationEngine(eps_m=2000, window=timedelta(hours=6), min_weight=3,
+                             role_weights={"PUBLIC": 1.0, "VERIFIED_VOLUNTEER": 2.0, "OFFICIAL": 3.0}, **kwargs)
+
+
+def reports(n, lon=72.8, lat=19.0, start=T0, role="VERIFIED_VOLUNTEER", hazard="HIGH_WAVES"):
+    return [
+        (uuid.uuid4(), lon + i * 0.001, lat, start + timedelta(minutes=i), hazard, role)
+        for i in range(n)
+    ]
+
+
+def assign_all(engine, rows):
+    result = CorrelationResult()
+    for row in rows:
+        engine.assign(*row, result=result)
+    return result
+
+
+def only_cluster(engine):
+    assert len(engine.clusters) == 1
+    return next(iter(engine.clusters.values()))
+
+
+def test_replayed_job_does_not_change_counts():
+    engine = make_engine()
+    rows = reports(5)
+    first = assign_all(engine, rows)
+    cluster = only_cluster(engine)
+    assert (cluster.report_count, cluster.total_weight) == (5, 10.0)
+
+    replay = assign_all(engine, rows)
+
+    assert (cluster.report_count, cluster.total_weight) == (5, 10.0)
+    assert len(engine) == 5
+    # The replay re-emits current assignments so a failed persist is repaired
+    assert replay.assignments() == first.assignments()
+    assert cluster.id in replay.touched
+
+
+def test_warm_loaded_queued_report_is_clustered_once():
+    engine = make_engine()
+    rows = reports(3)
+    # warm_start ran while the reports' correlation job was still QUEUED
+    for row in rows:
+        engine.load_point(*row, event_id=None)
+    assert not engine.clusters
+
+    assign_all(engine, rows)
+
+    cluster = only_cluster(engine)
+    assert (cluster.report_count, cluster.total_weight) == (3, 6.0)
+    assert len(engine) == 3
+
+
+def test_load_point_skips_held_reports():
+    engine = make_engine()
+    rows = reports(4)
+    assign_all(engine, rows)
+    cluster = only_cluster(engine)
+    densities = [engine.points[r[0]].density for r in rows]
+
+    for row in rows:
+        engine.load_point(*row, event_id=cluster.id)
+
+    assert len(engine) == 4
+    assert [engine.points[r[0]].density for r in rows] == densities
+
+
+def test_reports_out_of_the_window_are_evicted():
+    engine = make_engine()
+    rows = reports(3)
+    assign_all(engine, rows)
+    cluster = only_cluster(engine)
+
+    later = reports(1, lon=80.0, start=T0 + timedelta(hours=7))
+    result = assign_all(engine, later)
+
+    assert len(engine) == 1
+    assert not any(r[0] in engine.points for r in rows)
+    assert cluster.id in result.expired
+    assert cluster.id not in engine.clusters
+
+
+def test_quiet_period_expires_events_without_new_reports():
+    engine = make_engine()
+    assign_all(engine, reports(3))
+    cluster = only_cluster(engine)
+
+    assert not engine.expire(T0 + timedelta(hours=5)).expired
+    result = engine.expire(T0 + timedelta(hours=7))
+
+    assert result.expired == {cluster.id}
+    assert not engine.clusters and len(engine) == 0
+
+
+def test_expire_drops_restored_events_without_reports_in_the_window():
+    engine = make_engine()
+    event_id = uuid.uuid4()
+    engine.load_event(event_id, "HIGH_WAVES", 4, 8.0, 72.8, 19.0,
+                      T0 - timedelta(hours=9), T0 - timedelta(hours=7), 3)
+
+    result = engine.expire(T0)
+
+    assert result.expired == {event_id}
+    assert event_id not in engine.clusters
+
+
+def test_partly_evicted_cluster_keeps_cumulative_stats():
+    engine = make_engine()
+    early = reports(3)
+    assign_all(engine, early)
+    cluster = only_cluster(engine)
+
+    # Near the same spot, late enough that the first reports leave the window
+    late = reports(3, lon=72.8005, start=T0 + timedelta(hours=5, minutes=59))
+    result = assign_all(engine, late)
+
+    assert cluster.id in engine.clusters
+    assert cluster.id not in result.expired
+    assert (cluster.report_count, cluster.total_weight) == (6, 12.0)
+    assert len(cluster.members) < 6
+
+
+def test_bridging_report_merges_clusters():
+    engine = make_engine()
+    west = reports(3, lon=72.800)
+    east = reports(3, lon=72.830)
+    assign_all(engine, west + east)
+    assert len(engine.clusters) == 2
+    west_cluster = engine.points[west[0][0]].cluster
+    east_cluster = engine.points[east[0][0]].cluster
+
+    bridge = reports(1, lon=72.816, start=T0 + timedelta(minutes=10))
+    result = assign_all(engine, bridge)
+
+    merged = only_cluster(engine)
+    other = east_cluster if merged is west_cluster else west_cluster
+    assert result.merged == {other.id: merged.id}
+    assert (merged.report_count, merged.total_weight) == (7, 14.0)
+    assert {p.cluster for p in engine.points.values()} == {merged}
+
+
+def test_hazard_types_cluster_separately():
+    engine = make_engine()
+    assign_all(engine, reports(3, hazard="HIGH_WAVES") + reports(3, hazard="FLOODING"))
+    assert sorted(c.hazard_type for c in engine.clusters.values()) == ["FLOODING", "HIGH_WAVES"]
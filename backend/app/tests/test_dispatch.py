@@ -0,0 +1,140 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+from app.dispatch import DeliveryProgress, PushDispatcher
+
+
+class FailingSession:
+    """Session whose statements all raise, as during a database outage."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def merge(self, *args, **kwargs):
+        raise ConnectionError("database unavailable")
+
+    async def execute(self, *args, **kwargs):
+        raise ConnectionError("database unavailable")
+
+    async def commit(self):
+        raise ConnectionError("database unavailable")
+
+
+async def tokens(n):
+    for i in range(n):
+        yield f"ExponentPushToken[{i}]"
+
+
+def make_dispatcher():
+    dispatcher = PushDispatcher(concurrency=1, session_factory=FailingSession)
+    dispatcher.queue = asyncio.Queue(maxsize=4)
+
+    async def send(message, chunk):
+        return [{"status": "ok", "id": str(uuid.uuid4())} for _ in chunk]
+
+    dispatcher._send_with_retry = send
+    return dispatcher
+
+
+def test_failed_start_record_does_not_leak_progress():
+    async def run():
+        dispatcher = make_dispatcher()
+        progress = dispatcher.dispatch(uuid.uuid4(), {"title": "t"}, tokens(3))
+        await asyncio.gather(*dispatcher._producers, return_exceptions=True)
+        return dispatcher, progress
+
+    dispatcher, progress = asyncio.run(run())
+    assert not progress.producing
+    assert progress.finished
+    assert progress.error
+    assert dispatcher.progress == {}
+
+
+def test_worker_survives_database_errors():
+    async def run():
+        dispatcher = make_dispatcher()
+        worker = asyncio.create_task(dispatcher._worker())
+        alerts = []
+        for _ in range(2):
+            alert_id = uuid.uuid4()
+            progress = DeliveryProgress(alert_id=alert_id, producing=False)
+            dispatcher.progress[alert_id] = progress
+            await dispatcher._enqueue(progress, {"title": "t"}, ["ExponentPushToken[0]"])
+            alerts.append(progress)
+        await asyncio.wait_for(dispatcher.queue.join(), timeout=5)
+        await asyncio.sleep(0)
+        alive = not worker.done()
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        return dispatcher, alerts, alive
+
+    dispatcher, alerts, alive = asyncio.run(run())
+    assert alive
+    assert all(p.finished for p in alerts)
+    assert dispatcher.progress == {}
+
+
+class RecordingSession:
+    """Session that logs what it runs and whether it is open; the claim returns `due`."""
+
+    log = []
+    open = 0
+    due = []
+
+    async def __aenter__(self):
+        RecordingSession.open += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        RecordingSession.open -= 1
+        return False
+
+    async def execute(self, statement, params=None):
+        RecordingSession.log.append(("execute", str(statement).split()[0], params))
+        return self
+
+    def all(self):
+        return RecordingSession.due
+
+    async def commit(self):
+        RecordingSession.log.append(("commit", None, None))
+
+
+class FakeReceiptsClient:
+    def __init__(self, data):
+        self.data = data
+
+    async def post(self, url, json):
+        RecordingSession.log.append(("post", RecordingSession.open, json["ids"]))
+        return self
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"data": self.data}
+
+
+def test_receipts_are_fetched_outside_the_claim_transaction():
+    ok, gone, pending = (SimpleNamespace(id=uuid.uuid4(), ticket_id=t, push_token=f"ExponentPushToken[{t}]", expired=False)
+                         for t in ("a", "b", "c"))
+    RecordingSession.log, RecordingSession.open, RecordingSession.due = [], 0, [ok, gone, pending]
+    dispatcher = PushDispatcher(session_factory=RecordingSession)
+    dispatcher._client = FakeReceiptsClient({
+        "a": {"status": "ok"},
+        "b": {"status": "error", "message": "gone", "details": {"error": "DeviceNotRegistered"}},
+    })
+
+    checked = asyncio.run(dispatcher.check_receipts())
+
+    steps = [(kind, what) for kind, what, _ in RecordingSession.log]
+    assert steps == [("execute", "UPDATE"), ("commit", None), ("post", 0),
+                     ("execute", "UPDATE"), ("execute", "UPDATE"), ("commit", None)]
+    assert checked == 3
+    # The receipt still pending is left for a later poll
+    assert [row["id"] for row in RecordingSession.log[3][2]] == [ok.id, gone.id]
+    assert (dispatcher.receipts_ok, dispatcher.receipts_failed) == (1, 1)
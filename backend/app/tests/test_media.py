@@ -0,0 +1,44 @@
+import asyncio
+import hashlib
+
+from app.media import LocalMediaStore
+
+USER = "8f14e45f-ceea-467f-a0e6-0f8d2f3b1c5e"
+DATA = b"\x00\x01" * 5000
+
+
+async def body(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_retried_final_chunk_gets_the_stored_object(tmp_path):
+    async def run():
+        store = LocalMediaStore(root=str(tmp_path))
+        await store.start()
+        session = await store.create(USER, len(DATA), "video/mp4")
+        half = len(DATA) // 2
+        await store.append(session.upload_id, USER, 0, body(DATA[:half]))
+        first = await store.append(session.upload_id, USER, half, body(DATA[half:]))
+        # The response was lost; the client sends the same chunk again
+        replay = await store.append(session.upload_id, USER, half, body(DATA[half:]))
+        return store, session, first, replay
+
+    store, session, first, replay = asyncio.run(run())
+    assert first[1] is not None
+    assert replay[1] == first[1]
+    assert replay[1].sha256 == hashlib.sha256(DATA).hexdigest()
+    assert store.stats()["uploads_completed"] == 1
+
+
+def test_completed_upload_is_private_to_its_user(tmp_path):
+    async def run():
+        store = LocalMediaStore(root=str(tmp_path))
+        await store.start()
+        session = await store.create(USER, len(DATA), "video/mp4")
+        await store.append(session.upload_id, USER, 0, body(DATA))
+        return await store.completed(session.upload_id, "someone-else"), await store.completed(session.upload_id, USER)
+
+    other, own = asyncio.run(run())
+    assert other is None
+    assert own is not None and own[1].size == len(DATA)
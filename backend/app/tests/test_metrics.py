@@ -0,0 +1,57 @@
+import asyncio
+
+from app.metrics import MetricsMiddleware, current_stats, detached
+
+
+def call(app, path="/api/alerts"):
+    scope = {"type": "http", "method": "POST", "path": path, "headers": []}
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    return MetricsMiddleware(app)(scope, receive, send)
+
+
+async def respond(send):
+    await send({"type": "http.response.start", "status": 202, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def test_detached_task_does_not_see_request_stats():
+    seen = {}
+
+    async def background():
+        seen["stats"] = current_stats()
+
+    async def app(scope, receive, send):
+        seen["request"] = current_stats()
+        await asyncio.create_task(detached(background()))
+        await respond(send)
+
+    asyncio.run(call(app))
+    assert seen["request"] is not None
+    assert seen["stats"] is None
+
+
+def test_task_outliving_request_stops_counting_towards_it():
+    seen = {}
+    started = []
+
+    async def app(scope, receive, send):
+        async def background():
+            await asyncio.sleep(0.01)
+            seen["stats"] = current_stats()
+
+        started.append(asyncio.create_task(background()))
+        await respond(send)
+
+    async def run():
+        await call(app)
+        await started[0]
+
+    asyncio.run(run())
+    assert seen["stats"] is None
@@ -0,0 +1,67 @@
+import asyncio
+import uuid
+
+import pytest
+from fastapi import HTTPException
+
+from app.profile_buffer import PendingUpdate, ProfileWriteBuffer
+from app.routers.user import update_profile
+from app.schemas import ProfileUpdate
+
+
+def test_submit_refuses_non_uuid_user_id():
+    buffer = ProfileWriteBuffer()
+    with pytest.raises(ValueError):
+        buffer.submit("not-a-uuid", push_token="token")
+    assert buffer.stats()["pending"] == 0
+
+
+def test_submit_coalesces_ids_in_any_case():
+    buffer = ProfileWriteBuffer()
+    user_id = uuid.uuid4()
+    buffer.submit(str(user_id), push_token="a")
+    buffer.submit(str(user_id).upper(), push_token="b")
+    assert buffer.stats()["pending"] == 1
+    assert buffer.stats()["coalesced"] == 1
+
+
+def test_write_skips_invalid_ids_without_failing():
+    buffer = ProfileWriteBuffer()
+    # e.g. queued before submit() validated ids
+    buffer._pending["not-a-uuid"] = PendingUpdate(push_token="token")
+    # Nothing valid left to write: no database round trip, no error, nothing re-queued
+    assert asyncio.run(buffer.flush()) == 1
+    assert buffer.stats()["pending"] == 0
+
+
+class ProfileLookups:
+    """AsyncSession stand-in answering profile existence checks."""
+
+    def __init__(self, exists):
+        self.exists = exists
+        self.lookups = 0
+
+    async def scalar(self, statement):
+        self.lookups += 1
+        return uuid.uuid4() if self.exists else None
+
+
+def test_buffered_update_for_missing_profile_is_404(monkeypatch):
+    buffer = ProfileWriteBuffer()
+    monkeypatch.setattr("app.routers.user.profile_buffer", buffer)
+    user = {"user_id": str(uuid.uuid4()), "user_role": "PUBLIC"}
+    with pytest.raises(HTTPException) as e:
+        asyncio.run(update_profile(ProfileUpdate(push_token="t"), user, ProfileLookups(exists=False)))
+    assert e.value.status_code == 404
+    assert buffer.stats()["pending"] == 0
+
+
+def test_profile_existence_is_checked_once_per_user(monkeypatch):
+    buffer = ProfileWriteBuffer()
+    monkeypatch.setattr("app.routers.user.profile_buffer", buffer)
+    user = {"user_id": str(uuid.uuid4()), "user_role": "PUBLIC"}
+    db = ProfileLookups(exists=True)
+    for token in ("a", "b", "c"):
+        asyncio.run(update_profile(ProfileUpdate(push_token=token), user, db))
+    assert db.lookups == 1
+    assert buffer.stats()["pending"] == 1
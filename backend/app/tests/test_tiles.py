@@ -0,0 +1,92 @@
+import asyncio
+
+import pytest
+
+from app import tiles
+from app.tiles import TileCache
+
+
+@pytest.fixture
+def renders(monkeypatch):
+    """Replace render_tile with one the test releases per key; yields the gates."""
+    gates = {}
+    versions = {}
+
+    async def render(z, x, y):
+        key = (z, x, y)
+        gate = gates.setdefault(key, asyncio.Event())
+        await gate.wait()
+        versions[key] = versions.get(key, 0) + 1
+        return f"{key}-v{versions[key]}".encode()
+
+    monkeypatch.setattr(tiles, "render_tile", render)
+    return gates
+
+
+A = (10, 1, 1)
+B = (10, 2, 2)
+
+
+async def rendering(gates, key):
+    """Wait until a render of `key` has started (the disk lookup runs in a thread)."""
+    while key not in gates:
+        await asyncio.sleep(0.001)
+
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_invalidation_of_other_tile_keeps_inflight_render(renders, tmp_path, disk):
+    async def run():
+        cache = TileCache(cache_dir=str(tmp_path) if disk else "")
+        pending = asyncio.create_task(cache.get(A))
+        await rendering(renders, A)
+        await cache.invalidate([B])
+        renders[A].set()
+        await pending
+        return await cache.get(A)
+
+    tile, source = asyncio.run(run())
+    assert source == "memory"
+    assert tile == b"(10, 1, 1)-v1"
+
+
+@pytest.mark.parametrize("disk", [False, True])
+def test_invalidation_during_render_discards_it(renders, tmp_path, disk):
+    async def run():
+        cache = TileCache(cache_dir=str(tmp_path) if disk else "")
+        pending = asyncio.create_task(cache.get(A))
+        await rendering(renders, A)
+        await cache.invalidate([A])
+        renders[A].set()
+        first = await pending
+        second = await cache.get(A)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == (b"(10, 1, 1)-v1", "render")
+    # The overlapping render was served but not cached
+    assert second == (b"(10, 1, 1)-v2", "render")
+
+
+def test_concurrent_misses_share_one_render(renders):
+    async def run():
+        cache = TileCache(cache_dir="")
+        pending = [asyncio.create_task(cache.get(A)) for _ in range(3)]
+        await rendering(renders, A)
+        renders[A].set()
+        return await asyncio.gather(*pending), cache.stats()
+
+    results, stats = asyncio.run(run())
+    assert {tile for tile, _ in results} == {b"(10, 1, 1)-v1"}
+    assert stats["misses"] == 3
+
+
+def test_invalidation_after_render_drops_cached_tile(renders, tmp_path):
+    async def run():
+        cache = TileCache(cache_dir=str(tmp_path))
+        renders[A] = asyncio.Event()
+        renders[A].set()
+        await cache.get(A)
+        await cache.invalidate([A])
+        return await cache.get(A)
+
+    assert asyncio.run(run()) == (b"(10, 1, 1)-v2", "render")
@@ -0,0 +1,364 @@
+# app/tiles.py
+
+import asyncio
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from sqlalchemy.sql import text
+
+from app.database import async_engine
+
+logger = logging.getLogger(__name__)
+
+TILE_EXTENT = 4096
+TILE_BUFFER = 64  # px of tile extent rendered around each tile
+TILE_MAX_ZOOM = int(os.getenv("TILE_MAX_ZOOM", "22"))
+# Zoom levels up to and including this one return clustered points
+TILE_CLUSTER_MAX_ZOOM = int(os.getenv("TILE_CLUSTER_MAX_ZOOM", "11"))
+# Clusters are cells of a grid with this many cells along each tile side;
+# the grid is aligned to tile edges, so a cluster never straddles two tiles.
+TILE_CLUSTER_GRID = int(os.getenv("TILE_CLUSTER_GRID", "16"))
+# Only reports newer than this are drawn; 0 draws every report
+TILE_REPORT_WINDOW_HOURS = float(os.getenv("TILE_REPORT_WINDOW_HOURS", "168"))
+
+# Cache tiers. Tiles above TILE_CACHE_MAX_ZOOM are rendered on every request.
+TILE_CACHE_MAX_ZOOM = int(os.getenv("TILE_CACHE_MAX_ZOOM", "16"))
+TILE_CACHE_MEMORY_BYTES = int(os.getenv("TILE_CACHE_MEMORY_BYTES", str(64 * 1024 * 1024)))
+TILE_CACHE_DIR = os.getenv("TILE_CACHE_DIR", "")  # empty disables the disk tier
+TILE_CACHE_DISK_BYTES = int(os.getenv("TILE_CACHE_DISK_BYTES", str(1024 * 1024 * 1024)))
+# Upper bound on staleness: inserts handled by other workers only invalidate
+# the shared disk tier, and the report window moves with time.
+TILE_CACHE_TTL = float(os.getenv("TILE_CACHE_TTL", "300"))
+
+WEB_MERCATOR_HALF = 20037508.342789244
+MAX_LATITUDE = 85.0511287798
+
+TileKey = Tuple[int, int, int]
+
+# ST_TileEnvelope's margin widens the index filter by the render buffer so
+# points just outside the tile still draw their full symbol at the edge.
+POINTS_SQL = text("""
+    SELECT ST_AsMVT(t, 'reports', :extent, 'geom') FROM (
+        SELECT ST_AsMVTGeom(ST_Transform(r.location, 3857), ST_TileEnvelope(:z, :x, :y), :extent, :buffer) AS geom,
+               r.id::text AS id,
+               r.hazard_type::text AS hazard_type,
+               r.user_role::text AS user_role,
+               r.event_id::text AS event_id,
+               extract(epoch FROM r.created_at)::bigint AS created_at
+        FROM citizen_reports r
+        WHERE r.location && ST_Transform(ST_TileEnvelope(:z, :x, :y, margin => :margin), 4326)
+          AND r.created_at >= :since
+    ) t
+""")
+
+CLUSTERS_SQL = text("""
+    SELECT ST_AsMVT(t, 'reports', :extent, 'geom') FROM (
+        SELECT ST_AsMVTGeom(ST_Centroid(ST_Collect(p.geom)), ST_TileEnvelope(:z, :x, :y), :extent, :buffer) AS geom,
+               count(*) AS point_count,
+               mode() WITHIN GROUP (ORDER BY p.hazard_type)::text AS hazard_type,
+               extract(epoch FROM max(p.created_at))::bigint AS latest
+        FROM (
+            SELECT ST_Transform(r.location, 3857) AS geom, r.hazard_type, r.created_at
+            FROM citizen_reports r
+            WHERE r.location && ST_Transform(ST_TileEnvelope(:z, :x, :y), 4326)
+              AND r.created_at >= :since
+        ) p
+        WHERE p.geom && ST_TileEnvelope(:z, :x, :y)
+        GROUP BY ST_SnapToGrid(p.geom, :origin, :origin, :cell, :cell)
+    ) t
+""")
+
+
+def valid_tile(z: int, x: int, y: int) -> bool:
+    return 0 <= z <= TILE_MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def tiles_for_point(lon: float, lat: float, max_zoom: int = TILE_CACHE_MAX_ZOOM) -> Set[TileKey]:
+    """Every cached tile whose content can change when a report lands at (lon, lat)."""
+    lat = max(-MAX_LATITUDE, min(MAX_LATITUDE, lat))
+    fx = (lon + 180.0) / 360.0
+    fy = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    margin = TILE_BUFFER / TILE_EXTENT
+    keys = set()
+    for z in range(max_zoom + 1):
+        n = 2 ** z
+        tx, ty = fx * n, fy * n
+        x, y = min(int(tx), n - 1), min(int(ty), n - 1)
+        keys.add((z, x, y))
+        if z <= TILE_CLUSTER_MAX_ZOOM:
+            continue
+        # Point tiles also draw neighbours' points inside the buffer
+        dxs = [0] + ([-1] if tx - x < margin else []) + ([1] if x + 1 - tx < margin else [])
+        dys = [0] + ([-1] if ty - y < margin else []) + ([1] if y + 1 - ty < margin else [])
+        for dx in dxs:
+            for dy in dys:
+                if 0 <= x + dx < n and 0 <= y + dy < n:
+                    keys.add((z, x + dx, y + dy))
+    return keys
+
+
+class TileCache:
+    """
+    Two-tier LRU of rendered MVT tiles: bytes in memory, files on disk.
+
+    Both tiers are bounded by size in bytes and entries expire after
+    TILE_CACHE_TTL. The disk tier lives under TILE_CACHE_DIR as z/x/y.mvt and
+    can be shared by every worker on the host; its index is rebuilt from the
+    directory on first use. Concurrent misses for the same tile share one
+    render, and a render that overlaps an invalidation of its own tile is
+    not stored.
+    """
+
+    def __init__(
+        self,
+        memory_bytes: int = TILE_CACHE_MEMORY_BYTES,
+        cache_dir: str = TILE_CACHE_DIR,
+        disk_bytes: int = TILE_CACHE_DISK_BYTES,
+        ttl: float = TILE_CACHE_TTL,
+        max_zoom: int = TILE_CACHE_MAX_ZOOM,
+    ):
+        self.memory_bytes = memory_bytes
+        self.cache_dir = cache_dir
+        self.disk_bytes = disk_bytes
+        self.ttl = ttl
+        self.max_zoom = max_zoom
+        self._memory: "OrderedDict[TileKey, Tuple[float, bytes]]" = OrderedDict()
+        self._memory_size = 0
+        self._disk: Optional["OrderedDict[TileKey, int]"] = None  # key -> size, LRU order
+        self._disk_size = 0
+        self._disk_lock = threading.RLock()
+        self._inflight: Dict[TileKey, asyncio.Task] = {}
+        self._invalidating: Set[asyncio.Task] = set()
+        # key -> invalidations seen while a render of that key is in flight
+        self._stamps: Dict[TileKey, int] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def cacheable(self, z: int) -> bool:
+        return z <= self.max_zoom
+
+    async def get(self, key: TileKey) -> Tuple[bytes, str]:
+        """Return (tile, source) where source is memory, disk, render or uncached."""
+        if not self.cacheable(key[0]):
+            return await render_tile(*key), "uncached"
+        tile = self._memory_get(key)
+        if tile is not None:
+            self.memory_hits += 1
+            return tile, "memory"
+        if self.cache_dir:
+            tile = await asyncio.to_thread(self._disk_get, key)
+            if tile is not None:
+                self.disk_hits += 1
+                self._memory_put(key, tile)
+                return tile, "disk"
+
+        self.misses += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.create_task(self._fill(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._fill_done(key, t))
+        # Shielded so one client disconnecting doesn't cancel the shared render
+        return await asyncio.shield(task), "render"
+
+    async def _fill(self, key: TileKey) -> bytes:
+        stamp = self._stamps.get(key, 0)
+        tile = await render_tile(*key)
+        if self._stamps.get(key, 0) == stamp:
+            self._memory_put(key, tile)
+            if self.cache_dir:
+                await asyncio.to_thread(self._disk_put, key, tile)
+                if self._stamps.get(key, 0) != stamp:
+                    # Invalidated while writing; its removal may have run first
+                    await asyncio.to_thread(self._disk_remove, {key})
+        return tile
+
+    def _fill_done(self, key: TileKey, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        self._stamps.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("Tile render failed", extra={"tile": key, "error": str(task.exception())})
+
+    async def invalidate(self, keys: Iterable[TileKey]):
+        """Drop tiles from both tiers."""
+        keys = set(keys)
+        if not keys:
+            return
+        self.invalidations += len(keys)
+        for key in keys & self._inflight.keys():
+            self._stamps[key] = self._stamps.get(key, 0) + 1
+        for key in keys:
+            entry = self._memory.pop(key, None)
+            if entry is not None:
+                self._memory_size -= len(entry[1])
+        if self.cache_dir:
+            await asyncio.to_thread(self._disk_remove, keys)
+
+    async def invalidate_points(self, points: Iterable[Tuple[float, float]]):
+        """Drop every cached tile touched by reports at these (lon, lat) points."""
+        keys: Set[TileKey] = set()
+        for lon, lat in points:
+            keys |= tiles_for_point(lon, lat, self.max_zoom)
+        await self.invalidate(keys)
+
+    def on_report_notify(self, payload: str):
+        """PgListener callback for report_feed: invalidate tiles for reports
+        inserted by any worker (this one already did so for its own)."""
+        try:
+            data = json.loads(payload)
+            point = (float(data["lon"]), float(data["lat"]))
+        except (ValueError, KeyError, TypeError):
+            return
+        task = asyncio.get_running_loop().create_task(self.invalidate_points([point]))
+        self._invalidating.add(task)
+        task.add_done_callback(self._invalidating.discard)
+
+    def stats(self) -> Dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "disk_enabled": bool(self.cache_dir),
+            "memory_entries": len(self._memory),
+            "memory_bytes": self._memory_size,
+            "disk_entries": len(self._disk) if self._disk is not None else 0,
+            "disk_bytes": self._disk_size,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    # Memory tier (event loop only, no locking)
+
+    def _memory_get(self, key: TileKey) -> Optional[bytes]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, tile = entry
+        if time.monotonic() - stored_at > self.ttl:
+            del self._memory[key]
+            self._memory_size -= len(tile)
+            return None
+        self._memory.move_to_end(key)
+        return tile
+
+    def _memory_put(self, key: TileKey, tile: bytes):
+        if len(tile) > self.memory_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_size -= len(old[1])
+        self._memory[key] = (time.monotonic(), tile)
+        self._memory_size += len(tile)
+        while self._memory_size > self.memory_bytes:
+            _, (_, evicted) = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+
+    # Disk tier (runs in worker threads; the index is guarded by _disk_lock,
+    # file operations tolerate files removed by other workers)
+
+    def _path(self, key: TileKey) -> str:
+        z, x, y = key
+        return os.path.join(self.cache_dir, str(z), str(x), f"{y}.mvt")
+
+    def _disk_index(self) -> "OrderedDict[TileKey, int]":
+        if self._disk is None:
+            entries = []
+            for root, _, files in os.walk(self.cache_dir):
+                for name in files:
+                    if not name.endswith(".mvt"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        z, x = (int(p) for p in os.path.relpath(root, self.cache_dir).split(os.sep))
+                        st = os.stat(path)
+                    except (ValueError, OSError):
+                        continue
+                    entries.append((st.st_mtime, (z, x, int(name[:-4])), st.st_size))
+            entries.sort()
+            self._disk = OrderedDict((key, size) for _, key, size in entries)
+            self._disk_size = sum(size for _, _, size in entries)
+        return self._disk
+
+    def _disk_get(self, key: TileKey) -> Optional[bytes]:
+        path = self._path(key)
+        with self._disk_lock:
+            index = self._disk_index()
+            try:
+                if time.time() - os.stat(path).st_mtime > self.ttl:
+                    self._disk_remove([key])
+                    return None
+                with open(path, "rb") as f:
+                    tile = f.read()
+            except OSError:
+                # Never written, or removed by another worker
+                self._disk_size -= index.pop(key, 0)
+                return None
+            # The file may have been written by another worker
+            self._disk_size += len(tile) - index.pop(key, 0)
+            index[key] = len(tile)
+            return tile
+
+    def _disk_put(self, key: TileKey, tile: bytes):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with self._disk_lock:
+            index = self._disk_index()
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(tmp, "wb") as f:
+                    f.write(tile)
+                os.replace(tmp, path)
+            except OSError as e:
+                logger.warning("Tile cache write failed", extra={"path": path, "error": str(e)})
+                return
+            self._disk_size += len(tile) - index.pop(key, 0)
+            index[key] = len(tile)
+            while self._disk_size > self.disk_bytes and index:
+                evicted, size = index.popitem(last=False)
+                self._disk_size -= size
+                try:
+                    os.remove(self._path(evicted))
+                except OSError:
+                    pass
+
+    def _disk_remove(self, keys: Iterable[TileKey]):
+        with self._disk_lock:
+            index = self._disk_index()
+            for key in keys:
+                # Other workers may have written the file, so always try to unlink
+                self._disk_size -= index.pop(key, 0)
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+
+async def render_tile(z: int, x: int, y: int, engine=async_engine) -> bytes:
+    """Render one MVT tile: grid clusters up to TILE_CLUSTER_MAX_ZOOM, points above."""
+    since = datetime.min
+    if TILE_REPORT_WINDOW_HOURS > 0:
+        since = datetime.utcnow() - timedelta(hours=TILE_REPORT_WINDOW_HOURS)
+    params = {"z": z, "x": x, "y": y, "extent": TILE_EXTENT, "buffer": TILE_BUFFER, "since": since}
+    if z <= TILE_CLUSTER_MAX_ZOOM:
+        stmt = CLUSTERS_SQL
+        params["origin"] = -WEB_MERCATOR_HALF
+        params["cell"] = 2 * WEB_MERCATOR_HALF / 2 ** z / TILE_CLUSTER_GRID
+    else:
+        stmt = POINTS_SQL
+        params["margin"] = TILE_BUFFER / TILE_EXTENT
+    async with engine.connect() as conn:
+        tile = await conn.scalar(stmt, params)
+    return bytes(tile or b"")
+
+
+tile_cache = TileCache()
@@ -0,0 +1,24 @@
+-- 0001_alert_deliveries.sql
+-- Per-alert push fan-out progress and Expo push tickets (see app/dispatch.py).
+
+CREATE TABLE IF NOT EXISTS alert_deliveries (
+    alert_id     UUID PRIMARY KEY REFERENCES alerts(id) ON DELETE CASCADE,
+    status       VARCHAR NOT NULL DEFAULT 'SENDING',
+    total_tokens INTEGER NOT NULL DEFAULT 0,
+    sent_count   INTEGER NOT NULL DEFAULT 0,
+    failed_count INTEGER NOT NULL DEFAULT 0,
+    started_at   TIMESTAMP DEFAULT now(),
+    finished_at  TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS push_tickets (
+    id         UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    alert_id   UUID NOT NULL REFERENCES alerts(id) ON DELETE CASCADE,
+    push_token VARCHAR NOT NULL,
+    status     VARCHAR NOT NULL,
+    ticket_id  VARCHAR,
+    error      VARCHAR,
+    created_at TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_push_tickets_alert_id ON push_tickets (alert_id);
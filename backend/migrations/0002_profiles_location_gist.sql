@@ -0,0 +1,8 @@
+-- 0002_profiles_location_gist.sql
+-- Spatial index for alert audience resolution (see app/audience.py).
+-- CONCURRENTLY avoids locking profiles; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_profiles_last_known_location
+    ON profiles USING GIST (last_known_location);
+
+ANALYZE profiles;
@@ -0,0 +1,25 @@
+-- 0003_jobs.sql
+-- Durable background job queue (see app/jobs.py).
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id           UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    job_type     VARCHAR NOT NULL,
+    payload      JSON NOT NULL,
+    status       VARCHAR NOT NULL DEFAULT 'QUEUED',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 5,
+    run_after    TIMESTAMP NOT NULL DEFAULT now(),
+    locked_at    TIMESTAMP,
+    last_error   VARCHAR,
+    result       JSON,
+    created_at   TIMESTAMP DEFAULT now(),
+    finished_at  TIMESTAMP
+);
+
+-- Claim path: next runnable jobs of one type
+CREATE INDEX IF NOT EXISTS ix_jobs_queued
+    ON jobs (job_type, run_after) WHERE status = 'QUEUED';
+
+-- Stale-lock sweep
+CREATE INDEX IF NOT EXISTS ix_jobs_running
+    ON jobs (locked_at) WHERE status = 'RUNNING';
@@ -0,0 +1,26 @@
+-- 0004_hazard_events.sql
+-- Hazard events produced by the report correlation engine (see app/correlation.py).
+
+CREATE TABLE IF NOT EXISTS hazard_events (
+    id           UUID PRIMARY KEY DEFAULT uuid_generate_v4(),
+    hazard_type  hazard_type_enum NOT NULL,
+    status       VARCHAR NOT NULL DEFAULT 'ACTIVE',
+    centroid     geometry(POINT, 4326) NOT NULL,
+    report_count INTEGER NOT NULL DEFAULT 0,
+    total_weight DOUBLE PRECISION NOT NULL DEFAULT 0,
+    confidence   DOUBLE PRECISION NOT NULL DEFAULT 0,
+    first_seen   TIMESTAMP NOT NULL,
+    last_seen    TIMESTAMP NOT NULL,
+    version      INTEGER NOT NULL DEFAULT 0,
+    merged_into  UUID REFERENCES hazard_events(id),
+    updated_at   TIMESTAMP DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS ix_hazard_events_active
+    ON hazard_events (last_seen DESC) WHERE status = 'ACTIVE';
+CREATE INDEX IF NOT EXISTS idx_hazard_events_centroid
+    ON hazard_events USING GIST (centroid);
+
+ALTER TABLE citizen_reports
+    ADD COLUMN IF NOT EXISTS event_id UUID REFERENCES hazard_events(id);
+CREATE INDEX IF NOT EXISTS ix_citizen_reports_event_id ON citizen_reports (event_id);
@@ -0,0 +1,9 @@
+-- 0005_citizen_reports_idempotency.sql
+-- Client idempotency keys for POST /api/reports/citizen/batch (offline relay sync).
+
+ALTER TABLE citizen_reports
+    ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR;
+
+CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_citizen_reports_user_idempotency_key
+    ON citizen_reports (user_id, idempotency_key)
+    WHERE idempotency_key IS NOT NULL;
@@ -0,0 +1,19 @@
+-- 0006_citizen_reports_keyset.sql
+-- Indexes for GET /api/reports: keyset pagination on (created_at, id) plus
+-- the hazard_type / user_role filters, and the spatial index for bbox queries.
+-- CONCURRENTLY avoids locking citizen_reports; run outside a transaction block.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_citizen_reports_created_id
+    ON citizen_reports (created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_citizen_reports_hazard_created_id
+    ON citizen_reports (hazard_type, created_at DESC, id DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_citizen_reports_role_created_id
+    ON citizen_reports (user_role, created_at DESC, id DESC);
+
+-- GeoAlchemy2 creates this with Base.metadata.create_all; older databases may lack it.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_citizen_reports_location
+    ON citizen_reports USING GIST (location);
+
+ANALYZE citizen_reports;
@@ -0,0 +1,27 @@
+-- 0007_alerts_expiry.sql
+-- Alert expiry and change notifications for the in-process active alert
+-- index (see app/alert_index.py). Every insert/update/delete on alerts sends
+-- {"op": ..., "id": ...} on channel alert_changes to all listening workers.
+
+ALTER TABLE alerts
+    ADD COLUMN IF NOT EXISTS expires_at TIMESTAMP;
+
+-- Existing alerts get the default 24 hour lifetime
+UPDATE alerts SET expires_at = created_at + interval '24 hours' WHERE expires_at IS NULL;
+
+CREATE INDEX IF NOT EXISTS ix_alerts_expires_at ON alerts (expires_at);
+
+CREATE OR REPLACE FUNCTION notify_alert_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify(
+        'alert_changes',
+        json_build_object('op', TG_OP, 'id', COALESCE(NEW.id, OLD.id))::text
+    );
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS alerts_notify ON alerts;
+CREATE TRIGGER alerts_notify
+    AFTER INSERT OR UPDATE OR DELETE ON alerts
+    FOR EACH ROW EXECUTE FUNCTION notify_alert_change();
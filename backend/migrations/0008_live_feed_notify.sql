@@ -0,0 +1,48 @@
+-- 0008_live_feed_notify.sql
+-- NOTIFY payloads for the live feed (GET /api/live, see app/live_feed.py).
+-- New citizen reports go out on report_feed, alert inserts/updates on
+-- alert_feed. Payloads stay well under the 8000 byte NOTIFY limit: alerts
+-- carry their bounding box and a truncated message, not the polygon.
+
+CREATE OR REPLACE FUNCTION notify_report_feed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('report_feed', json_build_object(
+        'id', NEW.id,
+        'hazard_type', NEW.hazard_type,
+        'user_role', NEW.user_role,
+        'lon', ST_X(NEW.location),
+        'lat', ST_Y(NEW.location),
+        'created_at', NEW.created_at
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS citizen_reports_feed ON citizen_reports;
+CREATE TRIGGER citizen_reports_feed
+    AFTER INSERT ON citizen_reports
+    FOR EACH ROW EXECUTE FUNCTION notify_report_feed();
+
+CREATE OR REPLACE FUNCTION notify_alert_feed() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('alert_feed', json_build_object(
+        'op', TG_OP,
+        'id', NEW.id,
+        'severity', NEW.severity,
+        'title', left(NEW.title, 200),
+        'message', left(NEW.message, 1000),
+        'bbox', json_build_array(
+            ST_XMin(NEW.affected_area), ST_YMin(NEW.affected_area),
+            ST_XMax(NEW.affected_area), ST_YMax(NEW.affected_area)
+        ),
+        'created_at', NEW.created_at,
+        'expires_at', NEW.expires_at
+    )::text);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS alerts_feed ON alerts;
+CREATE TRIGGER alerts_feed
+    AFTER INSERT OR UPDATE ON alerts
+    FOR EACH ROW EXECUTE FUNCTION notify_alert_feed();
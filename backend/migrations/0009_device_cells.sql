@@ -0,0 +1,92 @@
+-- 0009_device_cells.sql
+-- Per-cell counts of pushable devices (profiles with a location and a push
+-- token) for POST /api/admin/alerts/preview (see app/audience_grid.py).
+-- Cells are DEVICE_CELL_DEG = 0.01 degree squares keyed by
+-- (floor(lon / 0.01), floor(lat / 0.01)); keep the two in sync.
+--
+-- Statement-level triggers with transition tables keep the counts current:
+-- the profile write buffer's UPDATE ... FROM (VALUES ...) of thousands of
+-- rows costs one grouped upsert, not one per row. Deltas are applied in
+-- (cell_x, cell_y) order so concurrent writers lock cells in the same order.
+
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS device_cells (
+    cell_x INTEGER NOT NULL,
+    cell_y INTEGER NOT NULL,
+    devices INTEGER NOT NULL,
+    PRIMARY KEY (cell_x, cell_y)
+);
+
+CREATE OR REPLACE FUNCTION device_cells_apply() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        INSERT INTO device_cells (cell_x, cell_y, devices)
+        SELECT floor(ST_X(last_known_location) / 0.01)::int, floor(ST_Y(last_known_location) / 0.01)::int, count(*)
+        FROM new_rows
+        WHERE last_known_location IS NOT NULL AND push_token IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (cell_x, cell_y) DO UPDATE SET devices = device_cells.devices + EXCLUDED.devices;
+    ELSIF TG_OP = 'DELETE' THEN
+        INSERT INTO device_cells (cell_x, cell_y, devices)
+        SELECT floor(ST_X(last_known_location) / 0.01)::int, floor(ST_Y(last_known_location) / 0.01)::int, -count(*)
+        FROM old_rows
+        WHERE last_known_location IS NOT NULL AND push_token IS NOT NULL
+        GROUP BY 1, 2
+        ORDER BY 1, 2
+        ON CONFLICT (cell_x, cell_y) DO UPDATE SET devices = device_cells.devices + EXCLUDED.devices;
+    ELSE
+        INSERT INTO device_cells (cell_x, cell_y, devices)
+        SELECT cx, cy, sum(d)
+        FROM (
+            SELECT floor(ST_X(last_known_location) / 0.01)::int AS cx,
+                   floor(ST_Y(last_known_location) / 0.01)::int AS cy, -1 AS d
+            FROM old_rows
+            WHERE last_known_location IS NOT NULL AND push_token IS NOT NULL
+            UNION ALL
+            SELECT floor(ST_X(last_known_location) / 0.01)::int,
+                   floor(ST_Y(last_known_location) / 0.01)::int, 1
+            FROM new_rows
+            WHERE last_known_location IS NOT NULL AND push_token IS NOT NULL
+        ) deltas
+        GROUP BY cx, cy
+        HAVING sum(d) <> 0  -- e.g. full_name edits and moves within a cell
+        ORDER BY cx, cy
+        ON CONFLICT (cell_x, cell_y) DO UPDATE SET devices = device_cells.devices + EXCLUDED.devices;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- No writes may slip between the backfill and the triggers going live
+LOCK TABLE profiles IN SHARE ROW EXCLUSIVE MODE;
+
+DROP TRIGGER IF EXISTS profiles_device_cells_insert ON profiles;
+CREATE TRIGGER profiles_device_cells_insert
+    AFTER INSERT ON profiles
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION device_cells_apply();
+
+DROP TRIGGER IF EXISTS profiles_device_cells_update ON profiles;
+CREATE TRIGGER profiles_device_cells_update
+    AFTER UPDATE ON profiles
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION device_cells_apply();
+
+DROP TRIGGER IF EXISTS profiles_device_cells_delete ON profiles;
+CREATE TRIGGER profiles_device_cells_delete
+    AFTER DELETE ON profiles
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION device_cells_apply();
+
+TRUNCATE device_cells;
+INSERT INTO device_cells (cell_x, cell_y, devices)
+SELECT floor(ST_X(last_known_location) / 0.01)::int, floor(ST_Y(last_known_location) / 0.01)::int, count(*)
+FROM profiles
+WHERE last_known_location IS NOT NULL AND push_token IS NOT NULL
+GROUP BY 1, 2;
+
+COMMIT;
+
+ANALYZE device_cells;
@@ -0,0 +1,19 @@
+-- 0010_keyword_tuner.sql
+-- Incremental keyword tuning from analyst feedback (see app/keyword_tuner.py).
+-- Each feedback row is counted once: the tuner claims rows with
+-- tuned_at IS NULL, adds their CONFIRMED/DISMISSED votes to the keyword that
+-- found the post, and rescores scraping_keywords.effectiveness_score.
+-- Existing feedback is picked up by the first tuner run.
+
+ALTER TABLE analyst_feedback
+    ADD COLUMN IF NOT EXISTS tuned_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS ix_analyst_feedback_untuned
+    ON analyst_feedback (created_at) WHERE tuned_at IS NULL;
+
+CREATE TABLE IF NOT EXISTS keyword_feedback_stats (
+    keyword_id UUID PRIMARY KEY,
+    confirmed  INTEGER NOT NULL DEFAULT 0,
+    dismissed  INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP NOT NULL DEFAULT now()
+);
@@ -0,0 +1,13 @@
+-- 0011_push_receipts.sql
+-- Expo delivery receipts for accepted push tickets (see app/dispatch.py).
+-- A ticket only means Expo accepted the message; the receipt, fetched
+-- PUSH_RECEIPT_DELAY after sending, says whether it reached the device.
+-- The partial index covers the tickets still waiting for one.
+
+ALTER TABLE push_tickets
+    ADD COLUMN IF NOT EXISTS receipt_status VARCHAR,
+    ADD COLUMN IF NOT EXISTS receipt_error VARCHAR;
+
+CREATE INDEX IF NOT EXISTS ix_push_tickets_receipt_due
+    ON push_tickets (created_at)
+    WHERE status = 'ok' AND ticket_id IS NOT NULL AND receipt_status IS NULL;
@@ -0,0 +1,7 @@
+-- 0012_push_receipts_claim.sql
+-- Receipt polling claims tickets by stamping receipt_checked_at and commits
+-- before calling Expo, instead of holding FOR UPDATE locks across the HTTP
+-- call (see app/dispatch.py). A claim is a lease of PUSH_RECEIPT_INTERVAL.
+
+ALTER TABLE push_tickets
+    ADD COLUMN IF NOT EXISTS receipt_checked_at TIMESTAMP;